@@ -60,6 +60,14 @@ def create_app(config_name='default'):
     migrate.init_app(app, db, directory='app/migrations')
     login_manager.init_app(app)
     
+    # Per-request query counts and timings
+    from app.services.query_profiler import init_query_profiler
+    init_query_profiler(app)
+    
+    # Prometheus request/query metrics (after the profiler, see init_metrics)
+    from app.services.metrics import init_metrics
+    init_metrics(app)
+    
     # Configure login
     login_manager.login_view = 'auth.login'
     login_manager.login_message = None
@@ -81,6 +89,10 @@ def create_app(config_name='default'):
     app.register_blueprint(goals.bp)
     app.register_blueprint(profile.bp)
     
+    # Register CLI commands
+    from app.commands import register_commands
+    register_commands(app)
+    
     # Register custom Jinja filters
     @app.template_filter('from_json')
     def from_json_filter(s):
@@ -51,6 +51,17 @@ def get_metadata():
     return target_db.metadata
 
 
+# FTS5 search tables (and their shadow tables) are managed by raw SQL in
+# their migration; keep autogenerate from proposing to drop them
+FTS_TABLE_PREFIXES = ('exercise_search', 'equipment_search')
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == 'table' and reflected and compare_to is None and name.startswith(FTS_TABLE_PREFIXES):
+        return False
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -93,6 +104,8 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = include_object
 
     connectable = get_engine()
 
@@ -0,0 +1,39 @@
+"""Add user_exercise_last_performance projection table
+
+Revision ID: 8c1e4a2f9d37
+Revises: 648f70b60547
+Create Date: 2026-10-17 09:12:44.215903
+
+Run `flask rebuild-last-performance` after upgrading to backfill the
+table from existing workout history.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c1e4a2f9d37'
+down_revision = '648f70b60547'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_exercise_last_performance',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('exercise_id', sa.Integer(), nullable=False),
+    sa.Column('workout_session_id', sa.Integer(), nullable=False),
+    sa.Column('sets_snapshot', sa.Text(), nullable=False),
+    sa.Column('overall_rpe', sa.String(length=1), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['exercise_id'], ['master_exercises.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['workout_session_id'], ['workout_sessions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'exercise_id')
+    )
+
+
+def downgrade():
+    op.drop_table('user_exercise_last_performance')
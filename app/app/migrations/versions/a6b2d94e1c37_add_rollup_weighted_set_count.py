@@ -0,0 +1,29 @@
+"""Add weighted_set_count to user_exercise_rollups
+
+Revision ID: a6b2d94e1c37
+Revises: d8e3a5c1f7b4
+Create Date: 2026-10-18 09:12:44.318207
+
+Run `flask rebuild-rollups` after upgrading to fill the new column from
+existing workout history.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6b2d94e1c37'
+down_revision = 'd8e3a5c1f7b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_exercise_rollups', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('weighted_set_count', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('user_exercise_rollups', schema=None) as batch_op:
+        batch_op.drop_column('weighted_set_count')
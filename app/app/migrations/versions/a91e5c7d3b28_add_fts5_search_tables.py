@@ -0,0 +1,65 @@
+"""Add FTS5 search tables for exercises and equipment (SQLite only)
+
+Revision ID: a91e5c7d3b28
+Revises: f3a8d62c5e14
+Create Date: 2026-10-17 16:40:12.806355
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a91e5c7d3b28'
+down_revision = 'f3a8d62c5e14'
+branch_labels = None
+depends_on = None
+
+
+FTS_TABLES = {
+    'exercise_search': ('master_exercises', ['name', 'primary_muscle', 'secondary_muscles',
+                                             'category', 'difficulty_level', 'description']),
+    'equipment_search': ('master_equipment', ['name', 'equipment_type', 'manufacturer',
+                                              'model', 'description']),
+}
+
+
+def upgrade():
+    # Other databases use the ILIKE fallback in app/services/search.py
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for table, (content, columns) in FTS_TABLES.items():
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+
+        op.execute(
+            f"CREATE VIRTUAL TABLE {table} USING fts5("
+            f"{column_list}, content='{content}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_ai AFTER INSERT ON {content} BEGIN "
+            f"INSERT INTO {table}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_ad AFTER DELETE ON {content} BEGIN "
+            f"INSERT INTO {table}({table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_au AFTER UPDATE ON {content} BEGIN "
+            f"INSERT INTO {table}({table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {table}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+        )
+        op.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for table in FTS_TABLES:
+        for suffix in ('ai', 'ad', 'au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_{suffix}")
+        op.execute(f"DROP TABLE IF EXISTS {table}")
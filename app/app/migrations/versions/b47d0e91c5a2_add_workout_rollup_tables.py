@@ -0,0 +1,60 @@
+"""Add daily/weekly workout rollup tables for reports
+
+Revision ID: b47d0e91c5a2
+Revises: 8c1e4a2f9d37
+Create Date: 2026-10-17 10:03:18.552140
+
+Run `flask rebuild-rollups` after upgrading to backfill the tables from
+existing workout history.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b47d0e91c5a2'
+down_revision = '8c1e4a2f9d37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_workout_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(length=4), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('session_count', sa.Integer(), nullable=False),
+    sa.Column('set_count', sa.Integer(), nullable=False),
+    sa.Column('rep_count', sa.Integer(), nullable=False),
+    sa.Column('volume', sa.Float(), nullable=False),
+    sa.Column('max_weight', sa.Float(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'period', 'period_start')
+    )
+    op.create_table('user_exercise_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(length=4), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('exercise_id', sa.Integer(), nullable=False),
+    sa.Column('session_count', sa.Integer(), nullable=False),
+    sa.Column('set_count', sa.Integer(), nullable=False),
+    sa.Column('rep_count', sa.Integer(), nullable=False),
+    sa.Column('volume', sa.Float(), nullable=False),
+    sa.Column('max_weight', sa.Float(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['exercise_id'], ['master_exercises.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'period', 'period_start', 'exercise_id')
+    )
+    with op.batch_alter_table('user_exercise_rollups', schema=None) as batch_op:
+        batch_op.create_index('idx_rollup_user_exercise', ['user_id', 'period', 'exercise_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_exercise_rollups', schema=None) as batch_op:
+        batch_op.drop_index('idx_rollup_user_exercise')
+
+    op.drop_table('user_exercise_rollups')
+    op.drop_table('user_workout_rollups')
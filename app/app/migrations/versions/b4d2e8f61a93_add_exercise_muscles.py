@@ -0,0 +1,60 @@
+"""Add exercise_muscles table normalized from secondary_muscles
+
+Revision ID: b4d2e8f61a93
+Revises: a91e5c7d3b28
+Create Date: 2026-10-17 18:41:27.508136
+
+Backfills one row per exercise and secondary muscle from the JSON
+master_exercises.secondary_muscles column.
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d2e8f61a93'
+down_revision = 'a91e5c7d3b28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    exercise_muscles = op.create_table('exercise_muscles',
+    sa.Column('exercise_id', sa.Integer(), nullable=False),
+    sa.Column('muscle', sa.String(length=100), nullable=False),
+    sa.ForeignKeyConstraint(['exercise_id'], ['master_exercises.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('exercise_id', 'muscle')
+    )
+    with op.batch_alter_table('exercise_muscles', schema=None) as batch_op:
+        batch_op.create_index('idx_exercise_muscle', ['muscle'], unique=False)
+
+    # Backfill from the JSON column, skipping invalid or non-list values
+    rows = []
+    exercises = op.get_bind().execute(sa.text(
+        "SELECT id, secondary_muscles FROM master_exercises WHERE secondary_muscles IS NOT NULL"
+    ))
+    for exercise_id, secondary_muscles in exercises:
+        try:
+            muscles = json.loads(secondary_muscles) if secondary_muscles else []
+        except (ValueError, TypeError):
+            continue
+        if not isinstance(muscles, list):
+            continue
+        seen = set()
+        for muscle in muscles:
+            if isinstance(muscle, str) and muscle.strip() and muscle.strip() not in seen:
+                seen.add(muscle.strip())
+                rows.append({'exercise_id': exercise_id, 'muscle': muscle.strip()})
+
+    if rows:
+        op.bulk_insert(exercise_muscles, rows)
+
+
+def downgrade():
+    with op.batch_alter_table('exercise_muscles', schema=None) as batch_op:
+        batch_op.drop_index('idx_exercise_muscle')
+
+    op.drop_table('exercise_muscles')
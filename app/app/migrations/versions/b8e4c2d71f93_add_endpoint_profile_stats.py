@@ -0,0 +1,48 @@
+"""Add endpoint_profile_stats and endpoint_slow_statements for the query profiler
+
+Revision ID: b8e4c2d71f93
+Revises: a6b2d94e1c37
+Create Date: 2026-10-19 10:41:27.906153
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e4c2d71f93'
+down_revision = 'a6b2d94e1c37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('endpoint_profile_stats',
+    sa.Column('endpoint', sa.String(length=100), nullable=False),
+    sa.Column('requests', sa.Integer(), nullable=False),
+    sa.Column('queries', sa.Integer(), nullable=False),
+    sa.Column('max_queries', sa.Integer(), nullable=False),
+    sa.Column('db_ms', sa.Float(), nullable=False),
+    sa.Column('max_db_ms', sa.Float(), nullable=False),
+    sa.Column('request_ms', sa.Float(), nullable=False),
+    sa.Column('max_request_ms', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('endpoint')
+    )
+    op.create_table('endpoint_slow_statements',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('endpoint', sa.String(length=100), nullable=False),
+    sa.Column('duration_ms', sa.Float(), nullable=False),
+    sa.Column('statement', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('endpoint_slow_statements', schema=None) as batch_op:
+        batch_op.create_index('idx_slow_statement_endpoint', ['endpoint', 'duration_ms'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('endpoint_slow_statements', schema=None) as batch_op:
+        batch_op.drop_index('idx_slow_statement_endpoint')
+
+    op.drop_table('endpoint_slow_statements')
+    op.drop_table('endpoint_profile_stats')
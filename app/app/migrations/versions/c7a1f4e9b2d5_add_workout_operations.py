@@ -0,0 +1,31 @@
+"""Add workout_operations table for idempotent workout writes
+
+Revision ID: c7a1f4e9b2d5
+Revises: b4d2e8f61a93
+Create Date: 2026-10-17 21:05:43.118902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a1f4e9b2d5'
+down_revision = 'b4d2e8f61a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('workout_operations',
+    sa.Column('workout_session_id', sa.Integer(), nullable=False),
+    sa.Column('operation_id', sa.String(length=64), nullable=False),
+    sa.Column('result', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['workout_session_id'], ['workout_sessions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('workout_session_id', 'operation_id')
+    )
+
+
+def downgrade():
+    op.drop_table('workout_operations')
@@ -0,0 +1,30 @@
+"""Add user_schedule_versions table for calendar feed ETags
+
+Revision ID: d5a93f6e20b8
+Revises: b47d0e91c5a2
+Create Date: 2026-10-17 11:26:51.390417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a93f6e20b8'
+down_revision = 'b47d0e91c5a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_schedule_versions',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade():
+    op.drop_table('user_schedule_versions')
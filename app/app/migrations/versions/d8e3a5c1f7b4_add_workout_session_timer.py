@@ -0,0 +1,26 @@
+"""Add timer_resumed_at to workout_sessions for the server-side session timer
+
+Revision ID: d8e3a5c1f7b4
+Revises: c7a1f4e9b2d5
+Create Date: 2026-10-17 22:14:07.630215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8e3a5c1f7b4'
+down_revision = 'c7a1f4e9b2d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('workout_sessions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('timer_resumed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('workout_sessions', schema=None) as batch_op:
+        batch_op.drop_column('timer_resumed_at')
@@ -0,0 +1,26 @@
+"""Add (instance_id, program_day_id) index on scheduled_days for missing-day lookups
+
+Revision ID: e2c7b19a4f60
+Revises: d5a93f6e20b8
+Create Date: 2026-10-17 14:02:37.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2c7b19a4f60'
+down_revision = 'd5a93f6e20b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('scheduled_days', schema=None) as batch_op:
+        batch_op.create_index('idx_instance_day', ['instance_id', 'program_day_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('scheduled_days', schema=None) as batch_op:
+        batch_op.drop_index('idx_instance_day')
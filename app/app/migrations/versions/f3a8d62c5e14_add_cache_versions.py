@@ -0,0 +1,29 @@
+"""Add cache_versions table for invalidating in-process caches
+
+Revision ID: f3a8d62c5e14
+Revises: e2c7b19a4f60
+Create Date: 2026-10-17 15:18:09.274631
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8d62c5e14'
+down_revision = 'e2c7b19a4f60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cache_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('cache_versions')
@@ -0,0 +1,114 @@
+"""Flask CLI commands for maintenance tasks"""
+import click
+from app import db
+
+
+def echo_benchmark_results(results):
+    """Print a table of endpoint benchmark results"""
+    click.echo(f'{"Endpoint":<38} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"max ms":>8} {"queries":>8} {"budget":>7}')
+    for result in results:
+        click.echo(
+            f'{result.endpoint:<38} {result.percentile(50):>8.1f} {result.percentile(95):>8.1f} '
+            f'{result.percentile(99):>8.1f} {max(result.latencies_ms):>8.1f} {result.max_queries:>8} '
+            f'{result.budget:>7}{"  OVER BUDGET" if result.over_budget else ""}'
+        )
+
+
+def register_commands(app):
+    """Register custom CLI commands with the app"""
+
+    @app.cli.command('rebuild-last-performance')
+    @click.option('--user-id', type=int, default=None, help='Only rebuild rows for this user')
+    def rebuild_last_performance_command(user_id):
+        """Repopulate the last-performance table from workout history"""
+        from app.services.performance import rebuild_last_performance
+
+        count = rebuild_last_performance(user_id=user_id)
+        db.session.commit()
+        click.echo(f'Rebuilt {count} last-performance rows.')
+
+    @app.cli.command('rebuild-rollups')
+    @click.option('--user-id', type=int, default=None, help='Only rebuild rows for this user')
+    def rebuild_rollups_command(user_id):
+        """Repopulate the report rollup tables from workout history"""
+        from app.services.rollups import rebuild_rollups
+
+        count = rebuild_rollups(user_id=user_id)
+        db.session.commit()
+        click.echo(f'Rebuilt {count} workout rollup rows.')
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Create (if missing) and repopulate the FTS5 exercise/equipment search tables"""
+        from app.services.search import rebuild_search_index
+
+        if rebuild_search_index():
+            db.session.commit()
+            click.echo('Rebuilt exercise and equipment search index.')
+        else:
+            click.echo('Full-text search requires SQLite; using ILIKE fallback.')
+
+    @app.cli.command('bench-seed')
+    @click.option('--users', type=int, default=10, show_default=True, help='Number of users to create')
+    @click.option('--years', type=float, default=2, show_default=True, help='Years of workout history per user')
+    @click.option('--seed', type=int, default=1, show_default=True, help='Random seed; the same seed gives the same data')
+    @click.option('--exercises', type=int, default=300, show_default=True, help='Size of the exercise catalog')
+    @click.option('--equipment', type=int, default=120, show_default=True, help='Size of the equipment catalog')
+    @click.option('--end-date', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Last day of history (default: today)')
+    def bench_seed_command(users, years, seed, exercises, equipment, end_date):
+        """Fill the database with deterministic synthetic data for benchmarks"""
+        import time
+        from app.services.bench_data import generate_bench_data
+
+        started = time.perf_counter()
+        try:
+            counts = generate_bench_data(
+                users=users, years=years, seed=seed, exercises=exercises, equipment=equipment,
+                end_date=end_date.date() if end_date else None, progress=click.echo
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+        for table, count in sorted(counts.items()):
+            click.echo(f'  {table}: {count}')
+        click.echo(f'Seeded {sum(counts.values())} rows in {time.perf_counter() - started:.1f}s.')
+
+    @app.cli.command('bench-endpoints')
+    @click.option('--username', default='bench_1', show_default=True, help='User whose data the requests read')
+    @click.option('--iterations', type=click.IntRange(min=1), default=20, show_default=True, help='Timed calls per endpoint')
+    @click.option('--endpoint', 'only', multiple=True, help='Only run this endpoint (repeatable)')
+    def bench_endpoints_command(username, iterations, only):
+        """Time the heavy endpoints and fail when one exceeds its SQL query budget"""
+        from flask import current_app
+        from app.services.endpoint_bench import run_endpoint_benchmarks
+
+        try:
+            results = run_endpoint_benchmarks(current_app._get_current_object(), username=username,
+                                              iterations=iterations, only=only)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+        echo_benchmark_results(results)
+
+        over = [result.endpoint for result in results if result.over_budget]
+        if over:
+            raise click.ClickException(f'Over query budget: {", ".join(over)}')
+        click.echo('All endpoints within their query budgets.')
+
+    @app.cli.command('bench-streaks')
+    @click.option('--iterations', type=click.IntRange(min=1), default=20, show_default=True, help='Timed calls per user')
+    def bench_streaks_command(iterations):
+        """Check the dashboard runs the same queries in comparable time for any streak length"""
+        from flask import current_app
+        from app.services.endpoint_bench import run_streak_benchmark
+
+        try:
+            results, problems = run_streak_benchmark(current_app._get_current_object(), iterations=iterations)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+        echo_benchmark_results(results)
+        if problems:
+            raise click.ClickException('; '.join(problems))
+        click.echo('Dashboard queries and latency are flat across streak lengths.')
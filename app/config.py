@@ -32,6 +32,16 @@ class Config:
     MAX_REPS = 100
     MIN_REPS = 1
     MAX_NAME_LENGTH = 50
+    
+    # Query profiling: Server-Timing headers, slow-request log, admin page
+    QUERY_PROFILER_ENABLED = os.environ.get('QUERY_PROFILER_ENABLED', '1') != '0'
+    QUERY_PROFILER_MAX_QUERIES = int(os.environ.get('QUERY_PROFILER_MAX_QUERIES', 50))  # Log requests above this
+    QUERY_PROFILER_SLOW_REQUEST_MS = int(os.environ.get('QUERY_PROFILER_SLOW_REQUEST_MS', 500))  # Or slower than this
+    QUERY_PROFILER_SLOWEST = 5  # Statements kept per request and per endpoint
+    
+    # Prometheus metrics at /metrics; without a token only direct local scrapes are allowed
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
 
 
 class DevelopmentConfig(Config):
@@ -45,8 +55,17 @@ class ProductionConfig(Config):
     SESSION_COOKIE_SECURE = True  # Require HTTPS
 
 
+class TestingConfig(DevelopmentConfig):
+    """Test configuration (in-memory database, no CSRF)"""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    WTF_CSRF_ENABLED = False
+    METRICS_ENABLED = False
+
+
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
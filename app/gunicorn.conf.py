@@ -0,0 +1,23 @@
+"""Gunicorn server hooks for CasettaFit
+
+Worker count, bind address and logging are set on the command line in
+casettafit.service. This file only prepares the shared Prometheus metrics
+directory (see app/services/metrics.py).
+"""
+import os
+import shutil
+
+
+def on_starting(server):
+    """Start every run with an empty metrics directory"""
+    metrics_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges; its counters keep counting"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
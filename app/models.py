@@ -1,4 +1,5 @@
 from datetime import datetime
+import json
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from app import db, login_manager
@@ -6,7 +7,9 @@ from app import db, login_manager
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Served from a per-worker identity cache (see app.services.user_cache)
+    from app.services.user_cache import get_cached_user
+    return get_cached_user(int(user_id))
 
 
 class User(UserMixin, db.Model):
@@ -183,6 +186,22 @@ class ExerciseEquipmentMapping(db.Model):
     equipment_id = db.Column(db.Integer, db.ForeignKey('master_equipment.id'), nullable=False)
 
 
+class ExerciseMuscle(db.Model):
+    """Secondary muscles of an exercise, one row each (normalized from MasterExercise.secondary_muscles)"""
+    __tablename__ = 'exercise_muscles'
+    
+    exercise_id = db.Column(db.Integer, db.ForeignKey('master_exercises.id', ondelete='CASCADE'), primary_key=True)
+    muscle = db.Column(db.String(100), primary_key=True)
+    
+    # Indexes for query optimization
+    __table_args__ = (
+        db.Index('idx_exercise_muscle', 'muscle'),
+    )
+    
+    def __repr__(self):
+        return f'<ExerciseMuscle exercise_id={self.exercise_id} muscle={self.muscle}>'
+
+
 class ExerciseEquipmentVariation(db.Model):
     """Stores variation settings for specific exercise-equipment combinations"""
     __tablename__ = 'exercise_equipment_variations'
@@ -561,6 +580,92 @@ class ProgramExercise(db.Model):
 # Utility Functions
 # ============================================================================
 
+def sync_gym_exercises(gym_ids=None, exercise_ids=None):
+    """
+    Set-based sync of GymExercise rows with gym equipment.
+    An exercise belongs at a gym when its required equipment is a subset of the
+    gym's available equipment (exercises with no equipment belong everywhere).
+    
+    Args:
+        gym_ids: Gyms to sync (all gyms when None)
+        exercise_ids: Exercises to sync (all exercises when None)
+    
+    Loads exercise equipment, gym equipment and existing associations in three
+    queries, then applies the difference with one bulk insert and one bulk delete.
+    Changes are added to the current transaction; the caller commits.
+    """
+    gym_query = db.session.query(UserGym.id)
+    if gym_ids is not None:
+        gym_ids = list(set(gym_ids))
+        if not gym_ids:
+            return
+        gym_query = gym_query.filter(UserGym.id.in_(gym_ids))
+    
+    exercise_query = db.session.query(MasterExercise.id)
+    if exercise_ids is not None:
+        exercise_ids = list(set(exercise_ids))
+        if not exercise_ids:
+            return
+        exercise_query = exercise_query.filter(MasterExercise.id.in_(exercise_ids))
+    
+    # Required equipment per exercise
+    required = {exercise_id: set() for (exercise_id,) in exercise_query.all()}
+    mapping_query = db.session.query(
+        ExerciseEquipmentMapping.exercise_id,
+        ExerciseEquipmentMapping.equipment_id
+    )
+    if exercise_ids is not None:
+        mapping_query = mapping_query.filter(ExerciseEquipmentMapping.exercise_id.in_(exercise_ids))
+    for exercise_id, equipment_id in mapping_query.all():
+        if exercise_id in required:
+            required[exercise_id].add(equipment_id)
+    
+    # Available equipment per gym
+    available = {gym_id: set() for (gym_id,) in gym_query.all()}
+    if not available or not required:
+        return
+    equipment_query = db.session.query(
+        equipment_gym_association.c.gym_id,
+        equipment_gym_association.c.equipment_id
+    ).filter(equipment_gym_association.c.gym_id.in_(list(available)))
+    for gym_id, equipment_id in equipment_query.all():
+        available[gym_id].add(equipment_id)
+    
+    eligible = {
+        (gym_id, exercise_id)
+        for gym_id, gym_equipment_ids in available.items()
+        for exercise_id, required_equipment_ids in required.items()
+        if required_equipment_ids.issubset(gym_equipment_ids)
+    }
+    
+    # Diff against existing associations
+    existing_query = db.session.query(
+        GymExercise.id, GymExercise.gym_id, GymExercise.exercise_id
+    ).filter(GymExercise.gym_id.in_(list(available)))
+    if exercise_ids is not None:
+        existing_query = existing_query.filter(GymExercise.exercise_id.in_(exercise_ids))
+    
+    existing_pairs = set()
+    stale_ids = []
+    for row_id, gym_id, exercise_id in existing_query.all():
+        if exercise_id not in required:
+            continue
+        if (gym_id, exercise_id) in eligible:
+            existing_pairs.add((gym_id, exercise_id))
+        else:
+            stale_ids.append(row_id)
+    
+    if stale_ids:
+        db.session.execute(db.delete(GymExercise).where(GymExercise.id.in_(stale_ids)))
+    
+    missing = sorted(eligible - existing_pairs)
+    if missing:
+        db.session.execute(db.insert(GymExercise), [
+            {'gym_id': gym_id, 'exercise_id': exercise_id}
+            for gym_id, exercise_id in missing
+        ])
+
+
 def sync_exercise_gym_associations(exercise_id):
     """
     Automatically associate an exercise with gyms that have all required equipment.
@@ -568,75 +673,47 @@ def sync_exercise_gym_associations(exercise_id):
     - An exercise is created/updated with equipment
     - Equipment is added to a gym
     """
-    exercise = MasterExercise.query.get(exercise_id)
-    if not exercise:
-        return
-    
-    # Get all equipment IDs required for this exercise
-    required_equipment_ids = set([eq.id for eq in exercise.equipment])
-    
-    # If no equipment required, associate with all gyms
-    if not required_equipment_ids:
-        all_gyms = UserGym.query.all()
-        for gym in all_gyms:
-            existing = GymExercise.query.filter_by(gym_id=gym.id, exercise_id=exercise.id).first()
-            if not existing:
-                gym_exercise = GymExercise(gym_id=gym.id, exercise_id=exercise.id)
-                db.session.add(gym_exercise)
-        return
-    
-    # Find all gyms
-    all_gyms = UserGym.query.all()
-    
-    for gym in all_gyms:
-        # Get equipment IDs available at this gym
-        gym_equipment_ids = set([eq.id for eq in gym.available_equipment])
-        
-        # Check if gym has all required equipment
-        if required_equipment_ids.issubset(gym_equipment_ids):
-            # Gym has all required equipment - ensure association exists
-            existing = GymExercise.query.filter_by(gym_id=gym.id, exercise_id=exercise.id).first()
-            if not existing:
-                gym_exercise = GymExercise(gym_id=gym.id, exercise_id=exercise.id)
-                db.session.add(gym_exercise)
-        else:
-            # Gym doesn't have all required equipment - remove association if it exists
-            existing = GymExercise.query.filter_by(gym_id=gym.id, exercise_id=exercise.id).first()
-            if existing:
-                db.session.delete(existing)
+    sync_gym_exercises(exercise_ids=[exercise_id])
 
 
-def sync_gym_exercise_associations(gym_id):
+def sync_gym_exercise_associations(*gym_ids):
     """
-    Update exercise associations for a gym based on available equipment.
-    Called when equipment is added/removed from a gym.
+    Update exercise associations for one or more gyms based on available equipment.
+    Called when equipment is added/removed from a gym; pass every affected gym
+    at once to sync them in a single batch.
     """
-    gym = UserGym.query.get(gym_id)
-    if not gym:
-        return
+    sync_gym_exercises(gym_ids=gym_ids)
+
+
+def parse_secondary_muscles(value):
+    """
+    Parse a secondary_muscles JSON column into a list of unique muscle names.
+    Invalid JSON or non-list data yields an empty list.
+    """
+    try:
+        muscles = json.loads(value) if value else []
+    except (json.JSONDecodeError, ValueError, TypeError):
+        return []
+    if not isinstance(muscles, list):
+        return []
     
-    # Get equipment IDs available at this gym
-    gym_equipment_ids = set([eq.id for eq in gym.available_equipment])
-    
-    # Get all exercises
-    all_exercises = MasterExercise.query.all()
-    
-    for exercise in all_exercises:
-        # Get equipment required for this exercise
-        required_equipment_ids = set([eq.id for eq in exercise.equipment])
-        
-        # If no equipment required or gym has all required equipment
-        if not required_equipment_ids or required_equipment_ids.issubset(gym_equipment_ids):
-            # Ensure association exists
-            existing = GymExercise.query.filter_by(gym_id=gym.id, exercise_id=exercise.id).first()
-            if not existing:
-                gym_exercise = GymExercise(gym_id=gym.id, exercise_id=exercise.id)
-                db.session.add(gym_exercise)
-        else:
-            # Gym doesn't have all required equipment - remove association if it exists
-            existing = GymExercise.query.filter_by(gym_id=gym.id, exercise_id=exercise.id).first()
-            if existing:
-                db.session.delete(existing)
+    unique = []
+    for muscle in muscles:
+        if isinstance(muscle, str) and muscle.strip() and muscle.strip() not in unique:
+            unique.append(muscle.strip())
+    return unique
+
+
+def sync_exercise_muscles(exercise_id, secondary_muscles):
+    """
+    Replace an exercise's exercise_muscles rows to match its secondary muscles.
+    Called whenever MasterExercise.secondary_muscles is written; the caller commits.
+    """
+    db.session.execute(db.delete(ExerciseMuscle).where(ExerciseMuscle.exercise_id == exercise_id))
+    rows = [{'exercise_id': exercise_id, 'muscle': muscle}
+            for muscle in parse_secondary_muscles(secondary_muscles)]
+    if rows:
+        db.session.execute(db.insert(ExerciseMuscle), rows)
 
 
 class ProgramInstance(db.Model):
@@ -691,6 +768,7 @@ class WorkoutSession(db.Model):
     completed_at = db.Column(db.DateTime, nullable=True)
     is_completed = db.Column(db.Boolean, default=False, nullable=False)
     duration_seconds = db.Column(db.Integer, default=0, nullable=False)  # Actual workout time in seconds
+    timer_resumed_at = db.Column(db.DateTime, nullable=True)  # Start of the running timer segment, None when paused
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     
@@ -762,6 +840,7 @@ class ScheduledDay(db.Model):
     __table_args__ = (
         db.Index('idx_user_date', 'user_id', 'calendar_date'),
         db.Index('idx_user_program_date', 'user_id', 'program_id', 'calendar_date'),
+        db.Index('idx_instance_day', 'instance_id', 'program_day_id'),
     )
     
     def __repr__(self):
@@ -788,3 +867,136 @@ class SkippedExercise(db.Model):
     
     def __repr__(self):
         return f'<SkippedExercise session={self.workout_session_id} exercise={self.exercise_id}>'
+
+
+class WorkoutOperation(db.Model):
+    """Result of a client-identified write to a workout session, kept so replayed writes apply once"""
+    __tablename__ = 'workout_operations'
+    
+    workout_session_id = db.Column(db.Integer, db.ForeignKey('workout_sessions.id', ondelete='CASCADE'), primary_key=True)
+    operation_id = db.Column(db.String(64), primary_key=True)  # Client-generated (UUID)
+    result = db.Column(db.Text, nullable=False)  # JSON response returned when the operation was applied
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<WorkoutOperation session={self.workout_session_id} operation={self.operation_id}>'
+
+
+class UserExerciseLastPerformance(db.Model):
+    """Per-user projection of the most recent non-skipped completed performance of an exercise"""
+    __tablename__ = 'user_exercise_last_performance'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('master_exercises.id', ondelete='CASCADE'), primary_key=True)
+    workout_session_id = db.Column(db.Integer, db.ForeignKey('workout_sessions.id', ondelete='CASCADE'), nullable=False)
+    sets_snapshot = db.Column(db.Text, nullable=False)  # JSON array of the session's sets for this exercise
+    overall_rpe = db.Column(db.String(1), nullable=True)  # Latest recorded overall RPE (may come from an older session)
+    completed_at = db.Column(db.DateTime, nullable=False)  # When workout_session_id was completed
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<UserExerciseLastPerformance user_id={self.user_id} exercise_id={self.exercise_id}>'
+
+
+class UserWorkoutRollup(db.Model):
+    """Per-user workout totals aggregated by day or week, maintained on session completion"""
+    __tablename__ = 'user_workout_rollups'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    period = db.Column(db.String(4), primary_key=True)  # 'day' or 'week'
+    period_start = db.Column(db.Date, primary_key=True)  # The day, or the Monday of the week
+    
+    session_count = db.Column(db.Integer, default=0, nullable=False)
+    set_count = db.Column(db.Integer, default=0, nullable=False)
+    rep_count = db.Column(db.Integer, default=0, nullable=False)
+    volume = db.Column(db.Float, default=0, nullable=False)  # Sum of weight x reps
+    max_weight = db.Column(db.Float)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<UserWorkoutRollup user_id={self.user_id} {self.period}={self.period_start}>'
+
+
+class UserExerciseRollup(db.Model):
+    """Per-user, per-exercise totals aggregated by day or week, maintained on session completion"""
+    __tablename__ = 'user_exercise_rollups'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    period = db.Column(db.String(4), primary_key=True)  # 'day' or 'week'
+    period_start = db.Column(db.Date, primary_key=True)  # The day, or the Monday of the week
+    exercise_id = db.Column(db.Integer, db.ForeignKey('master_exercises.id', ondelete='CASCADE'), primary_key=True)
+    
+    session_count = db.Column(db.Integer, default=0, nullable=False)
+    set_count = db.Column(db.Integer, default=0, nullable=False)
+    rep_count = db.Column(db.Integer, default=0, nullable=False)
+    volume = db.Column(db.Float, default=0, nullable=False)  # Sum of weight x reps
+    max_weight = db.Column(db.Float)
+    weighted_set_count = db.Column(db.Integer, default=0, nullable=False)  # Sets with both weight and reps
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Indexes for query optimization
+    __table_args__ = (
+        db.Index('idx_rollup_user_exercise', 'user_id', 'period', 'exercise_id'),
+    )
+    
+    def __repr__(self):
+        return f'<UserExerciseRollup user_id={self.user_id} exercise_id={self.exercise_id} {self.period}={self.period_start}>'
+
+
+class UserScheduleVersion(db.Model):
+    """Per-user counter bumped whenever anything shown on the calendar changes (used for ETags)"""
+    __tablename__ = 'user_schedule_versions'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<UserScheduleVersion user_id={self.user_id} version={self.version}>'
+
+
+class CacheVersion(db.Model):
+    """Named counter bumped when the data behind an in-process cache changes (shared across workers)"""
+    __tablename__ = 'cache_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<CacheVersion {self.name}={self.version}>'
+
+
+class EndpointProfileStats(db.Model):
+    """Query profiler totals for one endpoint, summed over every worker since the last reset"""
+    __tablename__ = 'endpoint_profile_stats'
+    
+    endpoint = db.Column(db.String(100), primary_key=True)
+    requests = db.Column(db.Integer, default=0, nullable=False)
+    queries = db.Column(db.Integer, default=0, nullable=False)
+    max_queries = db.Column(db.Integer, default=0, nullable=False)
+    db_ms = db.Column(db.Float, default=0, nullable=False)
+    max_db_ms = db.Column(db.Float, default=0, nullable=False)
+    request_ms = db.Column(db.Float, default=0, nullable=False)
+    max_request_ms = db.Column(db.Float, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<EndpointProfileStats {self.endpoint} requests={self.requests}>'
+
+
+class EndpointSlowStatement(db.Model):
+    """One of the slowest SQL statements the query profiler saw for an endpoint"""
+    __tablename__ = 'endpoint_slow_statements'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    endpoint = db.Column(db.String(100), nullable=False)
+    duration_ms = db.Column(db.Float, nullable=False)
+    statement = db.Column(db.Text, nullable=False)
+    
+    __table_args__ = (
+        db.Index('idx_slow_statement_endpoint', 'endpoint', 'duration_ms'),
+    )
+    
+    def __repr__(self):
+        return f'<EndpointSlowStatement {self.endpoint} {self.duration_ms:.1f} ms>'
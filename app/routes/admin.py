@@ -5,6 +5,8 @@ from app import db
 from app.models import User, UserProfile
 from app.forms import CreateUserForm, EditUserForm
 from app.utils import save_uploaded_file, delete_uploaded_file
+from app.services.user_cache import invalidate_user
+from app.services.query_profiler import STATS_FLUSH_SECONDS, get_endpoint_stats, reset_endpoint_stats
 
 bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -105,6 +107,7 @@ def edit_user(user_id):
             if filename:
                 profile.profile_picture = filename
         
+        invalidate_user(user.id)
         db.session.commit()
         flash(f'User {user.username} updated successfully!', 'success')
         return redirect(url_for('admin.users'))
@@ -129,7 +132,29 @@ def delete_user(user_id):
     
     username = user.username
     db.session.delete(user)
+    invalidate_user(user.id)
     db.session.commit()
     
     flash(f'User {username} deleted successfully.', 'success')
     return redirect(url_for('admin.users'))
+
+
+@bp.route('/performance')
+@admin_required
+def performance():
+    """Per-endpoint query counts and timings collected by the query profiler"""
+    stats, since = get_endpoint_stats()
+    return render_template('admin/performance.html',
+                         stats=stats,
+                         since=since,
+                         flush_seconds=STATS_FLUSH_SECONDS)
+
+
+@bp.route('/performance/reset', methods=['POST'])
+@admin_required
+def reset_performance():
+    """Clear the performance totals of every worker"""
+    reset_endpoint_stats()
+    db.session.commit()
+    flash('Performance statistics reset.', 'success')
+    return redirect(url_for('admin.performance'))
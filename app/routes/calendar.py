@@ -1,9 +1,13 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, make_response
 from flask_login import login_required, current_user
-from datetime import datetime, date, timedelta
+from datetime import datetime, date
 from app import db
-from app.models import Program, ProgramWeek, ProgramDay, ProgramSeries, ProgramExercise, ScheduledDay, ProgramInstance, InstanceExerciseWeight, WorkoutSession, WorkoutSet
-from sqlalchemy.orm import joinedload
+from app.models import Program, ProgramWeek, ProgramDay, ProgramSeries, ProgramExercise, ScheduledDay, ProgramInstance, InstanceExerciseWeight, WorkoutSession, WorkoutSet, UserGym
+from app.services.performance import refresh_last_performance
+from app.services.rollups import refresh_rollups
+from app.services.schedule import get_schedule_version, bump_schedule_version
+from app.services.scheduling import schedule_program_days, find_next_free_date, shift_program_days
+from sqlalchemy.orm import joinedload, selectinload
 import json
 
 bp = Blueprint('calendar', __name__, url_prefix='/calendar')
@@ -35,10 +39,32 @@ def index():
 @bp.route('/events')
 @login_required
 def get_events():
-    """Get all scheduled workouts as FullCalendar events - Optimized with eager loading"""
-    scheduled_days = ScheduledDay.query.filter_by(
-        user_id=current_user.id
-    ).options(
+    """Get scheduled workouts in the requested range as FullCalendar events
+    
+    Honors FullCalendar's start/end parameters (served by idx_user_date) and
+    returns 304 Not Modified when the user's schedule version is unchanged.
+    """
+    start_date = _parse_range_date(request.args.get('start'))
+    end_date = _parse_range_date(request.args.get('end'))
+    
+    # Conditional request check before touching scheduled days
+    version, updated_at = get_schedule_version(current_user.id)
+    etag = f'sched-{current_user.id}-{version}-{start_date}-{end_date}'
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+        _set_events_cache_headers(response, etag, updated_at)
+        return response
+    
+    query = ScheduledDay.query.filter(
+        ScheduledDay.user_id == current_user.id
+    )
+    if start_date:
+        query = query.filter(ScheduledDay.calendar_date >= start_date)
+    if end_date:
+        # FullCalendar's end parameter is exclusive
+        query = query.filter(ScheduledDay.calendar_date < end_date)
+    
+    scheduled_days = query.options(
         joinedload(ScheduledDay.program),
         joinedload(ScheduledDay.program_day),
         joinedload(ScheduledDay.gym)
@@ -62,7 +88,27 @@ def get_events():
             'classNames': ['fc-event-completed'] if sd.is_completed else []
         })
     
-    return jsonify(events)
+    response = jsonify(events)
+    _set_events_cache_headers(response, etag, updated_at)
+    return response
+
+
+def _parse_range_date(value):
+    """Parse a FullCalendar range parameter (ISO date or datetime) to a date"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value[:10], '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def _set_events_cache_headers(response, etag, updated_at):
+    """Attach validators so browsers revalidate the events feed instead of refetching it"""
+    response.set_etag(etag, weak=True)
+    if updated_at:
+        response.last_modified = updated_at
+    response.headers['Cache-Control'] = 'private, no-cache'
 
 
 @bp.route('/program/<int:program_id>/details')
@@ -111,24 +157,16 @@ def schedule_program():
     if not program:
         return jsonify({'success': False, 'error': 'Program not found'}), 404
     
-    # Check for conflicts (same program, same date)
-    conflicts = []
-    if not force:
-        for mapping in mappings:
-            calendar_date = datetime.strptime(mapping['calendar_date'], '%Y-%m-%d').date()
-            existing = ScheduledDay.query.filter_by(
-                user_id=current_user.id,
-                program_id=program_id,
-                calendar_date=calendar_date
-            ).first()
-            
-            if existing:
-                program_day = ProgramDay.query.get(mapping['program_day_id'])
-                conflicts.append({
-                    'date': mapping['calendar_date'],
-                    'existing_day': existing.program_day.day_name or f'Day {existing.program_day.day_number}',
-                    'new_day': program_day.day_name or f'Day {program_day.day_number}' if program_day else 'Unknown'
-                })
+    try:
+        instance, conflicts = schedule_program_days(
+            current_user.id,
+            program,
+            mappings,
+            gym_id=gym_id if gym_id else None,
+            force=force
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     
     if conflicts:
         return jsonify({
@@ -137,32 +175,7 @@ def schedule_program():
             'message': 'Some dates already have workouts from this program'
         })
     
-    # Create program instance
-    first_date = min(datetime.strptime(m['calendar_date'], '%Y-%m-%d').date() for m in mappings)
-    instance = ProgramInstance(
-        user_id=current_user.id,
-        program_id=program_id,
-        gym_id=gym_id if gym_id else None,
-        scheduled_date=first_date
-    )
-    db.session.add(instance)
-    db.session.flush()  # Get the instance ID
-    
-    # Create scheduled days
-    for mapping in mappings:
-        calendar_date = datetime.strptime(mapping['calendar_date'], '%Y-%m-%d').date()
-        program_day_id = mapping['program_day_id']
-        
-        scheduled_day = ScheduledDay(
-            user_id=current_user.id,
-            program_id=program_id,
-            program_day_id=program_day_id,
-            instance_id=instance.id,
-            gym_id=gym_id if gym_id else None,
-            calendar_date=calendar_date
-        )
-        db.session.add(scheduled_day)
-    
+    bump_schedule_version(current_user.id)
     db.session.commit()
     return jsonify({'success': True})
 
@@ -178,7 +191,7 @@ def reschedule_day(scheduled_day_id):
     
     data = request.get_json()
     new_date_str = data.get('new_date')
-    action = data.get('action')  # 'swap' or 'shift' or None
+    action = data.get('action')  # 'swap', 'shift', 'shift_rest' or None
     conflict_id = data.get('conflict_id')
     
     if not new_date_str:
@@ -216,6 +229,7 @@ def reschedule_day(scheduled_day_id):
         if conflict_day:
             conflict_day.calendar_date = old_date
             scheduled_day.calendar_date = new_date
+            bump_schedule_version(current_user.id)
             db.session.commit()
             return jsonify({'success': True})
         else:
@@ -229,35 +243,45 @@ def reschedule_day(scheduled_day_id):
         ).first()
         
         if conflict_day:
-            # Find next available date
-            next_date = new_date + timedelta(days=1)
-            max_attempts = 365  # Prevent infinite loop
-            
-            for _ in range(max_attempts):
-                existing = ScheduledDay.query.filter(
-                    ScheduledDay.user_id == current_user.id,
-                    ScheduledDay.program_id == scheduled_day.program_id,
-                    ScheduledDay.calendar_date == next_date
-                ).first()
-                
-                if not existing:
-                    # Found an available date
-                    conflict_day.calendar_date = next_date
-                    scheduled_day.calendar_date = new_date
-                    db.session.commit()
-                    return jsonify({
-                        'success': True,
-                        'shifted_to': next_date.strftime('%A, %B %d, %Y')
-                    })
-                
-                next_date += timedelta(days=1)
-            
+            # Find next available date (ignoring the day being moved)
+            next_date = find_next_free_date(
+                current_user.id,
+                scheduled_day.program_id,
+                new_date,
+                exclude_ids=[scheduled_day.id]
+            )
+
+            if next_date:
+                conflict_day.calendar_date = next_date
+                scheduled_day.calendar_date = new_date
+                bump_schedule_version(current_user.id)
+                db.session.commit()
+                return jsonify({
+                    'success': True,
+                    'shifted_to': next_date.strftime('%A, %B %d, %Y')
+                })
+
             return jsonify({'success': False, 'error': 'Could not find available date'}), 500
         else:
             return jsonify({'success': False, 'error': 'Conflict day not found'}), 404
     
+    elif action == 'shift_rest':
+        # Shift rest of program: push every later workout back one day to make room
+        moved = shift_program_days(
+            current_user.id,
+            scheduled_day.program_id,
+            new_date,
+            1,
+            exclude_ids=[scheduled_day.id]
+        )
+        scheduled_day.calendar_date = new_date
+        bump_schedule_version(current_user.id)
+        db.session.commit()
+        return jsonify({'success': True, 'shifted_count': moved})
+    
     # No conflict or no action needed
     scheduled_day.calendar_date = new_date
+    bump_schedule_version(current_user.id)
     db.session.commit()
     
     return jsonify({'success': True})
@@ -341,6 +365,7 @@ def delete_scheduled_day(scheduled_day_id):
     ).first_or_404()
     
     db.session.delete(scheduled_day)
+    bump_schedule_version(current_user.id)
     db.session.commit()
     
     return jsonify({'success': True})
@@ -350,37 +375,44 @@ def delete_scheduled_day(scheduled_day_id):
 @login_required
 def get_missing_days():
     """Get all program days that should be scheduled but aren't"""
-    instances = ProgramInstance.query.filter_by(user_id=current_user.id).all()
+    # Anti-join: every program day of each instance's program with no
+    # scheduled day for that instance, fetched with its display data at once
+    rows = db.session.query(
+        ProgramInstance.id.label('instance_id'),
+        ProgramDay.id.label('program_day_id'),
+        ProgramDay.day_name,
+        ProgramDay.day_number,
+        ProgramWeek.week_number,
+        Program.name.label('program_name'),
+        UserGym.name.label('gym_name')
+    ).join(
+        Program, Program.id == ProgramInstance.program_id
+    ).join(
+        ProgramWeek, ProgramWeek.program_id == Program.id
+    ).join(
+        ProgramDay, ProgramDay.week_id == ProgramWeek.id
+    ).outerjoin(
+        UserGym, UserGym.id == ProgramInstance.gym_id
+    ).outerjoin(
+        ScheduledDay,
+        db.and_(ScheduledDay.instance_id == ProgramInstance.id,
+                ScheduledDay.program_day_id == ProgramDay.id)
+    ).filter(
+        ProgramInstance.user_id == current_user.id,
+        ScheduledDay.id == None  # Day was never scheduled for this instance
+    ).order_by(
+        ProgramInstance.id, ProgramWeek.week_number, ProgramDay.day_number
+    ).all()
     
-    missing_days = []
-    for instance in instances:
-        # Get all days that are scheduled for this instance
-        scheduled_day_ids = set(
-            sd.program_day_id for sd in instance.scheduled_days
-        )
-        
-        # Get all days that should exist in the program
-        program = instance.program
-        all_program_day_ids = set()
-        for week in program.weeks:
-            for day in week.days:
-                all_program_day_ids.add(day.id)
-        
-        # Find missing days
-        missing_day_ids = all_program_day_ids - scheduled_day_ids
-        
-        for day_id in missing_day_ids:
-            day = ProgramDay.query.get(day_id)
-            if day:
-                missing_days.append({
-                    'id': f'missing_{instance.id}_{day.id}',
-                    'instance_id': instance.id,
-                    'program_day_id': day.id,
-                    'program_name': program.name,
-                    'day_name': day.day_name or f'Day {day.day_number}',
-                    'week_number': day.week.week_number,
-                    'gym_name': instance.gym.name if instance.gym else None
-                })
+    missing_days = [{
+        'id': f'missing_{row.instance_id}_{row.program_day_id}',
+        'instance_id': row.instance_id,
+        'program_day_id': row.program_day_id,
+        'program_name': row.program_name,
+        'day_name': row.day_name or f'Day {row.day_number}',
+        'week_number': row.week_number,
+        'gym_name': row.gym_name
+    } for row in rows]
     
     return jsonify(missing_days)
 
@@ -429,6 +461,7 @@ def schedule_missing_day():
         calendar_date=calendar_date
     )
     db.session.add(scheduled_day)
+    bump_schedule_version(current_user.id)
     db.session.commit()
     
     return jsonify({'success': True})
@@ -450,9 +483,19 @@ def instance_workout_plan(instance_id):
 @login_required
 def get_instance_workout_data(instance_id):
     """Get workout data for instance with custom weights"""
+    # Load the whole program tree up front (one query per level, not per row)
     instance = ProgramInstance.query.filter_by(
         id=instance_id,
         user_id=current_user.id
+    ).options(
+        joinedload(ProgramInstance.gym),
+        selectinload(ProgramInstance.custom_weights),
+        joinedload(ProgramInstance.program)
+            .selectinload(Program.weeks)
+            .selectinload(ProgramWeek.days)
+            .selectinload(ProgramDay.series)
+            .selectinload(ProgramSeries.exercises)
+            .joinedload(ProgramExercise.exercise)
     ).first_or_404()
     
     # Get existing custom weights
@@ -512,9 +555,10 @@ def get_instance_workout_data(instance_id):
     
     # Build map of which session has actual logged sets for each scheduled_day
     # (in case there are multiple sessions but only one has data)
+    sessions_by_id = {ws.id: ws for ws in workout_sessions}
     session_with_data = {}
     for ws in workout_sets:
-        session = next((s for s in workout_sessions if s.id == ws.workout_session_id), None)
+        session = sessions_by_id.get(ws.workout_session_id)
         if session and session.scheduled_day_id:
             session_with_data[session.scheduled_day_id] = session
     
@@ -682,6 +726,11 @@ def update_workout_set(set_id):
             return jsonify({'success': False, 'error': 'Invalid RPE value'}), 400
         workout_set.rpe = rpe_val if rpe_val else None
     
+    # Keep last-performance snapshots and report rollups in sync with edits to completed workouts
+    if session.is_completed:
+        refresh_last_performance(current_user.id, [workout_set.exercise_id])
+        refresh_rollups(current_user.id, [session.completed_at])
+    
     db.session.commit()
     
     return jsonify({
@@ -3,7 +3,10 @@ from flask_login import login_required, current_user
 from app import db
 from app.models import MasterEquipment, EquipmentVariation, UserGym, sync_gym_exercise_associations
 from app.forms import MasterEquipmentForm, EquipmentVariationForm
+from app.services.equipment_index import invalidate_equipment_index
+from app.services.search import apply_equipment_search
 from sqlalchemy import desc
+from sqlalchemy.orm import selectinload, joinedload
 import json
 
 bp = Blueprint('equipment', __name__, url_prefix='/equipment')
@@ -16,22 +19,19 @@ def index():
     page = request.args.get('page', 1, type=int)
     search = request.args.get('search', '', type=str)
     equipment_type = request.args.get('type', '', type=str)
-    sort_by = request.args.get('sort_by', 'name', type=str)
+    sort_by = request.args.get('sort_by', 'relevance' if search else 'name', type=str)
     sort_dir = request.args.get('sort_dir', 'asc', type=str)
     per_page = 20
     
-    query = MasterEquipment.query
+    # Gyms, variations and creator are shown per row; load them with the page
+    query = MasterEquipment.query.options(
+        selectinload(MasterEquipment.gyms),
+        selectinload(MasterEquipment.variations),
+        joinedload(MasterEquipment.creator)
+    )
     
-    # Search filter - search across name and description
-    if search:
-        search_filter = f'%{search}%'
-        query = query.filter(
-            db.or_(
-                MasterEquipment.name.ilike(search_filter),
-                MasterEquipment.description.ilike(search_filter),
-                MasterEquipment.equipment_type.ilike(search_filter)
-            )
-        )
+    # Full-text search (ranked unless the user picked a sort column)
+    query = apply_equipment_search(query, search, rank=sort_by == 'relevance')
     
     # Type filter
     if equipment_type:
@@ -112,11 +112,11 @@ def create():
                 except ValueError:
                     continue  # Skip invalid gym_id
         
+        invalidate_equipment_index()
         db.session.commit()
         
         # Auto-associate exercises with gyms that now have this equipment
-        for gym_id in affected_gym_ids:
-            sync_gym_exercise_associations(gym_id)
+        sync_gym_exercise_associations(*affected_gym_ids)
         db.session.commit()
         
         flash(f'Equipment "{equipment.name}" created successfully!', 'success')
@@ -179,12 +179,12 @@ def edit(equipment_id):
                 except ValueError:
                     continue  # Skip invalid gym_id
         
+        invalidate_equipment_index()
         db.session.commit()
         
         # Sync exercises for all affected gyms (both added and removed)
         affected_gym_ids = old_gym_ids.union(new_gym_ids)
-        for gym_id in affected_gym_ids:
-            sync_gym_exercise_associations(gym_id)
+        sync_gym_exercise_associations(*affected_gym_ids)
         db.session.commit()
         
         flash(f'Equipment "{equipment.name}" updated successfully!', 'success')
@@ -250,6 +250,7 @@ def delete(equipment_id):
     
     name = equipment.name
     db.session.delete(equipment)
+    invalidate_equipment_index()
     db.session.commit()
     
     flash(f'Equipment "{name}" deleted successfully.', 'success')
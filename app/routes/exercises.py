@@ -1,9 +1,13 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from app import db
-from app.models import MasterExercise, MasterEquipment, ExerciseEquipmentMapping, UserExercisePreference, ExerciseEquipmentVariation, EquipmentVariation, UserGym, GymExercise, GymEquipment, sync_exercise_gym_associations, WorkoutSet, UserExerciseTier
+from app.models import MasterExercise, MasterEquipment, ExerciseEquipmentMapping, UserExercisePreference, ExerciseEquipmentVariation, EquipmentVariation, UserGym, GymExercise, sync_exercise_gym_associations, WorkoutSet, UserExerciseTier, ExerciseMuscle, sync_exercise_muscles
 from app.forms import MasterExerciseForm, UserExercisePreferenceForm
+from app.services.equipment_index import get_user_gym_equipment_map, invalidate_equipment_index
+from app.services.search import apply_exercise_search
+from app.services.typeahead import invalidate_exercise_catalog
 from sqlalchemy import func, desc
+from sqlalchemy.orm import joinedload, selectinload
 import json
 
 bp = Blueprint('exercises', __name__, url_prefix='/exercises')
@@ -17,8 +21,9 @@ def index():
     search = request.args.get('search', '', type=str)
     category = request.args.get('category', '', type=str)
     primary_muscle = request.args.get('primary_muscle', '', type=str)
+    secondary_muscle = request.args.get('secondary_muscle', '', type=str)
     tier_filter = request.args.get('tier', '', type=str)
-    sort_by = request.args.get('sort_by', 'name', type=str)
+    sort_by = request.args.get('sort_by', 'relevance' if search else 'name', type=str)
     sort_dir = request.args.get('sort_dir', 'asc', type=str)
     per_page = 20
     
@@ -31,17 +36,8 @@ def index():
         )
     )
     
-    # Search filter - search across name, primary_muscle, and category
-    if search:
-        search_filter = f'%{search}%'
-        query = query.filter(
-            db.or_(
-                MasterExercise.name.ilike(search_filter),
-                MasterExercise.primary_muscle.ilike(search_filter),
-                MasterExercise.category.ilike(search_filter),
-                MasterExercise.difficulty_level.ilike(search_filter)
-            )
-        )
+    # Full-text search (ranked unless the user picked a sort column)
+    query = apply_exercise_search(query, search, rank=sort_by == 'relevance')
     
     # Category filter
     if category:
@@ -51,6 +47,12 @@ def index():
     if primary_muscle:
         query = query.filter(MasterExercise.primary_muscle == primary_muscle)
     
+    # Secondary muscle filter (indexed lookup on exercise_muscles)
+    if secondary_muscle:
+        query = query.filter(MasterExercise.id.in_(
+            db.select(ExerciseMuscle.exercise_id).where(ExerciseMuscle.muscle == secondary_muscle)
+        ))
+    
     # Tier filter
     if tier_filter:
         if tier_filter == 'untiered':
@@ -81,6 +83,12 @@ def index():
     else:
         query = query.order_by(sort_field)
     
+    # Load the listed exercises' equipment badges and creators with the page
+    query = query.options(
+        selectinload(MasterExercise.equipment),
+        joinedload(MasterExercise.creator)
+    )
+    
     # Paginate
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
     
@@ -120,15 +128,20 @@ def index():
     ).order_by(MasterExercise.primary_muscle).all()
     primary_muscles = [pm[0] for pm in primary_muscles]
     
+    # Get unique secondary muscles for filter
+    secondary_muscles = [row[0] for row in db.session.query(ExerciseMuscle.muscle).distinct().order_by(ExerciseMuscle.muscle).all()]
+    
     return render_template('exercises/index.html', 
                          exercises_with_tiers=exercises_with_tiers,
                          pagination=pagination,
                          categories=categories,
                          tiers=tiers,
                          primary_muscles=primary_muscles,
+                         secondary_muscles=secondary_muscles,
                          search=search,
                          selected_category=category,
                          selected_primary_muscle=primary_muscle,
+                         selected_secondary_muscle=secondary_muscle,
                          tier_filter=tier_filter,
                          exercise_stats=exercise_stats,
                          sort_by=sort_by,
@@ -158,6 +171,7 @@ def create():
         
         db.session.add(exercise)
         db.session.flush()
+        sync_exercise_muscles(exercise.id, exercise.secondary_muscles)
         
         # Handle equipment from POST data (added via modal)
         equipment_ids = request.form.getlist('equipment_ids[]')
@@ -179,6 +193,8 @@ def create():
                 )
                 db.session.add(var)
         
+        invalidate_equipment_index()
+        invalidate_exercise_catalog()
         db.session.commit()
         
         # Auto-associate with gyms that have the required equipment
@@ -200,18 +216,16 @@ def create():
         return redirect(url_for('exercises.index'))
     
     # Get all equipment for modal with gym associations
-    equipment_list = MasterEquipment.query.order_by(MasterEquipment.name).all()
-    
-    # Get gym equipment mappings to show which gyms have which equipment
-    gym_equipment_map = {}
-    for equip in equipment_list:
-        # Filter gyms to only show those owned by current user
-        user_gyms = [gym for gym in equip.gyms if gym.user_id == current_user.id]
-        gym_equipment_map[equip.id] = [{'gym_id': gym.id, 'gym_name': gym.name} for gym in user_gyms]
+    equipment_list = MasterEquipment.query.options(
+        selectinload(MasterEquipment.variations)
+    ).order_by(MasterEquipment.name).all()
     
     # Get all gyms for current user
     gyms = UserGym.query.filter_by(user_id=current_user.id).order_by(UserGym.name).all()
     
+    # Show which of the user's gyms have each piece of equipment
+    gym_equipment_map = get_user_gym_equipment_map(current_user.id)
+    
     return render_template('exercises/create.html', form=form, equipment_list=equipment_list, gyms=gyms, gym_equipment_map=gym_equipment_map)
 
 
@@ -239,6 +253,7 @@ def edit(exercise_id):
         exercise.primary_muscle = form.primary_muscle.data if form.primary_muscle.data else None
         exercise.secondary_muscles = json.dumps(secondary_muscles)
         exercise.difficulty_level = form.difficulty_level.data if form.difficulty_level.data else None
+        sync_exercise_muscles(exercise.id, exercise.secondary_muscles)
         
         # Update equipment mappings
         ExerciseEquipmentMapping.query.filter_by(exercise_id=exercise.id).delete()
@@ -262,6 +277,8 @@ def edit(exercise_id):
                 )
                 db.session.add(var)
         
+        invalidate_equipment_index()
+        invalidate_exercise_catalog()
         db.session.commit()
         
         # Auto-associate with gyms that have the required equipment
@@ -296,18 +313,17 @@ def edit(exercise_id):
         form.difficulty_level.data = exercise.difficulty_level
     
     # Get equipment for modal with gym associations
-    equipment_list = MasterEquipment.query.order_by(MasterEquipment.name).all()
+    equipment_list = MasterEquipment.query.options(
+        selectinload(MasterEquipment.variations)
+    ).order_by(MasterEquipment.name).all()
     current_equipment_ids = [e.id for e in exercise.equipment]
     current_variations = ExerciseEquipmentVariation.query.filter_by(exercise_id=exercise.id).all()
     
-    # Get gym equipment mappings to show which gyms have which equipment
-    gym_equipment_map = {}
-    for equip in equipment_list:
-        gym_equip = GymEquipment.query.filter_by(equipment_id=equip.id).join(UserGym).filter(UserGym.user_id == current_user.id).all()
-        gym_equipment_map[equip.id] = [{'gym_id': ge.gym_id, 'gym_name': ge.gym.name} for ge in gym_equip]
-    
     # Get all gyms for current user
     gyms = UserGym.query.filter_by(user_id=current_user.id).order_by(UserGym.name).all()
+    
+    # Show which of the user's gyms have each piece of equipment
+    gym_equipment_map = get_user_gym_equipment_map(current_user.id)
     current_gym_ids = [ge.gym_id for ge in GymExercise.query.filter_by(exercise_id=exercise.id).all()]
     
     # Get user's current tier for this exercise
@@ -342,6 +358,8 @@ def delete(exercise_id):
     
     name = exercise.name
     db.session.delete(exercise)
+    invalidate_equipment_index()
+    invalidate_exercise_catalog()
     db.session.commit()
     
     flash(f'Exercise "{name}" deleted successfully.', 'success')
@@ -358,9 +376,9 @@ def search():
     if not query or len(query) < 2:
         return jsonify([])
     
-    exercises = MasterExercise.query.filter(
-        MasterExercise.name.ilike(f'%{query}%')
-    ).limit(10).all()
+    exercises = apply_exercise_search(MasterExercise.query, query).options(
+        selectinload(MasterExercise.equipment)
+    ).order_by(MasterExercise.name).limit(10).all()
     
     results = []
     for ex in exercises:
@@ -436,21 +454,8 @@ def set_preference(exercise_id):
 @login_required
 def get_secondary_muscles():
     """Get all unique secondary muscles for autocomplete"""
-    exercises = MasterExercise.query.all()
-    muscles = set()
-    
-    for exercise in exercises:
-        if exercise.secondary_muscles:
-            try:
-                secondary_list = json.loads(exercise.secondary_muscles)
-                for muscle in secondary_list:
-                    if muscle and muscle.strip():
-                        muscles.add(muscle.strip())
-            except (json.JSONDecodeError, ValueError, TypeError, AttributeError):
-                # Skip exercises with invalid JSON or non-list data
-                pass
-    
-    return jsonify(sorted(list(muscles)))
+    muscles = db.session.query(ExerciseMuscle.muscle).distinct().order_by(ExerciseMuscle.muscle).all()
+    return jsonify([row[0] for row in muscles])
 
 
 @bp.route('/api/<int:exercise_id>/history')
@@ -1,9 +1,11 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, send_from_directory
+from flask import Blueprint, render_template, redirect, url_for, flash, request, send_from_directory, jsonify
 from flask_login import login_required, current_user
 from app import db
-from app.models import UserGym, GymEquipment, GymExercise, MasterExercise, MasterEquipment, GymMembership
+from app.models import UserGym, GymEquipment, GymExercise, MasterExercise, MasterEquipment, GymMembership, ScheduledDay
 from app.forms import UserGymForm, GymEquipmentForm, GymExerciseForm
 from app.utils import save_uploaded_file, delete_uploaded_file
+from app.services.schedule import bump_schedule_version_for
+from app.services.equipment_index import get_equipment_index, invalidate_equipment_index
 import json
 
 bp = Blueprint('gym', __name__, url_prefix='/gym')
@@ -77,7 +79,42 @@ def view(gym_id):
         flash('You do not have access to this gym.', 'danger')
         return redirect(url_for('gym.index'))
     
-    return render_template('gym/view.html', gym=gym, is_member=is_member)
+    # Exercises this gym's equipment supports (from the equipment index)
+    compatible_count = len(get_equipment_index().exercises_for_gym(gym.id))
+    
+    return render_template('gym/view.html', gym=gym, is_member=is_member,
+                         compatible_count=compatible_count)
+
+
+@bp.route('/<int:gym_id>/api/available-exercises')
+@login_required
+def available_exercises(gym_id):
+    """API: exercises whose required equipment is all available at this gym"""
+    gym = UserGym.query.get_or_404(gym_id)
+    
+    is_member = GymMembership.query.filter_by(
+        user_id=current_user.id,
+        gym_id=gym_id
+    ).first() is not None
+    
+    if gym.user_id != current_user.id and not is_member and not gym.is_shared:
+        return jsonify({'success': False, 'error': 'You do not have access to this gym'}), 403
+    
+    exercise_ids = get_equipment_index().exercises_for_gym(gym.id)
+    exercises = MasterExercise.query.filter(
+        MasterExercise.id.in_(exercise_ids)
+    ).order_by(MasterExercise.name).all() if exercise_ids else []
+    
+    return jsonify({
+        'success': True,
+        'gym_id': gym.id,
+        'exercises': [{
+            'id': ex.id,
+            'name': ex.name,
+            'category': ex.category,
+            'primary_muscle': ex.primary_muscle
+        } for ex in exercises]
+    })
 
 
 @bp.route('/<int:gym_id>/edit', methods=['GET', 'POST'])
@@ -104,9 +141,15 @@ def edit(gym_id):
                     delete_uploaded_file(old_file, 'app/static/uploads/gyms')
                 gym.picture_url = f"/static/uploads/gyms/{filename}"
         
+        if gym.name != form.name.data:
+            # Gym names are cached in the per-user equipment maps
+            invalidate_equipment_index()
         gym.name = form.name.data
         gym.address = form.address.data
         gym.is_shared = form.is_shared.data
+        
+        # Gym name appears in calendar events of everyone training here
+        bump_schedule_version_for(ScheduledDay.gym_id == gym.id)
         db.session.commit()
         
         flash(f'Gym "{gym.name}" updated successfully!', 'success')
@@ -132,7 +175,9 @@ def delete(gym_id):
         return redirect(url_for('gym.index'))
     
     name = gym.name
+    bump_schedule_version_for(ScheduledDay.gym_id == gym.id)
     db.session.delete(gym)
+    invalidate_equipment_index()
     db.session.commit()
     
     flash(f'Gym "{name}" deleted successfully.', 'success')
@@ -65,12 +65,19 @@ def get_exercise_history():
         func.max(WorkoutSet.weight).label('max_weight'),
         func.max(WorkoutSet.created_at).label('last_performed')
     ).join(WorkoutSet.workout_session).filter(
-        WorkoutSet.workout_session.has(user_id=current_user.id)
+        WorkoutSession.user_id == current_user.id
     ).group_by(WorkoutSet.exercise_id).all()
     
+    # Load every logged exercise in one query rather than one per row
+    exercises = {
+        exercise.id: exercise for exercise in MasterExercise.query.filter(
+            MasterExercise.id.in_([stat.exercise_id for stat in exercise_stats])
+        ).all()
+    } if exercise_stats else {}
+    
     result = []
     for stat in exercise_stats:
-        exercise = db.session.get(MasterExercise, stat.exercise_id)
+        exercise = exercises.get(stat.exercise_id)
         if exercise:
             result.append({
                 'id': exercise.id,
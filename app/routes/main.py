@@ -1,9 +1,11 @@
-from flask import Blueprint, render_template, send_from_directory, current_app
+from flask import Blueprint, render_template, send_from_directory, current_app, request, abort, Response
 from flask_login import login_required, current_user
-from app.models import ScheduledDay, WorkoutSession, ProgramInstance
+from app.models import ScheduledDay, ProgramInstance
+from app.services.streaks import get_current_streak
+from app.services.metrics import render_metrics
 from datetime import date, timedelta
-from sqlalchemy import func
 from sqlalchemy.orm import joinedload
+import hmac
 import os
 
 bp = Blueprint('main', __name__)
@@ -65,26 +67,8 @@ def index():
         user_id=current_user.id
     ).count()
     
-    # Calculate current streak - Optimized to limit lookback
-    # Check last 365 days max to prevent infinite loop
-    streak = 0
-    check_date = today
-    max_days_back = 365
-    days_checked = 0
-    
-    while days_checked < max_days_back:
-        workout = ScheduledDay.query.filter_by(
-            user_id=current_user.id,
-            calendar_date=check_date,
-            is_completed=True
-        ).first()
-        if workout:
-            streak += 1
-            check_date -= timedelta(days=1)
-            days_checked += 1
-        else:
-            # Stop on first missed day
-            break
+    # Calculate current streak - single bounded query (last 365 days max)
+    streak = get_current_streak(current_user.id, today=today)
     
     return render_template('main/dashboard.html',
                          todays_workout=todays_workout,
@@ -118,3 +102,26 @@ def manifest():
         'manifest.json',
         mimetype='application/manifest+json'
     )
+
+
+# ============================================
+# Monitoring
+# ============================================
+
+@bp.route('/metrics')
+def metrics():
+    """Prometheus metrics (see app/services/metrics.py)"""
+    if not current_app.config.get('METRICS_ENABLED', True):
+        abort(404)
+    
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        allowed = hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    else:
+        # Only scrapes made directly to gunicorn on this host, not through nginx
+        allowed = request.remote_addr in ('127.0.0.1', '::1') and 'X-Forwarded-For' not in request.headers
+    if not allowed:
+        abort(404)
+    
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
@@ -4,6 +4,7 @@ from app import db
 from app.models import UserProfile, User, GymMembership
 from app.forms import UserProfileForm
 from app.utils import save_uploaded_file, delete_uploaded_file
+from app.services.user_cache import invalidate_user
 
 bp = Blueprint('profile', __name__, url_prefix='/profile')
 
@@ -52,6 +53,7 @@ def edit():
             filename = save_uploaded_file(form.profile_picture.data, UPLOAD_FOLDER)
             if filename:
                 profile.profile_picture = filename
+                invalidate_user(current_user.id)
         
         # Update weight unit
         profile.weight_unit = form.weight_unit.data
@@ -78,6 +80,7 @@ def remove_picture():
         
         # Update database
         profile.profile_picture = None
+        invalidate_user(current_user.id)
         db.session.commit()
         flash('Profile picture removed.', 'success')
     
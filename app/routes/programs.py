@@ -4,9 +4,12 @@ from sqlalchemy import or_
 import json
 from app import db
 from app.models import (Program, ProgramWeek, ProgramDay, ProgramExercise, 
-                        ProgramSeries, ProgramShare, BodyPattern, MasterExercise, User)
+                        ProgramSeries, ProgramShare, BodyPattern, MasterExercise, User,
+                        ScheduledDay)
 from app.forms import (ProgramForm, ProgramWeekForm, ProgramDayForm, 
                        ProgramExerciseForm, ProgramSeriesForm, BodyPatternForm, ProgramShareForm)
+from app.services.schedule import bump_schedule_version_for
+from app.services.program_tree import create_program_skeleton, copy_program_tree
 
 bp = Blueprint('programs', __name__, url_prefix='/programs')
 
@@ -54,22 +57,8 @@ def create():
         db.session.add(program)
         db.session.flush()
         
-        # Create default weeks structure
-        for week_num in range(1, form.duration_weeks.data + 1):
-            week = ProgramWeek(
-                program_id=program.id,
-                week_number=week_num
-            )
-            db.session.add(week)
-            db.session.flush()
-            
-            # Create days based on days_per_week setting
-            for day_num in range(1, form.days_per_week.data + 1):
-                day = ProgramDay(
-                    week_id=week.id,
-                    day_number=day_num
-                )
-                db.session.add(day)
+        # Create default weeks structure (one insert per level)
+        create_program_skeleton(program.id, form.duration_weeks.data, form.days_per_week.data)
         
         db.session.commit()
         
@@ -125,6 +114,9 @@ def edit(program_id):
         if current_user.is_admin:
             program.is_template = form.is_template.data
         
+        # Program name appears in calendar events
+        bump_schedule_version_for(ScheduledDay.program_id == program.id)
+        
         db.session.commit()
         flash(f'Program "{program.name}" updated successfully!', 'success')
         return redirect(url_for('programs.view', program_id=program.id))
@@ -152,6 +144,7 @@ def delete(program_id):
         return redirect(url_for('programs.index'))
     
     name = program.name
+    bump_schedule_version_for(ScheduledDay.program_id == program.id)
     db.session.delete(program)
     db.session.commit()
     
@@ -189,55 +182,8 @@ def duplicate(program_id):
     db.session.add(new_program)
     db.session.flush()
     
-    # Duplicate all weeks, days, and exercises
-    for week in original.weeks:
-        new_week = ProgramWeek(
-            program_id=new_program.id,
-            week_number=week.week_number,
-            week_name=week.week_name,
-            is_deload=week.is_deload,
-            notes=week.notes
-        )
-        db.session.add(new_week)
-        db.session.flush()
-        
-        for day in week.days:
-            new_day = ProgramDay(
-                week_id=new_week.id,
-                day_number=day.day_number,
-                day_name=day.day_name,
-                is_rest_day=day.is_rest_day,
-                has_superset=day.has_superset,
-                notes=day.notes
-            )
-            db.session.add(new_day)
-            db.session.flush()
-            
-            for series in day.series:
-                new_series = ProgramSeries(
-                    day_id=new_day.id,
-                    order_index=series.order_index,
-                    series_type=series.series_type,
-                    time_seconds=series.time_seconds,
-                    notes=series.notes
-                )
-                db.session.add(new_series)
-                db.session.flush()
-                
-                for exercise in series.exercises:
-                    new_exercise = ProgramExercise(
-                        series_id=new_series.id,
-                        exercise_id=exercise.exercise_id,
-                        superset_position=exercise.superset_position,
-                        sets=exercise.sets,
-                        reps=exercise.reps,
-                        lift_time_seconds=exercise.lift_time_seconds,
-                        rest_time_seconds=exercise.rest_time_seconds,
-                        starting_weights=exercise.starting_weights,
-                        target_rpe=exercise.target_rpe,
-                        notes=exercise.notes
-                    )
-                    db.session.add(new_exercise)
+    # Duplicate all weeks, days, series and exercises in bulk
+    copy_program_tree(original.id, new_program.id)
     
     db.session.commit()
     
@@ -297,6 +243,9 @@ def edit_day(day_id):
         day.day_name = form.day_name.data
         day.is_rest_day = form.is_rest_day.data
         day.notes = form.notes.data
+        
+        # Day name appears in calendar events
+        bump_schedule_version_for(ScheduledDay.program_day_id == day.id)
         db.session.commit()
         
         flash('Day updated successfully!', 'success')
@@ -5,7 +5,11 @@ from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta
 from app import db
 from app.models import (WorkoutSession, WorkoutSet, ScheduledDay, MasterExercise, 
-                        BodyMetricHistory, UserProfile, ProgramInstance)
+                        BodyMetricHistory, UserProfile, ProgramInstance,
+                        UserWorkoutRollup, UserExerciseRollup)
+from app.services.rollups import PERIOD_DAY, PERIOD_WEEK
+from app.services.progression import get_first_last_sets, build_progress_entry
+from app.services.streaks import get_streaks
 
 bp = Blueprint('reports', __name__, url_prefix='/reports')
 
@@ -15,19 +19,25 @@ bp = Blueprint('reports', __name__, url_prefix='/reports')
 def index():
     """Reports dashboard with analytics and insights
     
-    Note: This route is already well-optimized using SQL aggregation functions
-    to minimize queries. Most queries use GROUP BY, COUNT, and SUM at the DB level.
+    Note: Workout volume, set and session totals are read from the daily and
+    weekly rollup tables, so page cost does not grow with raw set history.
     """
     
     # ========================================
     # Workout Completion Statistics
     # ========================================
     
+    # Lifetime totals summed from weekly rollups
+    lifetime = db.session.query(
+        func.coalesce(func.sum(UserWorkoutRollup.session_count), 0).label('sessions'),
+        func.coalesce(func.sum(UserWorkoutRollup.set_count), 0).label('sets')
+    ).filter(
+        UserWorkoutRollup.user_id == current_user.id,
+        UserWorkoutRollup.period == PERIOD_WEEK
+    ).one()
+    
     # Total completed workouts
-    total_workouts = WorkoutSession.query.filter_by(
-        user_id=current_user.id,
-        is_completed=True
-    ).count()
+    total_workouts = lifetime.sessions
     
     # Total completed scheduled days (can be different from sessions if multiple sessions per day)
     total_days = ScheduledDay.query.filter_by(
@@ -57,120 +67,46 @@ def index():
     ).count()
     
     # Total sets completed
-    total_sets = db.session.query(func.count(WorkoutSet.id)).join(
-        WorkoutSession
-    ).filter(
-        WorkoutSession.user_id == current_user.id,
-        WorkoutSession.is_completed == True
-    ).scalar() or 0
+    total_sets = lifetime.sets
+    
+    # Current and longest streaks (one ordered scan of completed days)
+    streaks = get_streaks(current_user.id)
     
     # ========================================
     # Progressive Overload Analysis
     # ========================================
     
-    # Get top 5 exercises by volume (weight x reps)
-    top_exercises = db.session.query(
-        MasterExercise.name,
-        MasterExercise.id,
-        func.sum(WorkoutSet.weight * WorkoutSet.reps).label('total_volume'),
-        func.count(WorkoutSet.id).label('set_count')
-    ).join(
-        WorkoutSet, WorkoutSet.exercise_id == MasterExercise.id
-    ).join(
-        WorkoutSession, WorkoutSet.workout_session_id == WorkoutSession.id
-    ).filter(
-        WorkoutSession.user_id == current_user.id,
-        WorkoutSession.is_completed == True,
-        WorkoutSet.weight.isnot(None),
-        WorkoutSet.reps.isnot(None)
-    ).group_by(
-        MasterExercise.id, MasterExercise.name
-    ).order_by(
-        desc('total_volume')
-    ).limit(5).all()
-    
-    # Calculate progressive overload for top exercises
-    exercise_progress = []
-    for exercise in top_exercises:
-        # Get first and last workout data for this exercise
-        first_set = WorkoutSet.query.join(
-            WorkoutSession
-        ).filter(
-            WorkoutSession.user_id == current_user.id,
-            WorkoutSet.exercise_id == exercise.id,
-            WorkoutSet.weight.isnot(None),
-            WorkoutSet.reps.isnot(None)
-        ).order_by(WorkoutSet.completed_at.asc()).first()
-        
-        last_set = WorkoutSet.query.join(
-            WorkoutSession
-        ).filter(
-            WorkoutSession.user_id == current_user.id,
-            WorkoutSet.exercise_id == exercise.id,
-            WorkoutSet.weight.isnot(None),
-            WorkoutSet.reps.isnot(None)
-        ).order_by(WorkoutSet.completed_at.desc()).first()
-        
-        if first_set and last_set and first_set.id != last_set.id:
-            first_volume = first_set.weight * first_set.reps
-            last_volume = last_set.weight * last_set.reps
-            volume_change = last_volume - first_volume
-            percent_change = ((last_volume - first_volume) / first_volume * 100) if first_volume > 0 else 0
-            
-            exercise_progress.append({
-                'name': exercise.name,
-                'id': exercise.id,
-                'total_volume': exercise.total_volume,
-                'set_count': exercise.set_count,
-                'first_weight': first_set.weight,
-                'last_weight': last_set.weight,
-                'first_reps': first_set.reps,
-                'last_reps': last_set.reps,
-                'volume_change': volume_change,
-                'percent_change': percent_change,
-                'first_date': first_set.completed_at,
-                'last_date': last_set.completed_at
-            })
-        else:
-            exercise_progress.append({
-                'name': exercise.name,
-                'id': exercise.id,
-                'total_volume': exercise.total_volume,
-                'set_count': exercise.set_count,
-                'first_weight': None,
-                'last_weight': None,
-                'volume_change': 0,
-                'percent_change': 0
-            })
+    # Get top 5 exercises by volume (weight x reps) from weekly rollups
+    top_exercises = _exercise_volume_query(current_user.id).limit(5).all()
+    
+    # First and last weighted set for all top exercises in a single query
+    first_last_sets = get_first_last_sets(current_user.id, [ex.id for ex in top_exercises])
+    
+    exercise_progress = [
+        build_progress_entry(ex.id, ex.name, ex.total_volume, ex.set_count, first_last_sets.get(ex.id))
+        for ex in top_exercises
+    ]
     
     # Overall progressive overload (total volume over time)
-    # Compare last 30 days vs previous 30 days
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    sixty_days_ago = datetime.utcnow() - timedelta(days=60)
+    # Compare last 30 days vs previous 30 days using daily rollups
+    thirty_days_ago = (datetime.utcnow() - timedelta(days=30)).date()
+    sixty_days_ago = (datetime.utcnow() - timedelta(days=60)).date()
     
     recent_volume = db.session.query(
-        func.sum(WorkoutSet.weight * WorkoutSet.reps)
-    ).join(
-        WorkoutSession
+        func.sum(UserWorkoutRollup.volume)
     ).filter(
-        WorkoutSession.user_id == current_user.id,
-        WorkoutSession.is_completed == True,
-        WorkoutSession.completed_at >= thirty_days_ago,
-        WorkoutSet.weight.isnot(None),
-        WorkoutSet.reps.isnot(None)
+        UserWorkoutRollup.user_id == current_user.id,
+        UserWorkoutRollup.period == PERIOD_DAY,
+        UserWorkoutRollup.period_start >= thirty_days_ago
     ).scalar() or 0
     
     previous_volume = db.session.query(
-        func.sum(WorkoutSet.weight * WorkoutSet.reps)
-    ).join(
-        WorkoutSession
+        func.sum(UserWorkoutRollup.volume)
     ).filter(
-        WorkoutSession.user_id == current_user.id,
-        WorkoutSession.is_completed == True,
-        WorkoutSession.completed_at >= sixty_days_ago,
-        WorkoutSession.completed_at < thirty_days_ago,
-        WorkoutSet.weight.isnot(None),
-        WorkoutSet.reps.isnot(None)
+        UserWorkoutRollup.user_id == current_user.id,
+        UserWorkoutRollup.period == PERIOD_DAY,
+        UserWorkoutRollup.period_start >= sixty_days_ago,
+        UserWorkoutRollup.period_start < thirty_days_ago
     ).scalar() or 0
     
     overall_progress = {
@@ -224,16 +160,17 @@ def index():
     # Activity Trends
     # ========================================
     
-    # Workouts per week over last 12 weeks
-    twelve_weeks_ago = datetime.utcnow() - timedelta(weeks=12)
+    # Workouts per week over last 12 weeks from daily rollups, grouped by the
+    # same '%Y-%W' label (split at New Year) the raw sessions were
+    twelve_weeks_ago = (datetime.utcnow() - timedelta(weeks=12)).date()
     
     weekly_workouts = db.session.query(
-        func.strftime('%Y-%W', WorkoutSession.completed_at).label('week'),
-        func.count(WorkoutSession.id).label('workout_count')
+        func.strftime('%Y-%W', UserWorkoutRollup.period_start).label('week'),
+        func.sum(UserWorkoutRollup.session_count).label('workout_count')
     ).filter(
-        WorkoutSession.user_id == current_user.id,
-        WorkoutSession.is_completed == True,
-        WorkoutSession.completed_at >= twelve_weeks_ago
+        UserWorkoutRollup.user_id == current_user.id,
+        UserWorkoutRollup.period == PERIOD_DAY,
+        UserWorkoutRollup.period_start >= twelve_weeks_ago
     ).group_by('week').order_by('week').all()
     
     return render_template('reports/index.html',
@@ -241,12 +178,31 @@ def index():
                          total_days=total_days,
                          completed_programs=completed_programs,
                          total_sets=total_sets,
+                         streaks=streaks,
                          exercise_progress=exercise_progress,
                          overall_progress=overall_progress,
                          body_metrics=body_metrics,
                          weekly_workouts=weekly_workouts)
 
 
+@bp.route('/api/progression')
+@login_required
+def progression():
+    """Get progressive overload data for every exercise the user has logged with weight"""
+    exercises = _exercise_volume_query(current_user.id).all()
+    first_last_sets = get_first_last_sets(current_user.id)
+    
+    result = []
+    for ex in exercises:
+        entry = build_progress_entry(ex.id, ex.name, ex.total_volume, ex.set_count, first_last_sets.get(ex.id))
+        for key in ('first_date', 'last_date'):
+            if entry.get(key):
+                entry[key] = entry[key].isoformat()
+        result.append(entry)
+    
+    return jsonify(result)
+
+
 @bp.route('/api/exercise-history/<int:exercise_id>')
 @login_required
 def exercise_history(exercise_id):
@@ -310,3 +266,28 @@ def body_metrics_history():
         'left_arm': m.left_arm,
         'right_arm': m.right_arm
     } for m in metrics])
+
+
+def _exercise_volume_query(user_id):
+    """Query total volume and weighted set count per exercise from weekly rollups, highest volume first
+
+    Only sets with both weight and reps are counted, and exercises without
+    any such set are left out.
+    """
+    return db.session.query(
+        MasterExercise.name,
+        MasterExercise.id,
+        func.sum(UserExerciseRollup.volume).label('total_volume'),
+        func.sum(UserExerciseRollup.weighted_set_count).label('set_count')
+    ).join(
+        UserExerciseRollup, UserExerciseRollup.exercise_id == MasterExercise.id
+    ).filter(
+        UserExerciseRollup.user_id == user_id,
+        UserExerciseRollup.period == PERIOD_WEEK
+    ).group_by(
+        MasterExercise.id, MasterExercise.name
+    ).having(
+        func.sum(UserExerciseRollup.weighted_set_count) > 0
+    ).order_by(
+        desc('total_volume')
+    )
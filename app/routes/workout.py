@@ -1,16 +1,29 @@
-from flask import Blueprint, render_template, jsonify, request, redirect, url_for
+from flask import Blueprint, render_template, jsonify, request, redirect, url_for, Response, stream_with_context
 from flask_login import login_required, current_user
 from app import db
 from app.models import (
     WorkoutSession, WorkoutSet, ScheduledDay, MasterExercise,
-    ProgramExercise, InstanceExerciseWeight, ProgramDay, ProgramSeries, ProgramInstance
+    ProgramExercise, InstanceExerciseWeight, ProgramDay, ProgramSeries, ProgramInstance,
+    UserExerciseLastPerformance
+)
+from app.services.performance import get_last_performance, record_completed_session, refresh_last_performance
+from app.services.rollups import refresh_rollups
+from app.services.schedule import bump_schedule_version
+from app.services.typeahead import get_typeahead_index, get_user_recency, note_exercise_logged
+from app.services.idempotency import is_valid_operation_id, get_recorded_results, record_results
+from app.services.live_session import (
+    TIMER_ACTIONS, BUSY_RETRY_SECONDS, live_duration, is_timer_running, pause_timer, set_duration,
+    stream_live_state, acquire_stream_slot, release_stream_slot
 )
 from sqlalchemy.orm import joinedload, selectinload
-from datetime import datetime
+from datetime import datetime, timezone
 import json
 
 bp = Blueprint('workout', __name__, url_prefix='/workout')
 
+# Upper bound on operations accepted by one batch request
+MAX_BATCH_OPERATIONS = 200
+
 
 @bp.route('/start/<int:scheduled_day_id>')
 @login_required
@@ -109,7 +122,8 @@ def get_session_data(session_id):
     data = {
         'session_id': session.id,
         'started_at': session.started_at.isoformat(),
-        'duration_seconds': session.duration_seconds,
+        'duration_seconds': live_duration(session),
+        'timer_running': is_timer_running(session),
         'is_completed': session.is_completed,
         'gym_name': session.gym.name if session.gym else None,
         'is_standalone': session.scheduled_day_id is None
@@ -131,6 +145,14 @@ def get_session_data(session_id):
                     'notes': cw.notes
                 }
         
+        # Resolve previous performance for every exercise in the day at once
+        day_exercise_ids = [
+            prog_ex.exercise_id
+            for series in scheduled_day.program_day.series
+            for prog_ex in series.exercises
+        ]
+        last_performance = get_last_performance(current_user.id, day_exercise_ids)
+        
         # Build workout structure
         series_data = []
         for series in scheduled_day.program_day.series:
@@ -151,8 +173,7 @@ def get_session_data(session_id):
                     suggested_weights = custom_weights_map[prog_ex.id]['weights']
                 
                 # Get previous workout history for this exercise
-                previous_sets = _get_previous_sets(current_user.id, prog_ex.exercise_id)
-                previous_overall_rpe = _get_previous_overall_rpe(current_user.id, prog_ex.exercise_id)
+                previous = last_performance[prog_ex.exercise_id]
                 
                 exercises_data.append({
                     'exercise_id': prog_ex.exercise_id,
@@ -161,8 +182,8 @@ def get_session_data(session_id):
                     'reps': prog_ex.reps,
                     'suggested_weights': suggested_weights,
                     'rest_time_seconds': prog_ex.rest_time_seconds,
-                    'previous_sets': previous_sets,
-                    'previous_overall_rpe': previous_overall_rpe
+                    'previous_sets': previous['previous_sets'],
+                    'previous_overall_rpe': previous['previous_overall_rpe']
                 })
             
             series_data.append({
@@ -261,15 +282,9 @@ def log_set(session_id):
         db.session.add(workout_set)
     
     db.session.commit()
+    note_exercise_logged(current_user.id, workout_set.exercise_id, workout_set.completed_at)
     
-    return jsonify({
-        'success': True,
-        'set_id': workout_set.id,
-        'set_number': workout_set.set_number,
-        'reps': workout_set.reps,
-        'weight': workout_set.weight,
-        'rpe': workout_set.rpe
-    })
+    return jsonify(_set_result(workout_set))
 
 
 @bp.route('/api/session/<int:session_id>/overall-rpe', methods=['POST'])
@@ -324,12 +339,253 @@ def update_duration(session_id):
     if duration_seconds is None or not isinstance(duration_seconds, int):
         return jsonify({'success': False, 'error': 'Invalid duration value'}), 400
     
-    session.duration_seconds = duration_seconds
+    set_duration(session, duration_seconds, datetime.utcnow())
     db.session.commit()
     
     return jsonify({'success': True, 'duration_seconds': duration_seconds})
 
 
+@bp.route('/api/session/<int:session_id>/batch', methods=['POST'])
+@login_required
+def batch_operations(session_id):
+    """
+    Apply an ordered list of workout writes in one transaction
+    
+    Body: {"operations": [...]}, each operation a dict with a 'type':
+    - 'set': exercise_id, set_number, reps, weight, rpe, notes (upsert, as log-set)
+    - 'overall_rpe': exercise_id, overall_rpe
+    - 'skip': exercise_id, reason
+    - 'unskip': exercise_id
+    - 'duration': duration_seconds
+    - 'timer': action ('resume', 'pause' or 'checkpoint'), at (client time, ISO 8601)
+    
+    Any operation may carry an 'op_id' (client-generated, at most 64 chars).
+    An op_id already applied to this session is not applied again; its stored
+    result is returned instead, so offline replays are exactly-once. Set
+    operations may carry the client's 'completed_at' (ISO 8601).
+    
+    Either every operation is applied or none is. On success the response has
+    one result per operation, in order, shaped like the single-purpose
+    endpoint's response. On failure it names the index of the failing operation.
+    """
+    from app.models import SkippedExercise
+    
+    session = WorkoutSession.query.filter_by(
+        id=session_id,
+        user_id=current_user.id
+    ).first_or_404()
+    
+    data = request.json or {}
+    operations = data.get('operations')
+    
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'success': False, 'error': 'operations must be a non-empty list'}), 400
+    
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({'success': False, 'error': f'At most {MAX_BATCH_OPERATIONS} operations per batch'}), 400
+    
+    if not all(isinstance(op, dict) for op in operations):
+        return jsonify({'success': False, 'error': 'Each operation must be an object'}), 400
+    
+    op_ids = [op.get('op_id') for op in operations if op.get('op_id') is not None]
+    if not all(is_valid_operation_id(op_id) for op_id in op_ids):
+        return jsonify({'success': False, 'error': 'Invalid op_id'}), 400
+    
+    # Results of operations this session has already applied (replays)
+    applied = get_recorded_results(session_id, op_ids)
+    new_op_ids = {}
+    
+    # Check the batch's exercises exist and load every set and skip it can touch in three queries
+    exercise_ids = {op.get('exercise_id') for op in operations if isinstance(op.get('exercise_id'), int)}
+    known_exercise_ids = set()
+    sets_by_key = {}
+    skips = {}
+    if exercise_ids:
+        known_exercise_ids = {
+            row[0] for row in db.session.query(MasterExercise.id).filter(MasterExercise.id.in_(exercise_ids)).all()
+        }
+        sets_by_key = {
+            (ws.exercise_id, ws.set_number): ws for ws in WorkoutSet.query.filter(
+                WorkoutSet.workout_session_id == session_id,
+                WorkoutSet.exercise_id.in_(exercise_ids)
+            ).all()
+        }
+        skips = {
+            skip.exercise_id: skip for skip in SkippedExercise.query.filter(
+                SkippedExercise.workout_session_id == session_id,
+                SkippedExercise.exercise_id.in_(exercise_ids)
+            ).all()
+        }
+    
+    now = datetime.utcnow()
+    results = []
+    refresh_exercise_ids = set()
+    unskipped_ids = set()
+    
+    for index, op in enumerate(operations):
+        op_type = op.get('type')
+        exercise_id = op.get('exercise_id')
+        op_id = op.get('op_id')
+        error = None
+        
+        if op_id in applied:
+            results.append(applied[op_id])
+            continue
+        
+        if op_type in ('set', 'overall_rpe', 'duration') and session.is_completed:
+            error = 'Workout session is already completed'
+        elif op_type in ('set', 'overall_rpe', 'skip', 'unskip') and not isinstance(exercise_id, int):
+            error = 'exercise_id is required'
+        elif op_type in ('set', 'skip') and exercise_id not in known_exercise_ids:
+            error = 'Exercise not found'
+        
+        elif op_type == 'set':
+            set_number = op.get('set_number')
+            completed_at = _client_time(op.get('completed_at'), session.started_at, now)
+            if not isinstance(set_number, int) or set_number < 1:
+                error = 'Invalid set number'
+            elif completed_at is None:
+                error = 'Invalid completed_at'
+            else:
+                workout_set = sets_by_key.get((exercise_id, set_number))
+                if workout_set is None:
+                    workout_set = WorkoutSet(
+                        workout_session_id=session_id,
+                        exercise_id=exercise_id,
+                        set_number=set_number
+                    )
+                    db.session.add(workout_set)
+                    sets_by_key[(exercise_id, set_number)] = workout_set
+                workout_set.reps = op.get('reps')
+                workout_set.weight = op.get('weight')
+                workout_set.rpe = op.get('rpe')
+                workout_set.notes = op.get('notes', '')
+                workout_set.completed_at = completed_at
+                results.append(workout_set)
+        
+        elif op_type == 'overall_rpe':
+            overall_rpe = op.get('overall_rpe')
+            exercise_sets = [ws for (ex_id, _), ws in sets_by_key.items() if ex_id == exercise_id]
+            if overall_rpe not in ['-', '=', '+']:
+                error = 'Invalid RPE value'
+            elif not exercise_sets:
+                error = 'No sets logged for this exercise yet'
+            else:
+                for workout_set in exercise_sets:
+                    workout_set.overall_rpe = overall_rpe
+                results.append({'success': True, 'overall_rpe': overall_rpe})
+        
+        elif op_type == 'skip':
+            if exercise_id in skips:
+                error = 'Exercise already skipped'
+            else:
+                if exercise_id in unskipped_ids:
+                    # Inserts run before deletes at flush; remove the old row first
+                    db.session.flush()
+                reason = op.get('reason')
+                skip = SkippedExercise(
+                    workout_session_id=session_id,
+                    exercise_id=exercise_id,
+                    reason=reason if reason else None,
+                    skipped_at=now
+                )
+                db.session.add(skip)
+                skips[exercise_id] = skip
+                results.append({'success': True, 'skipped_at': now.isoformat()})
+                if session.is_completed:
+                    refresh_exercise_ids.add(exercise_id)
+        
+        elif op_type == 'unskip':
+            skip = skips.pop(exercise_id, None)
+            if skip is None:
+                error = 'Exercise is not skipped'
+            else:
+                db.session.delete(skip)
+                unskipped_ids.add(exercise_id)
+                results.append({'success': True})
+                if session.is_completed:
+                    refresh_exercise_ids.add(exercise_id)
+        
+        elif op_type == 'duration':
+            duration_seconds = op.get('duration_seconds')
+            if not isinstance(duration_seconds, int):
+                error = 'Invalid duration value'
+            else:
+                set_duration(session, duration_seconds, now)
+                results.append({'success': True, 'duration_seconds': duration_seconds})
+        
+        elif op_type == 'timer':
+            action = TIMER_ACTIONS.get(op.get('action'))
+            at = _client_time(op.get('at'), session.started_at, now)
+            if action is None:
+                error = 'Invalid timer action'
+            elif at is None:
+                error = 'Invalid timer time'
+            else:
+                # A completed session's timer is stopped; late pauses are no-ops
+                if not session.is_completed:
+                    action(session, at)
+                results.append({
+                    'success': True,
+                    'duration_seconds': live_duration(session, now),
+                    'timer_running': is_timer_running(session)
+                })
+        
+        else:
+            error = 'Unknown operation type'
+        
+        if error:
+            db.session.rollback()
+            return jsonify({'success': False, 'error': error, 'index': index}), 400
+        
+        if op_id is not None:
+            # A repeat later in this batch gets the same result
+            applied[op_id] = results[-1]
+            new_op_ids[op_id] = len(results) - 1
+    
+    # Skips on completed sessions can change the exercises' last performance
+    if refresh_exercise_ids:
+        refresh_last_performance(current_user.id, refresh_exercise_ids)
+    
+    # Build the response before commit expires the new rows
+    db.session.flush()
+    logged = [(result.exercise_id, result.completed_at) for result in results if isinstance(result, WorkoutSet)]
+    results = [_set_result(result) if isinstance(result, WorkoutSet) else result for result in results]
+    record_results(session_id, {op_id: results[index] for op_id, index in new_op_ids.items()})
+    db.session.commit()
+    
+    for exercise_id, completed_at in logged:
+        note_exercise_logged(current_user.id, exercise_id, completed_at)
+    
+    return jsonify({'success': True, 'results': results})
+
+
+@bp.route('/api/session/<int:session_id>/events')
+@login_required
+def session_events(session_id):
+    """Server-Sent Events stream of the session's timer and progress (read-only)"""
+    WorkoutSession.query.filter_by(
+        id=session_id,
+        user_id=current_user.id
+    ).first_or_404()
+    
+    # Each stream holds a worker thread; the page retries later when all slots are taken
+    if not acquire_stream_slot():
+        return jsonify({'success': False, 'error': 'Too many live streams'}), 503, {
+            'Retry-After': str(BUSY_RETRY_SECONDS)
+        }
+    
+    response = Response(
+        stream_with_context(stream_live_state(session_id, current_user.id)),
+        mimetype='text/event-stream'
+    )
+    # The server closes the response however the stream ends
+    response.call_on_close(release_stream_slot)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+    return response
+
+
 @bp.route('/api/session/<int:session_id>/complete', methods=['POST'])
 @login_required
 def complete_workout(session_id):
@@ -341,18 +597,60 @@ def complete_workout(session_id):
     
     data = request.json
     notes = data.get('notes', '')
+    op_id = data.get('op_id')
     
+    # A replayed completion returns the original result instead of re-completing
+    if op_id is not None:
+        if not is_valid_operation_id(op_id):
+            return jsonify({'success': False, 'error': 'Invalid op_id'}), 400
+        applied = get_recorded_results(session_id, [op_id])
+        if op_id in applied:
+            return jsonify(applied[op_id])
+    
+    # Offline clients send the time the user actually finished
+    completed_at = _client_time(data.get('completed_at'), session.started_at, datetime.utcnow())
+    if completed_at is None:
+        return jsonify({'success': False, 'error': 'Invalid completed_at'}), 400
+    
+    # Re-completing moves the session out of its previous rollup buckets
+    previous_completed_at = session.completed_at if session.is_completed else None
+    
+    pause_timer(session, completed_at)
     session.is_completed = True
-    session.completed_at = datetime.utcnow()
+    session.completed_at = completed_at
     session.notes = notes
     
     # Mark scheduled day as completed if this was a scheduled workout
     if session.scheduled_day:
         session.scheduled_day.is_completed = True
-    
+        bump_schedule_version(current_user.id)
+    
+    # Refresh last-performance snapshots and report rollups in the same transaction.
+    # Only the newest workout may overwrite the snapshots; an older one (a late
+    # offline replay, or a re-completion moved back in time) is resolved from history
+    newer_completed = db.session.query(WorkoutSession.id).filter(
+        WorkoutSession.user_id == current_user.id,
+        WorkoutSession.id != session.id,
+        WorkoutSession.is_completed == True,
+        WorkoutSession.completed_at > completed_at
+    ).first()
+    if newer_completed is None:
+        record_completed_session(session)
+    else:
+        exercise_ids = {workout_set.exercise_id for workout_set in session.sets}
+        exercise_ids.update(skip.exercise_id for skip in session.skipped_exercises)
+        exercise_ids.update(exercise_id for (exercise_id,) in db.session.query(
+            UserExerciseLastPerformance.exercise_id
+        ).filter_by(user_id=current_user.id, workout_session_id=session.id))
+        refresh_last_performance(current_user.id, exercise_ids)
+    refresh_rollups(current_user.id, [previous_completed_at, session.completed_at])
+    
+    result = {'success': True, 'completed_at': session.completed_at.isoformat()}
+    if op_id is not None:
+        record_results(session_id, {op_id: result})
     db.session.commit()
     
-    return jsonify({'success': True, 'completed_at': session.completed_at.isoformat()})
+    return jsonify(result)
 
 
 @bp.route('/api/session/<int:session_id>/skip-exercise', methods=['POST'])
@@ -390,6 +688,11 @@ def skip_exercise(session_id):
     )
     
     db.session.add(skip)
+    
+    # Skipping in a completed session can change the exercise's last performance
+    if session.is_completed:
+        refresh_last_performance(current_user.id, [exercise_id])
+    
     db.session.commit()
     
     return jsonify({'success': True, 'skipped_at': skip.skipped_at.isoformat()})
@@ -422,6 +725,10 @@ def unskip_exercise(session_id):
         return jsonify({'success': False, 'error': 'Exercise is not skipped'}), 400
     
     db.session.delete(skip)
+    
+    if session.is_completed:
+        refresh_last_performance(current_user.id, [exercise_id])
+    
     db.session.commit()
     
     return jsonify({'success': True})
@@ -433,29 +740,53 @@ def search_exercises():
     """Search exercises for standalone workout logging"""
     query = request.args.get('q', '').strip()
     
+    # Served from the in-process typeahead index and cached recency
+    index = get_typeahead_index()
+    recency = get_user_recency(current_user.id)
+    
     if not query:
         # Return recent exercises
-        recent_exercises = db.session.query(MasterExercise)\
-            .join(WorkoutSet, WorkoutSet.exercise_id == MasterExercise.id)\
-            .join(WorkoutSession, WorkoutSession.id == WorkoutSet.workout_session_id)\
-            .filter(WorkoutSession.user_id == current_user.id)\
-            .group_by(MasterExercise.id)\
-            .order_by(db.func.max(WorkoutSet.completed_at).desc())\
-            .limit(10)\
-            .all()
-        
-        exercises = [{'id': ex.id, 'name': ex.name, 'category': ex.category} for ex in recent_exercises]
+        exercises = index.recent(recency, limit=10)
     else:
-        # Search by name
-        exercises_query = MasterExercise.query.filter(
-            MasterExercise.name.ilike(f'%{query}%')
-        ).limit(20).all()
-        
-        exercises = [{'id': ex.id, 'name': ex.name, 'category': ex.category} for ex in exercises_query]
+        # Prefix/substring match, recently used exercises first
+        exercises = index.search(query, recency=recency, limit=20)
     
     return jsonify({'exercises': exercises})
 
 
+def _client_time(value, earliest, latest):
+    """
+    Parse a client-supplied ISO 8601 timestamp as naive UTC
+    
+    Returns latest when value is None, None when it can't be parsed, and
+    otherwise the time clamped to [earliest, latest].
+    """
+    if value is None:
+        return latest
+    try:
+        # fromisoformat only accepts a 'Z' suffix (as toISOString() sends) from Python 3.11
+        if value.endswith(('Z', 'z')):
+            value = value[:-1] + '+00:00'
+        parsed = datetime.fromisoformat(value)
+    except (AttributeError, TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(max(parsed, earliest), latest)
+
+
+def _set_result(workout_set):
+    """API response for a logged set"""
+    return {
+        'success': True,
+        'set_id': workout_set.id,
+        'set_number': workout_set.set_number,
+        'reps': workout_set.reps,
+        'weight': workout_set.weight,
+        'rpe': workout_set.rpe
+    }
+
+
 def _get_workout_structure(scheduled_day):
     """Helper to build workout structure from scheduled day"""
     structure = {
@@ -482,68 +813,3 @@ def _get_workout_structure(scheduled_day):
     
     return structure
 
-
-def _get_previous_sets(user_id, exercise_id, limit=5):
-    """Get previous workout sets for an exercise from the most recent completed session (excluding skipped)"""
-    from app.models import SkippedExercise
-    
-    # First, find the most recent completed workout session that has this exercise and was NOT skipped
-    most_recent_session = WorkoutSession.query\
-        .join(WorkoutSet)\
-        .outerjoin(SkippedExercise, 
-                   db.and_(SkippedExercise.workout_session_id == WorkoutSession.id,
-                           SkippedExercise.exercise_id == exercise_id))\
-        .filter(
-            WorkoutSession.user_id == user_id,
-            WorkoutSet.exercise_id == exercise_id,
-            WorkoutSession.is_completed == True,
-            SkippedExercise.id == None  # Exercise was NOT skipped
-        )\
-        .order_by(WorkoutSession.completed_at.desc())\
-        .first()
-    
-    if not most_recent_session:
-        return []
-    
-    # Get all sets from that session for this exercise
-    previous_sets = WorkoutSet.query\
-        .filter(
-            WorkoutSet.workout_session_id == most_recent_session.id,
-            WorkoutSet.exercise_id == exercise_id
-        )\
-        .order_by(WorkoutSet.set_number)\
-        .all()
-    
-    return [{
-        'set_number': s.set_number,
-        'date': s.completed_at.strftime('%Y-%m-%d'),
-        'reps': s.reps,
-        'weight': s.weight,
-        'rpe': s.rpe
-    } for s in previous_sets]
-
-
-def _get_previous_overall_rpe(user_id, exercise_id):
-    """Get overall exercise RPE from the most recent completed session (excluding skipped)"""
-    from app.models import SkippedExercise
-    
-    # Find the most recent completed workout session that has this exercise with overall_rpe set and was NOT skipped
-    most_recent_set_with_overall_rpe = WorkoutSet.query\
-        .join(WorkoutSession)\
-        .outerjoin(SkippedExercise, 
-                   db.and_(SkippedExercise.workout_session_id == WorkoutSession.id,
-                           SkippedExercise.exercise_id == exercise_id))\
-        .filter(
-            WorkoutSession.user_id == user_id,
-            WorkoutSet.exercise_id == exercise_id,
-            WorkoutSession.is_completed == True,
-            WorkoutSet.overall_rpe != None,
-            SkippedExercise.id == None  # Exercise was NOT skipped
-        )\
-        .order_by(WorkoutSession.completed_at.desc())\
-        .first()
-    
-    if not most_recent_set_with_overall_rpe:
-        return None
-    
-    return most_recent_set_with_overall_rpe.overall_rpe
@@ -0,0 +1,778 @@
+"""Deterministic synthetic data for benchmark databases
+
+generate_bench_data() fills every table with production-shaped volume:
+users with profiles, goals and body-metric history; shared gyms with
+memberships and equipment; a catalog of exercises and equipment with
+variations; multi-week programs run back to back; and years of scheduled
+days, workout sessions, sets and skipped exercises.
+
+The same seed and end date always produce the same rows. Ids are assigned
+here and rows are written with executemany INSERTs of CHUNK_SIZE rows
+(parents before children), so millions of sets load in minutes. Derived
+tables (gym exercises, last performance, report rollups, search index) are
+rebuilt at the end.
+"""
+import json
+import random
+from datetime import date, datetime, time, timedelta
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import (
+    User, UserProfile, BodyMetricHistory, UserGoal, MasterExercise, ExerciseEquipmentMapping,
+    ExerciseMuscle, ExerciseEquipmentVariation, UserExercisePreference, UserExerciseTier,
+    UserGym, GymMembership, equipment_gym_association, MasterEquipment, EquipmentVariation,
+    GymEquipment, BodyPattern, Program, ProgramShare, ProgramWeek, ProgramDay, ProgramSeries,
+    ProgramExercise, ProgramInstance, InstanceExerciseWeight, WorkoutSession, WorkoutSet,
+    ScheduledDay, SkippedExercise, sync_gym_exercises
+)
+
+CHUNK_SIZE = 20000
+USERNAME_PREFIX = 'bench_'
+PASSWORD = 'benchpass'
+
+# Primary muscle -> (movements, plausible secondary muscles, base weight in lbs)
+MUSCLES = {
+    'Chest': (['Bench Press', 'Chest Fly', 'Push-Up', 'Dip', 'Pec Deck', 'Floor Press'],
+              ['Triceps', 'Shoulders'], 135),
+    'Back': (['Row', 'Pull-Up', 'Lat Pulldown', 'Deadlift', 'Pullover', 'Shrug'],
+             ['Biceps', 'Forearms', 'Core'], 135),
+    'Shoulders': (['Overhead Press', 'Lateral Raise', 'Rear Delt Fly', 'Upright Row', 'Face Pull'],
+                  ['Triceps', 'Back'], 65),
+    'Biceps': (['Curl', 'Hammer Curl', 'Preacher Curl', 'Spider Curl'], ['Forearms'], 30),
+    'Triceps': (['Triceps Extension', 'Pushdown', 'Skull Crusher', 'Close-Grip Press'],
+                ['Chest', 'Shoulders'], 40),
+    'Quads': (['Squat', 'Leg Press', 'Lunge', 'Leg Extension', 'Step-Up', 'Split Squat'],
+              ['Glutes', 'Hamstrings', 'Core'], 185),
+    'Hamstrings': (['Romanian Deadlift', 'Leg Curl', 'Good Morning', 'Nordic Curl'],
+                   ['Glutes', 'Back'], 135),
+    'Glutes': (['Hip Thrust', 'Glute Bridge', 'Kickback', 'Abduction'], ['Hamstrings', 'Quads'], 155),
+    'Calves': (['Calf Raise', 'Seated Calf Raise', 'Donkey Calf Raise'], ['Hamstrings'], 90),
+    'Core': (['Plank', 'Crunch', 'Hanging Leg Raise', 'Ab Wheel Rollout', 'Russian Twist'],
+             ['Shoulders', 'Glutes'], 0),
+    'Forearms': (['Wrist Curl', 'Farmer Carry', 'Reverse Curl'], ['Biceps'], 40),
+}
+MODIFIERS = ['Barbell', 'Dumbbell', 'Cable', 'Machine', 'Smith Machine', 'Kettlebell', 'Band',
+             'Incline', 'Decline', 'Seated', 'Standing', 'Single-Arm', 'Wide-Grip', 'Paused', 'Tempo']
+MODIFIER_WEIGHT = {'Dumbbell': 0.35, 'Kettlebell': 0.3, 'Single-Arm': 0.35, 'Band': 0, 'Cable': 0.5}
+CATEGORIES = ['Strength'] * 6 + ['Resistance', 'Bodyweight', 'Cardio', 'Stretch']
+DIFFICULTIES = ['beginner', 'intermediate', 'advanced']
+
+EQUIPMENT_KINDS = [
+    ('Barbell', 'Strength'), ('Dumbbells', 'Strength'), ('Cable Machine', 'Strength'),
+    ('Leg Press', 'Strength'), ('Smith Machine', 'Strength'), ('Squat Rack', 'Strength'),
+    ('Adjustable Bench', 'Strength'), ('Kettlebell', 'Strength'), ('Lat Pulldown', 'Strength'),
+    ('Leg Curl Machine', 'Strength'), ('Pec Deck', 'Strength'), ('Treadmill', 'Cardio'),
+    ('Rowing Machine', 'Cardio'), ('Bike', 'Cardio'), ('Elliptical', 'Cardio'),
+    ('Pull-Up Bar', 'Body'), ('Dip Station', 'Body'), ('Resistance Band', 'Resistance'),
+]
+MANUFACTURERS = ['Rogue', 'Life Fitness', 'Hammer Strength', 'Technogym', 'Matrix', 'Precor',
+                 'Cybex', 'Eleiko', 'Nautilus', 'Concept2']
+VARIATIONS = [
+    ('Rack Position', [str(position) for position in range(1, 13)]),
+    ('Handle Orientation', ['Neutral', 'Pronated', 'Supinated']),
+    ('Seat Height', [str(height) for height in range(1, 9)]),
+    ('Bench Angle', ['0', '15', '30', '45', '60']),
+]
+PROGRESSION_TYPES = ['Plates', 'Stack', 'Increments', 'Percentage', 'Time', 'Reps']
+
+# Training days per week -> day focus; focus -> muscles trained
+DAY_SPLITS = {
+    3: ['Push', 'Pull', 'Legs'],
+    4: ['Upper', 'Lower', 'Upper', 'Lower'],
+    5: ['Push', 'Pull', 'Legs', 'Upper', 'Lower'],
+    6: ['Push', 'Pull', 'Legs', 'Push', 'Pull', 'Legs'],
+}
+DAY_OFFSETS = {3: [0, 2, 4], 4: [0, 1, 3, 4], 5: [0, 1, 2, 3, 4], 6: [0, 1, 2, 3, 4, 5]}
+FOCUS_MUSCLES = {
+    'Push': ['Chest', 'Shoulders', 'Triceps'],
+    'Pull': ['Back', 'Biceps', 'Forearms'],
+    'Legs': ['Quads', 'Hamstrings', 'Glutes', 'Calves'],
+    'Upper': ['Chest', 'Back', 'Shoulders', 'Biceps', 'Triceps'],
+    'Lower': ['Quads', 'Hamstrings', 'Glutes', 'Calves', 'Core'],
+}
+PROGRAM_STYLES = ['Hypertrophy', 'Strength', 'Powerbuilding', 'Recomp', 'Foundations', 'Peaking']
+REP_SCHEMES = ['5', '6', '8', '10', '12', '15', '6-8', '8-12', '10-15']
+SKIP_REASONS = [None, 'Equipment busy', 'Short on time', 'Injury', 'Too tired']
+
+
+class _BulkWriter:
+    """Buffers rows per table and writes them with executemany INSERTs, parents first"""
+
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+        self.counts = {}
+        self._rows = {}
+        self._buffered = 0
+        self._next_ids = {}
+        self._order = {table: position for position, table in enumerate(db.metadata.sorted_tables)}
+
+    def new_id(self, model):
+        """Next unused primary key for a model"""
+        table = model.__table__
+        if table not in self._next_ids:
+            self._next_ids[table] = (db.session.query(db.func.max(model.id)).scalar() or 0) + 1
+        new_id = self._next_ids[table]
+        self._next_ids[table] += 1
+        return new_id
+
+    def add(self, model, row):
+        """Queue a row (every row of a table must have the same keys)"""
+        table = getattr(model, '__table__', model)
+        self._rows.setdefault(table, []).append(row)
+        self._buffered += 1
+        if self._buffered >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write and commit every queued row"""
+        for table in sorted(self._rows, key=self._order.get):
+            rows = self._rows[table]
+            db.session.execute(db.insert(table), rows)
+            self.counts[table.name] = self.counts.get(table.name, 0) + len(rows)
+        self._rows = {}
+        self._buffered = 0
+        db.session.commit()
+
+
+def _round_weight(value):
+    """Round to the nearest 2.5 lbs"""
+    return round(value / 2.5) * 2.5
+
+
+def _rep_range(reps):
+    """(low, high) for a rep scheme like '8' or '8-12'"""
+    low, _, high = reps.partition('-')
+    return int(low), int(high or low)
+
+
+def _measurements(rng, weight):
+    """Body measurements (inches) plausible for a body weight (lbs)"""
+    scale = weight / 180
+    arm = round(14 * scale + rng.uniform(-0.5, 0.5), 1)
+    thigh = round(23 * scale + rng.uniform(-0.5, 0.5), 1)
+    calf = round(15 * scale + rng.uniform(-0.3, 0.3), 1)
+    return {
+        'chest': round(41 * scale + rng.uniform(-1, 1), 1),
+        'waist': round(34 * scale + rng.uniform(-1, 1), 1),
+        'hips': round(39 * scale + rng.uniform(-1, 1), 1),
+        'left_arm': arm,
+        'right_arm': round(arm + rng.uniform(-0.2, 0.2), 1),
+        'left_thigh': thigh,
+        'right_thigh': round(thigh + rng.uniform(-0.2, 0.2), 1),
+        'left_calf': calf,
+        'right_calf': round(calf + rng.uniform(-0.2, 0.2), 1),
+    }
+
+
+class _Generator:
+    """State shared while generating one benchmark dataset"""
+
+    def __init__(self, rng, writer, start_date, end_date):
+        self.rng = rng
+        self.writer = writer
+        self.start_date = start_date
+        self.end_date = end_date
+        self.exercises = []  # dicts: id, primary_muscle, category, base_weight
+        self.exercises_by_muscle = {}
+        self.equipment = []  # dicts: id, variations [(variation_id, options)]
+        self.gyms = []
+
+    # ------------------------------------------------------------------ catalog
+
+    def create_users(self, count):
+        rng = self.rng
+        password_hash = generate_password_hash(PASSWORD)
+        users = []
+        for number in range(1, count + 1):
+            user_id = self.writer.new_id(User)
+            created_at = datetime.combine(self.start_date - timedelta(days=rng.randint(1, 60)), time(12))
+            self.writer.add(User, {
+                'id': user_id,
+                'username': f'{USERNAME_PREFIX}{number}',
+                'password_hash': password_hash,
+                'is_admin': number == 1,
+                'is_active': number == 1 or rng.random() > 0.02,
+                'created_at': created_at,
+                'last_login': datetime.combine(self.end_date, time(rng.randint(6, 21))) - timedelta(days=rng.randint(0, 30)),
+            })
+            users.append({
+                'id': user_id,
+                'created_at': created_at,
+                'weight': rng.uniform(130, 240),
+                'strength': rng.uniform(0.5, 1.5),
+                'adherence': rng.uniform(0.65, 0.95),
+            })
+        return users
+
+    def create_profiles(self, users):
+        rng = self.rng
+        for user in users:
+            days = (self.end_date - self.start_date).days
+            weight = user['weight']
+            recorded = self.start_date
+            while recorded <= self.end_date:
+                weight += rng.uniform(-1.5, 1.2)
+                row = {
+                    'id': self.writer.new_id(BodyMetricHistory),
+                    'user_id': user['id'],
+                    'recorded_at': datetime.combine(recorded, time(7, rng.randint(0, 59))),
+                    'weight': round(weight, 1),
+                    'body_fat': round(rng.uniform(10, 28), 1),
+                    'notes': None,
+                }
+                row.update(_measurements(rng, weight))
+                self.writer.add(BodyMetricHistory, row)
+                recorded += timedelta(days=rng.randint(7, 21))
+
+            profile = {
+                'id': self.writer.new_id(UserProfile),
+                'user_id': user['id'],
+                'weight_unit': 'lbs' if rng.random() < 0.8 else 'kg',
+                'profile_picture': None,
+                'current_weight': round(weight, 1),
+                'current_body_fat': round(rng.uniform(10, 28), 1),
+                'updated_at': datetime.combine(self.end_date, time(8)),
+            }
+            profile.update(_measurements(rng, weight))
+            self.writer.add(UserProfile, profile)
+
+            if rng.random() < 0.6:
+                self.writer.add(UserGoal, {
+                    'id': self.writer.new_id(UserGoal),
+                    'user_id': user['id'],
+                    'target_weight': round(weight * rng.uniform(0.85, 1.1), 1),
+                    'target_body_fat': round(rng.uniform(8, 20), 1),
+                    'target_date': self.end_date + timedelta(days=rng.randint(30, 365)),
+                    'target_waist': round(32 * weight / 180, 1),
+                    'notes': None,
+                    'created_at': user['created_at'],
+                    'updated_at': user['created_at'] + timedelta(days=min(days, 30)),
+                })
+
+    def create_equipment(self, count, creator_id):
+        rng = self.rng
+        for number in range(count):
+            kind, equipment_type = EQUIPMENT_KINDS[number % len(EQUIPMENT_KINDS)]
+            manufacturer = MANUFACTURERS[(number // len(EQUIPMENT_KINDS)) % len(MANUFACTURERS)]
+            series = number // (len(EQUIPMENT_KINDS) * len(MANUFACTURERS))
+            equipment_id = self.writer.new_id(MasterEquipment)
+            name = f'{manufacturer} {kind}' + (f' {series + 1}' if series else '')
+            created_at = datetime.combine(self.start_date, time(9))
+            self.writer.add(MasterEquipment, {
+                'id': equipment_id,
+                'name': name[:50],
+                'description': f'{kind} by {manufacturer}.',
+                'equipment_type': equipment_type,
+                'manufacturer': manufacturer,
+                'model': f'{manufacturer[:3].upper()}-{rng.randint(100, 999)}',
+                'created_by': creator_id,
+                'created_at': created_at,
+                'updated_at': created_at,
+            })
+
+            variations = []
+            for variation_name, options in rng.sample(VARIATIONS, rng.choice([0, 0, 1, 2])):
+                variation_id = self.writer.new_id(EquipmentVariation)
+                self.writer.add(EquipmentVariation, {
+                    'id': variation_id,
+                    'equipment_id': equipment_id,
+                    'name': variation_name,
+                    'options': json.dumps(options),
+                })
+                variations.append((variation_id, options))
+            self.equipment.append({'id': equipment_id, 'type': equipment_type, 'variations': variations})
+
+    def create_exercises(self, count, creator_id):
+        rng = self.rng
+        combinations = [(modifier, muscle, movement)
+                        for muscle, (movements, _, _) in MUSCLES.items()
+                        for movement in movements
+                        for modifier in MODIFIERS]
+        rng.shuffle(combinations)
+        strength_equipment = [equipment for equipment in self.equipment if equipment['type'] != 'Cardio']
+
+        for number in range(count):
+            modifier, muscle, movement = combinations[number % len(combinations)]
+            repeat = number // len(combinations)
+            name = f'{modifier} {movement}' + (f' {repeat + 1}' if repeat else '')
+            movements, secondary_choices, base_weight = MUSCLES[muscle]
+            category = rng.choice(CATEGORIES)
+            secondary = rng.sample(secondary_choices, rng.randint(0, len(secondary_choices)))
+
+            exercise_id = self.writer.new_id(MasterExercise)
+            created_at = datetime.combine(self.start_date, time(10))
+            self.writer.add(MasterExercise, {
+                'id': exercise_id,
+                'name': name[:50],
+                'description': f'{movement} variation focusing on the {muscle.lower()}.',
+                'video_url': None,
+                'primary_muscle': muscle,
+                'secondary_muscles': json.dumps(secondary),
+                'category': category,
+                'difficulty_level': rng.choice(DIFFICULTIES),
+                'created_by': creator_id,
+                'created_at': created_at,
+                'updated_at': created_at,
+            })
+            for secondary_muscle in secondary:
+                self.writer.add(ExerciseMuscle, {'exercise_id': exercise_id, 'muscle': secondary_muscle})
+
+            # Most exercises need one piece of equipment, some two, some none
+            needs = rng.choices([0, 1, 2], weights=[15, 70, 15])[0] if strength_equipment else 0
+            for equipment in rng.sample(strength_equipment, min(needs, len(strength_equipment))):
+                self.writer.add(ExerciseEquipmentMapping, {
+                    'id': self.writer.new_id(ExerciseEquipmentMapping),
+                    'exercise_id': exercise_id,
+                    'equipment_id': equipment['id'],
+                })
+                if equipment['variations'] and rng.random() < 0.5:
+                    variation_id, options = rng.choice(equipment['variations'])
+                    self.writer.add(ExerciseEquipmentVariation, {
+                        'id': self.writer.new_id(ExerciseEquipmentVariation),
+                        'exercise_id': exercise_id,
+                        'equipment_id': equipment['id'],
+                        'variation_id': variation_id,
+                        'selected_option': rng.choice(options),
+                    })
+
+            weight = 0 if category in ('Cardio', 'Stretch', 'Bodyweight') else base_weight * MODIFIER_WEIGHT.get(modifier, 1)
+            exercise = {'id': exercise_id, 'muscle': muscle, 'category': category, 'base_weight': weight}
+            self.exercises.append(exercise)
+            if category not in ('Cardio', 'Stretch'):
+                self.exercises_by_muscle.setdefault(muscle, []).append(exercise)
+
+    def create_body_patterns(self, users):
+        rng = self.rng
+        created_at = datetime.combine(self.start_date, time(9))
+        patterns = [('Push/Pull/Legs', ['Push', 'Pull', 'Legs', 'Rest']),
+                    ('Upper/Lower', ['Upper', 'Lower', 'Rest', 'Upper', 'Lower', 'Rest', 'Rest']),
+                    ('Full Body', ['Full Body', 'Rest', 'Full Body', 'Rest', 'Full Body', 'Rest', 'Rest'])]
+        for name, days in patterns:
+            self.writer.add(BodyPattern, {'id': self.writer.new_id(BodyPattern), 'name': name, 'user_id': None,
+                                          'pattern_json': json.dumps(days), 'created_at': created_at})
+        for user in users:
+            if rng.random() < 0.2:
+                days = rng.choice(list(DAY_SPLITS.values())) + ['Rest']
+                self.writer.add(BodyPattern, {'id': self.writer.new_id(BodyPattern), 'name': 'My Split',
+                                              'user_id': user['id'], 'pattern_json': json.dumps(days),
+                                              'created_at': user['created_at']})
+
+    def create_gyms(self, users, count):
+        rng = self.rng
+        for number in range(1, count + 1):
+            owner = rng.choice(users)
+            gym_id = self.writer.new_id(UserGym)
+            self.writer.add(UserGym, {
+                'id': gym_id,
+                'name': f'{rng.choice(["Iron", "Peak", "Core", "Summit", "Forge", "Titan"])} Gym {number}',
+                'address': f'{rng.randint(1, 9999)} Main St',
+                'picture_url': None,
+                'user_id': owner['id'],
+                'created_by': owner['id'],
+                'is_shared': rng.random() < 0.85,
+                'created_at': owner['created_at'],
+            })
+            self.gyms.append(gym_id)
+
+            # Each gym has most of the equipment catalog
+            stocked = [equipment for equipment in self.equipment if rng.random() < rng.uniform(0.5, 0.9)]
+            for equipment in stocked:
+                self.writer.add(equipment_gym_association, {
+                    'equipment_id': equipment['id'],
+                    'gym_id': gym_id,
+                    'created_at': owner['created_at'],
+                })
+                if rng.random() < 0.3:
+                    self.writer.add(GymEquipment, {
+                        'id': self.writer.new_id(GymEquipment),
+                        'gym_id': gym_id,
+                        'equipment_id': equipment['id'],
+                        'quantity': rng.randint(1, 4),
+                        'progression_type': rng.choice(PROGRESSION_TYPES),
+                        'weight_value': None,
+                        'plate_sizes': json.dumps([2.5, 5, 10, 25, 35, 45]),
+                        'stack_increment': 5.0,
+                        'notes': None,
+                        'created_at': owner['created_at'],
+                    })
+
+        for user in users:
+            user['gyms'] = rng.sample(self.gyms, min(len(self.gyms), rng.randint(1, 3)))
+            for gym_id in user['gyms']:
+                self.writer.add(GymMembership, {
+                    'id': self.writer.new_id(GymMembership),
+                    'user_id': user['id'],
+                    'gym_id': gym_id,
+                    'joined_at': user['created_at'],
+                })
+
+    def create_exercise_ratings(self, users):
+        rng = self.rng
+        for user in users:
+            for exercise in rng.sample(self.exercises, min(len(self.exercises), rng.randint(3, 15))):
+                self.writer.add(UserExercisePreference, {
+                    'id': self.writer.new_id(UserExercisePreference),
+                    'user_id': user['id'],
+                    'exercise_id': exercise['id'],
+                    'rating': rng.randint(1, 5),
+                    'notes': None,
+                    'created_at': user['created_at'],
+                    'updated_at': user['created_at'],
+                })
+            for exercise in rng.sample(self.exercises, min(len(self.exercises), rng.randint(3, 20))):
+                self.writer.add(UserExerciseTier, {
+                    'id': self.writer.new_id(UserExerciseTier),
+                    'user_id': user['id'],
+                    'exercise_id': exercise['id'],
+                    'tier': rng.choice('SABCDF'),
+                    'created_at': user['created_at'],
+                    'updated_at': user['created_at'],
+                })
+
+    # ----------------------------------------------------------------- programs
+
+    def _pick_exercises(self, focus, count):
+        """Distinct exercises for a training day, drawn from the focus muscles"""
+        pool = [exercise for muscle in FOCUS_MUSCLES[focus] for exercise in self.exercises_by_muscle.get(muscle, [])]
+        if len(pool) < count:
+            pool = self.exercises
+        return self.rng.sample(pool, min(count, len(pool)))
+
+    def create_program(self, owner_id, created_at, is_template=False, days_per_week=None, duration_weeks=None):
+        """
+        Create a program tree whose weeks repeat the same day templates
+
+        Returns:
+            dict: id, days_per_week, duration_weeks, and per week the list of
+            (program_day_id, [(program_exercise_id, exercise, sets, reps)])
+        """
+        rng = self.rng
+        days_per_week = days_per_week or rng.choice(list(DAY_SPLITS))
+        duration_weeks = duration_weeks or rng.choice([4, 6, 8, 12])
+        split = DAY_SPLITS[days_per_week]
+        program_id = self.writer.new_id(Program)
+        self.writer.add(Program, {
+            'id': program_id,
+            'name': f'{rng.choice(PROGRAM_STYLES)} {days_per_week}-Day {"/".join(dict.fromkeys(split))}'[:50],
+            'description': f'{duration_weeks}-week program, {days_per_week} training days per week.',
+            'created_by': owner_id,
+            'is_template': is_template,
+            'is_active': False,
+            'duration_weeks': duration_weeks,
+            'days_per_week': days_per_week,
+            'notes': None,
+            'created_at': created_at,
+            'updated_at': created_at,
+        })
+
+        # One template per training day: [(series_type, time, [(exercise, sets, reps, rest)])]
+        templates = []
+        for focus in split:
+            sizes = [2 if rng.random() < 0.2 else 1 for _ in range(rng.randint(4, 6))]
+            picked = self._pick_exercises(focus, sum(sizes))
+            series = []
+            for size in sizes:
+                members, picked = picked[:size], picked[size:]
+                if not members:
+                    break
+                superset = len(members) == 2
+                sets = rng.randint(3, 5)
+                series.append(('superset' if superset else 'single',
+                               rng.randint(120, 240) if superset else None,
+                               [(exercise, sets, rng.choice(REP_SCHEMES), rng.choice([60, 90, 120, 180]))
+                                for exercise in members]))
+            templates.append((focus, series))
+
+        weeks = []
+        for week_number in range(1, duration_weeks + 1):
+            is_deload = duration_weeks >= 8 and week_number % 4 == 0
+            load = (0.8 if is_deload else 1 + 0.025 * (week_number - 1))
+            week_id = self.writer.new_id(ProgramWeek)
+            self.writer.add(ProgramWeek, {
+                'id': week_id,
+                'program_id': program_id,
+                'week_number': week_number,
+                'week_name': 'Deload' if is_deload else None,
+                'is_deload': is_deload,
+                'notes': None,
+            })
+
+            days = []
+            for day_number, (focus, series) in enumerate(templates, start=1):
+                day_id = self.writer.new_id(ProgramDay)
+                self.writer.add(ProgramDay, {
+                    'id': day_id,
+                    'week_id': week_id,
+                    'day_number': day_number,
+                    'day_name': focus,
+                    'is_rest_day': False,
+                    'has_superset': any(series_type == 'superset' for series_type, _, _ in series),
+                    'notes': None,
+                })
+                day_exercises = []
+                for order_index, (series_type, time_seconds, members) in enumerate(series):
+                    series_id = self.writer.new_id(ProgramSeries)
+                    self.writer.add(ProgramSeries, {
+                        'id': series_id,
+                        'day_id': day_id,
+                        'order_index': order_index,
+                        'series_type': series_type,
+                        'time_seconds': time_seconds,
+                        'notes': None,
+                    })
+                    for position, (exercise, sets, reps, rest) in enumerate(members, start=1):
+                        weight = _round_weight(exercise['base_weight'] * load)
+                        program_exercise_id = self.writer.new_id(ProgramExercise)
+                        self.writer.add(ProgramExercise, {
+                            'id': program_exercise_id,
+                            'series_id': series_id,
+                            'exercise_id': exercise['id'],
+                            'superset_position': position,
+                            'sets': sets,
+                            'reps': reps,
+                            'lift_time_seconds': None,
+                            'rest_time_seconds': rest,
+                            'starting_weights': json.dumps([weight] * sets) if weight else None,
+                            'target_rpe': None,
+                            'notes': None,
+                        })
+                        day_exercises.append((program_exercise_id, exercise, sets, reps))
+                days.append((day_id, day_exercises))
+            weeks.append(days)
+
+        return {'id': program_id, 'days_per_week': days_per_week, 'duration_weeks': duration_weeks, 'weeks': weeks}
+
+    # ------------------------------------------------------------------ history
+
+    def _log_session(self, user, started_at, gym_id, scheduled_day_id, exercises):
+        """Write one completed session with its sets and skips"""
+        rng = self.rng
+        session_id = self.writer.new_id(WorkoutSession)
+        progress = 1 + 0.3 * min((started_at.date() - self.start_date).days / 730, 1.5)
+        moment = started_at
+        skips, sets_logged = [], []
+        for exercise, sets, reps in exercises:
+            if rng.random() < 0.04:
+                skips.append({
+                    'id': self.writer.new_id(SkippedExercise),
+                    'workout_session_id': session_id,
+                    'exercise_id': exercise['id'],
+                    'reason': rng.choice(SKIP_REASONS),
+                    'skipped_at': moment,
+                })
+                continue
+
+            low, high = _rep_range(reps)
+            base = exercise['base_weight'] * user['strength'] * progress
+            overall_rpe = rng.choice(['-', '=', '=', '+'])
+            for set_number in range(1, sets + 1):
+                moment += timedelta(seconds=rng.randint(60, 200))
+                sets_logged.append({
+                    'id': self.writer.new_id(WorkoutSet),
+                    'workout_session_id': session_id,
+                    'exercise_id': exercise['id'],
+                    'set_number': set_number,
+                    'reps': max(1, rng.randint(low - 1, high + 1)),
+                    'weight': _round_weight(base * rng.uniform(0.95, 1.05)) if base else None,
+                    'rpe': rng.choice(['-', '=', '=', '=', '+']),
+                    'overall_rpe': overall_rpe,
+                    'notes': None,
+                    'completed_at': moment,
+                    'created_at': moment,
+                })
+
+        duration = int((moment - started_at).total_seconds()) + rng.randint(120, 600)
+        self.writer.add(WorkoutSession, {
+            'id': session_id,
+            'user_id': user['id'],
+            'scheduled_day_id': scheduled_day_id,
+            'gym_id': gym_id,
+            'started_at': started_at,
+            'completed_at': started_at + timedelta(seconds=duration),
+            'is_completed': True,
+            'duration_seconds': duration,
+            'timer_resumed_at': None,
+            'notes': rng.choice([None, None, None, 'Felt strong', 'Low energy']),
+            'created_at': started_at,
+        })
+        # Children after their session so a chunk never holds an orphan
+        for row in skips:
+            self.writer.add(SkippedExercise, row)
+        for row in sets_logged:
+            self.writer.add(WorkoutSet, row)
+
+    def create_history(self, user, programs_per_user, first_program=None):
+        """
+        Run the user's programs back to back from start_date, logging past workouts
+
+        first_program: Optional (days_per_week, duration_weeks) for the first program
+        """
+        rng = self.rng
+        days_per_week, duration_weeks = first_program or (None, None)
+        programs = [self.create_program(user['id'], user['created_at'], days_per_week=days_per_week,
+                                        duration_weeks=duration_weeks)]
+        programs += [self.create_program(user['id'], user['created_at']) for _ in range(programs_per_user - 1)]
+
+        cursor = self.start_date
+        number = 0
+        active_program_id = None
+        while cursor <= self.end_date:
+            program = programs[number % len(programs)]
+            number += 1
+            active_program_id = program['id']
+            gym_id = rng.choice(user['gyms']) if user['gyms'] else None
+            instance_id = self.writer.new_id(ProgramInstance)
+            self.writer.add(ProgramInstance, {
+                'id': instance_id,
+                'user_id': user['id'],
+                'program_id': program['id'],
+                'gym_id': gym_id,
+                'scheduled_date': cursor,
+                'created_at': datetime.combine(cursor, time(8)),
+            })
+
+            offsets = DAY_OFFSETS[program['days_per_week']]
+            for week_index, days in enumerate(program['weeks']):
+                for (day_id, day_exercises), offset in zip(days, offsets):
+                    calendar_date = cursor + timedelta(days=week_index * 7 + offset)
+                    done = calendar_date < self.end_date and rng.random() < user['adherence']
+                    scheduled_day_id = self.writer.new_id(ScheduledDay)
+                    self.writer.add(ScheduledDay, {
+                        'id': scheduled_day_id,
+                        'user_id': user['id'],
+                        'program_id': program['id'],
+                        'program_day_id': day_id,
+                        'instance_id': instance_id,
+                        'gym_id': gym_id,
+                        'calendar_date': calendar_date,
+                        'is_completed': done,
+                        'created_at': datetime.combine(cursor, time(8)),
+                    })
+                    if done:
+                        started_at = datetime.combine(calendar_date, time(rng.randint(6, 20), rng.randint(0, 59)))
+                        self._log_session(user, started_at, gym_id, scheduled_day_id,
+                                          [(exercise, sets, reps) for _, exercise, sets, reps in day_exercises])
+
+            # Weight overrides on a few exercises of the first week
+            for day_id, day_exercises in program['weeks'][0]:
+                for program_exercise_id, exercise, sets, _ in day_exercises:
+                    if exercise['base_weight'] and rng.random() < 0.1:
+                        weight = _round_weight(exercise['base_weight'] * user['strength'])
+                        self.writer.add(InstanceExerciseWeight, {
+                            'id': self.writer.new_id(InstanceExerciseWeight),
+                            'instance_id': instance_id,
+                            'program_exercise_id': program_exercise_id,
+                            'custom_weights': json.dumps([weight] * sets),
+                            'notes': None,
+                            'created_at': datetime.combine(cursor, time(8)),
+                            'updated_at': datetime.combine(cursor, time(8)),
+                        })
+
+            cursor += timedelta(days=program['duration_weeks'] * 7 + rng.randint(0, 14))
+
+        # Occasional standalone workouts
+        day = self.start_date
+        while day < self.end_date:
+            day += timedelta(days=rng.randint(14, 45))
+            if day < self.end_date:
+                exercises = [(exercise, rng.randint(2, 4), rng.choice(REP_SCHEMES))
+                             for exercise in rng.sample(self.exercises, min(len(self.exercises), rng.randint(2, 5)))]
+                started_at = datetime.combine(day, time(rng.randint(6, 20), rng.randint(0, 59)))
+                self._log_session(user, started_at, rng.choice(user['gyms']) if user['gyms'] else None, None, exercises)
+
+        user['programs'] = [program['id'] for program in programs]
+        user['active_program_id'] = active_program_id
+
+    def create_shares(self, users):
+        rng = self.rng
+        for user in users:
+            for program_id in user.get('programs', []):
+                if len(users) > 1 and rng.random() < 0.1:
+                    other = rng.choice([candidate for candidate in users if candidate is not user])
+                    self.writer.add(ProgramShare, {
+                        'id': self.writer.new_id(ProgramShare),
+                        'program_id': program_id,
+                        'shared_with_user_id': other['id'],
+                        'can_edit': False,
+                        'shared_at': datetime.combine(self.start_date, time(12)),
+                    })
+
+
+def generate_bench_data(users=10, years=2, seed=1, exercises=300, equipment=120, gyms=None,
+                        programs_per_user=3, end_date=None, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Fill the database with a deterministic synthetic dataset
+
+    Args:
+        users: Number of users (named bench_1 ... bench_N; bench_1 is an admin)
+        years: Years of workout history per user, ending at end_date
+        seed: Random seed; the same seed and end_date give the same rows
+        exercises: Size of the exercise catalog
+        equipment: Size of the equipment catalog
+        gyms: Number of shared gyms (default: one per ten users, at least two)
+        programs_per_user: Programs each user cycles through
+        end_date: Last day of history (default: today); later days stay scheduled
+        chunk_size: Rows per INSERT batch and commit
+        progress: Optional callable taking a status message
+
+    Returns:
+        dict: {table name: rows inserted}
+
+    Raises:
+        ValueError: If benchmark users already exist in the database
+    """
+    if db.session.query(User.id).filter(User.username.like(f'{USERNAME_PREFIX}%')).first() is not None:
+        raise ValueError('Benchmark users already exist; run bench-seed against a fresh database')
+
+    from app.services.equipment_index import invalidate_equipment_index
+    from app.services.performance import rebuild_last_performance
+    from app.services.rollups import rebuild_rollups
+    from app.services.search import rebuild_search_index
+    from app.services.typeahead import invalidate_exercise_catalog
+
+    report = progress or (lambda message: None)
+    rng = random.Random(seed)
+    end_date = end_date or date.today()
+    start_date = end_date - timedelta(days=int(years * 365))
+    writer = _BulkWriter(chunk_size)
+    generator = _Generator(rng, writer, start_date, end_date)
+
+    report(f'Creating {users} users and catalogs...')
+    user_rows = generator.create_users(users)
+    generator.create_profiles(user_rows)
+    admin_id = user_rows[0]['id']
+    generator.create_equipment(equipment, admin_id)
+    generator.create_exercises(exercises, admin_id)
+    generator.create_body_patterns(user_rows)
+    generator.create_gyms(user_rows, gyms or max(2, users // 10))
+    generator.create_exercise_ratings(user_rows)
+
+    # Shared admin templates, including a 12-week, 6-day program
+    template_created = datetime.combine(start_date, time(9))
+    generator.create_program(admin_id, template_created, is_template=True, days_per_week=6, duration_weeks=12)
+    generator.create_program(admin_id, template_created, is_template=True, days_per_week=4, duration_weeks=8)
+
+    # The first user's first program is a fully logged 12-week, 6-day block
+    for number, user in enumerate(user_rows, start=1):
+        generator.create_history(user, programs_per_user, first_program=(6, 12) if number == 1 else None)
+        if number % 10 == 0 or number == len(user_rows):
+            report(f'History for {number}/{len(user_rows)} users '
+                   f'({writer.counts.get("workout_sets", 0)} sets written so far)')
+    generator.create_shares(user_rows)
+    writer.flush()
+
+    # Each user's most recent program is their active one
+    active_ids = [user['active_program_id'] for user in user_rows if user.get('active_program_id')]
+    if active_ids:
+        db.session.execute(db.update(Program).where(Program.id.in_(active_ids)).values(is_active=True))
+
+    report('Rebuilding gym exercises, last performance, rollups and search index...')
+    sync_gym_exercises()
+    rebuild_last_performance()
+    rebuild_rollups()
+    rebuild_search_index()
+    invalidate_exercise_catalog()
+    invalidate_equipment_index()
+    db.session.commit()
+
+    return writer.counts
@@ -0,0 +1,34 @@
+"""Named version stamps for invalidating in-process caches across workers
+
+Each gunicorn worker keeps its own copy of cached indexes. Writers bump the
+named version in the database inside their transaction; readers compare the
+stored version with the one their cached copy was built from.
+"""
+from datetime import datetime
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app import db
+from app.models import CacheVersion
+
+
+def get_cache_version(name):
+    """Get the current version for a named cache (0 if it was never bumped)"""
+    # Re-read: bumps write through an upsert, past any copy the session holds
+    row = db.session.get(CacheVersion, name, populate_existing=True)
+    return row.version if row else 0
+
+
+def bump_cache_version(*names):
+    """
+    Invalidate one or more named caches in every worker
+
+    Changes join the current transaction; the caller commits.
+    """
+    now = datetime.utcnow()
+    rows = [{'name': name, 'version': 1, 'updated_at': now} for name in set(names)]
+    if not rows:
+        return
+    # One upsert, so two workers creating a cache's first version don't collide
+    db.session.execute(sqlite_insert(CacheVersion).values(rows).on_conflict_do_update(
+        index_elements=[CacheVersion.name],
+        set_={'version': CacheVersion.version + 1, 'updated_at': now}
+    ))
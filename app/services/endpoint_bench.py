@@ -0,0 +1,381 @@
+"""Endpoint benchmarks with SQL query budgets
+
+run_endpoint_benchmarks() drives the heaviest endpoints through the Flask
+test client as one benchmark user, times each call and counts the SQL
+statements it runs. Every endpoint declares a query budget, the most
+statements one call may run however much history the user has, so an
+N+1 regression shows up as a budget failure rather than a slow page in
+production.
+
+Run it against a database filled by `flask bench-seed`: the default user
+bench_1 has years of history and a fully logged 12-week, 6-day program.
+Programs duplicated and instances scheduled by the benchmarks are deleted
+again after each call.
+
+run_streak_benchmark() checks that the dashboard does not slow down as a
+streak grows: it times main.index for temporary users whose current streaks
+are STREAK_LENGTHS days long and expects the same query count for each and
+a p95 within STREAK_P95_TOLERANCE of the shortest streak's.
+"""
+import secrets
+import time
+from datetime import date, timedelta
+from sqlalchemy import event
+from app import db
+from app.models import (
+    User, UserProfile, Program, ProgramWeek, ProgramDay, ProgramInstance, ScheduledDay, WorkoutSession
+)
+from app.services.user_cache import invalidate_user
+
+# Weeks of days scheduled by the schedule_program benchmark
+SCHEDULE_WEEKS = 52
+
+# Current streaks (days) compared by the streak benchmark
+STREAK_LENGTHS = (1, 100, 365)
+# Longest p95 allowed, as a multiple of the shortest streak's p95
+STREAK_P95_TOLERANCE = 1.5
+STREAK_USERNAME_PREFIX = 'streak_bench_'
+
+
+class EndpointBenchmark:
+    """An endpoint to benchmark: its query budget, request and cleanup"""
+
+    def __init__(self, endpoint, budget, build_request, cleanup=None):
+        self.endpoint = endpoint
+        self.budget = budget
+        self.build_request = build_request  # fixture -> (method, url, request kwargs)
+        self.cleanup = cleanup  # (fixture, response) -> None, for endpoints that write
+
+
+class BenchmarkResult:
+    """Latencies and query counts of one endpoint's timed calls"""
+
+    def __init__(self, benchmark):
+        self.endpoint = benchmark.endpoint
+        self.budget = benchmark.budget
+        self.latencies_ms = []
+        self.query_counts = []
+
+    def percentile(self, percent):
+        """Latency (ms) at a percentile, by nearest rank"""
+        ordered = sorted(self.latencies_ms)
+        rank = max(1, -(-len(ordered) * percent // 100))
+        return ordered[int(rank) - 1]
+
+    @property
+    def max_queries(self):
+        return max(self.query_counts)
+
+    @property
+    def over_budget(self):
+        return self.max_queries > self.budget
+
+
+def _find_fixture(user):
+    """
+    The benchmark user's largest logged program and its most recent workout
+
+    Raises:
+        ValueError: If the user has no scheduled program or no workouts
+    """
+    instance_row = db.session.query(
+        ScheduledDay.instance_id,
+        db.func.count(ScheduledDay.id)
+    ).filter(
+        ScheduledDay.user_id == user.id,
+        ScheduledDay.instance_id.isnot(None),
+        ScheduledDay.is_completed == True
+    ).group_by(ScheduledDay.instance_id).order_by(
+        db.func.count(ScheduledDay.id).desc(), ScheduledDay.instance_id
+    ).first()
+    session = WorkoutSession.query.filter(
+        WorkoutSession.user_id == user.id,
+        WorkoutSession.is_completed == True,
+        WorkoutSession.scheduled_day_id.isnot(None)
+    ).order_by(WorkoutSession.completed_at.desc()).first()
+    if instance_row is None or session is None:
+        raise ValueError(f'User {user.username} has no logged program; run bench-seed first')
+
+    instance = db.session.get(ProgramInstance, instance_row[0])
+    day_ids = [day_id for (day_id,) in db.session.query(ProgramDay.id).join(ProgramWeek).filter(
+        ProgramWeek.program_id == instance.program_id
+    ).order_by(ProgramWeek.week_number, ProgramDay.day_number).all()]
+    last_date = db.session.query(db.func.max(ScheduledDay.calendar_date)).filter(
+        ScheduledDay.user_id == user.id
+    ).scalar()
+    today = session.completed_at.date()
+    month_start = today.replace(day=1)
+
+    return {
+        'user_id': user.id,
+        'instance_id': instance.id,
+        'program_id': instance.program_id,
+        'program_day_ids': day_ids,
+        'session_id': session.id,
+        'last_instance_id': db.session.query(db.func.max(ProgramInstance.id)).scalar(),
+        # A month view as FullCalendar requests it (six weeks from the Monday before the 1st)
+        'calendar_start': month_start - timedelta(days=month_start.weekday()),
+        'calendar_end': month_start - timedelta(days=month_start.weekday()) + timedelta(days=42),
+        # Schedule past everything already on the calendar so no day conflicts
+        'schedule_start': max(last_date, today) + timedelta(days=7),
+    }
+
+
+def _schedule_request(fixture):
+    """Schedule the fixture program six days a week for SCHEDULE_WEEKS weeks"""
+    days_per_week = 6
+    day_ids = fixture['program_day_ids']
+    mappings = [{
+        'calendar_date': (fixture['schedule_start'] + timedelta(
+            days=7 * (number // days_per_week) + number % days_per_week
+        )).isoformat(),
+        'program_day_id': day_ids[number % len(day_ids)]
+    } for number in range(SCHEDULE_WEEKS * days_per_week)]
+    return 'POST', '/calendar/schedule', {
+        'json': {'program_id': fixture['program_id'], 'mappings': mappings, 'force': True}
+    }
+
+
+def _unschedule(fixture, response):
+    """Delete the instances created since the fixture was read"""
+    created = db.select(ProgramInstance.id).where(
+        ProgramInstance.user_id == fixture['user_id'],
+        ProgramInstance.id > fixture['last_instance_id']
+    )
+    db.session.execute(db.delete(ScheduledDay).where(ScheduledDay.instance_id.in_(created)))
+    db.session.execute(db.delete(ProgramInstance).where(ProgramInstance.id.in_(created)))
+    db.session.commit()
+
+
+def _delete_copy(fixture, response):
+    """Delete the program the duplicate benchmark created (the redirect names it)"""
+    location = response.headers.get('Location', '')
+    program_id = location.rstrip('/').rsplit('/', 1)[-1]
+    if program_id.isdigit() and int(program_id) != fixture['program_id']:
+        program = db.session.get(Program, int(program_id))
+        if program is not None:
+            db.session.delete(program)
+            db.session.commit()
+
+
+BENCHMARKS = [
+    EndpointBenchmark('main.index', 15, lambda f: ('GET', '/', {})),
+    EndpointBenchmark('reports.index', 20, lambda f: ('GET', '/reports/', {})),
+    EndpointBenchmark('calendar.get_events', 8, lambda f: (
+        'GET', f'/calendar/events?start={f["calendar_start"].isoformat()}&end={f["calendar_end"].isoformat()}', {}
+    )),
+    EndpointBenchmark('calendar.get_instance_workout_data', 15, lambda f: (
+        'GET', f'/calendar/instance/{f["instance_id"]}/workout-data', {}
+    )),
+    EndpointBenchmark('workout.get_session_data', 15, lambda f: (
+        'GET', f'/workout/api/session/{f["session_id"]}/data', {}
+    )),
+    EndpointBenchmark('history.get_exercise_history', 6, lambda f: ('GET', '/history/api/exercises', {})),
+    EndpointBenchmark('exercises.index', 8, lambda f: ('GET', '/exercises/', {})),
+    EndpointBenchmark('programs.duplicate', 20, lambda f: (
+        'POST', f'/programs/{f["program_id"]}/duplicate', {}
+    ), cleanup=_delete_copy),
+    EndpointBenchmark('calendar.schedule_program', 12, _schedule_request, cleanup=_unschedule),
+]
+
+
+def _login(app, client, user):
+    """Give the test client a logged-in session for user"""
+    # 'strong' session protection also checks an identifier of the client's address and agent
+    with app.test_request_context(environ_base=client.environ_base):
+        identifier = app.login_manager._session_identifier_generator()
+    with client.session_transaction() as session:
+        session['_user_id'] = user.get_id()
+        session['_fresh'] = True
+        session['_id'] = identifier
+
+
+def _timed_call(client, benchmark, fixture, statements):
+    """
+    Make one benchmark call
+
+    Returns:
+        tuple: (latency in ms, SQL statements run)
+
+    Raises:
+        ValueError: If the call does not succeed
+    """
+    method, url, kwargs = benchmark.build_request(fixture)
+    statements.clear()
+    started = time.perf_counter()
+    response = client.open(url, method=method, **kwargs)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    query_count = len(statements)
+
+    if benchmark.cleanup:
+        benchmark.cleanup(fixture, response)
+    payload = response.get_json(silent=True) if response.is_json else None
+    failed = (
+        response.status_code >= 400
+        or response.headers.get('Location', '').startswith('/auth/login')
+        or (isinstance(payload, dict) and payload.get('success') is False)
+    )
+    if failed:
+        raise ValueError(f'{benchmark.endpoint}: {method} {url} failed with {response.status_code}')
+    return elapsed_ms, query_count
+
+
+def run_endpoint_benchmarks(app, username='bench_1', iterations=20, only=None):
+    """
+    Time each benchmarked endpoint and count its SQL statements
+
+    Args:
+        app: Flask application (its database should come from bench-seed)
+        username: User whose data the requests read
+        iterations: Timed calls per endpoint, after one untimed warm-up call
+        only: Optional endpoint names to run instead of all of them
+
+    Returns:
+        list: BenchmarkResult per endpoint, in BENCHMARKS order
+
+    Raises:
+        ValueError: If the user or their data is missing, an endpoint name
+            is unknown, or a call does not succeed
+    """
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise ValueError(f'User {username} not found; run bench-seed first')
+    unknown = set(only or ()) - {benchmark.endpoint for benchmark in BENCHMARKS}
+    if unknown:
+        raise ValueError(f'Unknown endpoints: {", ".join(sorted(unknown))}')
+    fixture = _find_fixture(user)
+    client = app.test_client()
+    _login(app, client, user)
+    db.session.close()
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        # The query profiler's stats flushes are not part of the request
+        if not conn.get_execution_options().get('query_profiler_flush'):
+            statements.append(statement)
+
+    results = []
+    event.listen(db.engine, 'after_cursor_execute', count_statement)
+    try:
+        for benchmark in BENCHMARKS:
+            if only and benchmark.endpoint not in only:
+                continue
+            result = BenchmarkResult(benchmark)
+            for call in range(iterations + 1):
+                elapsed_ms, query_count = _timed_call(client, benchmark, fixture, statements)
+                # The warm-up call fills the in-process caches and is not counted
+                if call:
+                    result.latencies_ms.append(elapsed_ms)
+                    result.query_counts.append(query_count)
+            results.append(result)
+    finally:
+        event.remove(db.engine, 'after_cursor_execute', count_statement)
+        db.session.remove()
+
+    return results
+
+
+def _dashboard_budget():
+    """The main.index query budget, which the streak benchmark shares"""
+    return next(benchmark.budget for benchmark in BENCHMARKS if benchmark.endpoint == 'main.index')
+
+
+def _create_streak_user(length, today):
+    """A user with one program whose scheduled days are completed for the last `length` days"""
+    user = User(username=f'{STREAK_USERNAME_PREFIX}{length}')
+    user.set_password(secrets.token_hex(16))
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(UserProfile(user_id=user.id))
+
+    day = ProgramDay(day_number=1, day_name='Streak')
+    program = Program(name=f'Streak {length}', created_by=user.id, duration_weeks=1, days_per_week=7,
+                      weeks=[ProgramWeek(week_number=1, days=[day])])
+    db.session.add(program)
+    db.session.flush()
+    db.session.execute(db.insert(ScheduledDay.__table__), [{
+        'user_id': user.id,
+        'program_id': program.id,
+        'program_day_id': day.id,
+        'calendar_date': today - timedelta(days=offset),
+        'is_completed': True
+    } for offset in range(length)])
+    return user
+
+
+def _delete_streak_users():
+    """Delete the streak benchmark's users, including ones left by an interrupted run"""
+    users = User.query.filter(User.username.startswith(STREAK_USERNAME_PREFIX)).all()
+    for user in users:
+        db.session.execute(db.delete(ScheduledDay).where(ScheduledDay.user_id == user.id))
+        for program in Program.query.filter_by(created_by=user.id).all():
+            db.session.delete(program)
+        invalidate_user(user.id)
+        db.session.delete(user)
+    db.session.commit()
+
+
+def run_streak_benchmark(app, lengths=STREAK_LENGTHS, iterations=20):
+    """
+    Time the dashboard for users with current streaks of different lengths
+
+    Args:
+        app: Flask application (any database; the users are temporary)
+        lengths: Current streak lengths in days, shortest first
+        iterations: Timed calls per user, after one untimed warm-up call
+
+    Returns:
+        tuple: (BenchmarkResult per length, list of problems found, empty
+            when every streak runs the same queries in comparable time)
+
+    Raises:
+        ValueError: If a call does not succeed
+    """
+    today = date.today()
+    _delete_streak_users()
+    users = [_create_streak_user(length, today) for length in lengths]
+    db.session.commit()
+    clients = []
+    for user in users:
+        client = app.test_client()
+        _login(app, client, user)
+        clients.append(client)
+    db.session.close()
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        # The query profiler's stats flushes are not part of the request
+        if not conn.get_execution_options().get('query_profiler_flush'):
+            statements.append(statement)
+
+    benchmarks = [
+        EndpointBenchmark(f'main.index ({length}-day streak)', _dashboard_budget(), lambda f: ('GET', '/', {}))
+        for length in lengths
+    ]
+    results = [BenchmarkResult(benchmark) for benchmark in benchmarks]
+    event.listen(db.engine, 'after_cursor_execute', count_statement)
+    try:
+        # Take turns, so background noise hits every streak length alike
+        for call in range(iterations + 1):
+            for client, benchmark, result in zip(clients, benchmarks, results):
+                elapsed_ms, query_count = _timed_call(client, benchmark, None, statements)
+                if call:
+                    result.latencies_ms.append(elapsed_ms)
+                    result.query_counts.append(query_count)
+    finally:
+        event.remove(db.engine, 'after_cursor_execute', count_statement)
+        db.session.remove()
+        _delete_streak_users()
+
+    problems = []
+    shortest = results[0]
+    for result in results[1:]:
+        if result.max_queries != shortest.max_queries:
+            problems.append(f'{result.endpoint} ran {result.max_queries} queries, '
+                            f'{shortest.endpoint} ran {shortest.max_queries}')
+        if result.percentile(95) > shortest.percentile(95) * STREAK_P95_TOLERANCE:
+            problems.append(f'{result.endpoint} p95 {result.percentile(95):.1f} ms is over '
+                            f'{STREAK_P95_TOLERANCE}x {shortest.endpoint}\'s {shortest.percentile(95):.1f} ms')
+    return results, problems
@@ -0,0 +1,150 @@
+"""In-process equipment coverage index for gym/exercise compatibility
+
+Each exercise's required equipment and each gym's available equipment are
+stored as integer bitsets. An exercise can be done at a gym when
+``required & ~available == 0``. Exercises are grouped by their requirement
+mask, so a gym lookup is one AND per distinct mask rather than per exercise.
+
+The index is built lazily from exercise_equipment_mapping and
+equipment_gym_association and rebuilt when the 'equipment_index' cache
+version changes. The same version guards a per-user map of which of the
+user's gyms have each piece of equipment, used by the exercise forms.
+"""
+from app import db
+from app.models import MasterExercise, ExerciseEquipmentMapping, UserGym, equipment_gym_association
+from app.services.cache_versions import get_cache_version, bump_cache_version
+from app.services.metrics import record_cache_lookup
+
+CACHE_NAME = 'equipment_index'
+
+_index = None
+_user_gym_maps = {}  # user_id -> (version, {equipment_id: [{'gym_id', 'gym_name'}]})
+
+
+class EquipmentIndex:
+    """Bitset snapshot of exercise requirements and gym equipment"""
+
+    def __init__(self, version, exercise_requirements, gym_equipment):
+        """
+        Args:
+            version: Cache version the snapshot was built from
+            exercise_requirements: {exercise_id: set of equipment_ids}
+            gym_equipment: {gym_id: set of equipment_ids}
+        """
+        self.version = version
+
+        equipment_ids = set()
+        for ids in exercise_requirements.values():
+            equipment_ids |= ids
+        for ids in gym_equipment.values():
+            equipment_ids |= ids
+        self._bits = {equipment_id: 1 << position
+                      for position, equipment_id in enumerate(sorted(equipment_ids))}
+
+        self.exercise_masks = {exercise_id: self.mask_for(ids)
+                               for exercise_id, ids in exercise_requirements.items()}
+        self.gym_masks = {gym_id: self.mask_for(ids) for gym_id, ids in gym_equipment.items()}
+
+        self._exercises_by_mask = {}
+        for exercise_id, mask in self.exercise_masks.items():
+            self._exercises_by_mask.setdefault(mask, []).append(exercise_id)
+
+    def mask_for(self, equipment_ids):
+        """Bitset for a collection of equipment IDs (unknown IDs are ignored)"""
+        mask = 0
+        for equipment_id in equipment_ids:
+            mask |= self._bits.get(equipment_id, 0)
+        return mask
+
+    def has_equipment(self, gym_id, equipment_id):
+        """Whether a gym has a piece of equipment"""
+        bit = self._bits.get(equipment_id, 0)
+        return bool(bit) and bool(self.gym_masks.get(gym_id, 0) & bit)
+
+    def exercises_for_gym(self, gym_id):
+        """IDs of every exercise whose required equipment the gym has"""
+        available = self.gym_masks.get(gym_id, 0)
+        exercise_ids = []
+        for mask, ids in self._exercises_by_mask.items():
+            if not mask & ~available:
+                exercise_ids.extend(ids)
+        return exercise_ids
+
+
+def build_equipment_index(version=0):
+    """Load requirements and gym equipment in three queries and build an index"""
+    exercise_requirements = {exercise_id: set() for (exercise_id,) in db.session.query(MasterExercise.id).all()}
+    for exercise_id, equipment_id in db.session.query(
+        ExerciseEquipmentMapping.exercise_id,
+        ExerciseEquipmentMapping.equipment_id
+    ).all():
+        exercise_requirements.setdefault(exercise_id, set()).add(equipment_id)
+
+    gym_equipment = {}
+    for gym_id, equipment_id in db.session.query(
+        equipment_gym_association.c.gym_id,
+        equipment_gym_association.c.equipment_id
+    ).all():
+        gym_equipment.setdefault(gym_id, set()).add(equipment_id)
+
+    return EquipmentIndex(version, exercise_requirements, gym_equipment)
+
+
+def get_equipment_index():
+    """
+    Get this worker's equipment index, rebuilding it if the data changed
+
+    Costs one primary-key lookup when the cached index is current.
+    """
+    global _index
+    version = get_cache_version(CACHE_NAME)
+    stale = _index is None or _index.version != version
+    record_cache_lookup(CACHE_NAME, not stale)
+    if stale:
+        _index = build_equipment_index(version)
+    return _index
+
+
+def get_user_gym_equipment_map(user_id):
+    """
+    Map equipment ID to the user's gyms that have it
+
+    Returns:
+        dict: {equipment_id: [{'gym_id', 'gym_name'}]} ordered by gym name;
+        equipment in none of the user's gyms is absent
+
+    Built with one query and cached per user until the index version changes,
+    so a current map costs one primary-key lookup.
+    """
+    version = get_cache_version(CACHE_NAME)
+    cached = _user_gym_maps.get(user_id)
+    if cached is not None and cached[0] == version:
+        record_cache_lookup('user_gym_equipment', True)
+        return cached[1]
+    record_cache_lookup('user_gym_equipment', False)
+
+    gym_map = {}
+    for equipment_id, gym_id, gym_name in db.session.query(
+        equipment_gym_association.c.equipment_id,
+        UserGym.id,
+        UserGym.name
+    ).join(
+        UserGym, UserGym.id == equipment_gym_association.c.gym_id
+    ).filter(
+        UserGym.user_id == user_id
+    ).order_by(UserGym.name, UserGym.id).all():
+        gym_map.setdefault(equipment_id, []).append({'gym_id': gym_id, 'gym_name': gym_name})
+
+    _user_gym_maps[user_id] = (version, gym_map)
+    return gym_map
+
+
+def invalidate_equipment_index():
+    """
+    Mark every worker's index and per-user gym maps stale
+
+    Call whenever exercise equipment requirements, gym equipment, gym names,
+    or the set of exercises changes. Joins the current transaction; the
+    caller commits.
+    """
+    bump_cache_version(CACHE_NAME)
@@ -0,0 +1,60 @@
+"""Exactly-once handling of replayed workout writes
+
+Offline clients queue writes and may send the same one more than once (a
+request that timed out after reaching the server, then a replay). Each write
+carries a client-generated operation id; the result of applying it is stored
+per workout session, and a repeat of the id gets the stored result back
+instead of being applied again.
+"""
+import json
+from datetime import datetime
+from app import db
+from app.models import WorkoutOperation
+
+MAX_OPERATION_ID_LENGTH = 64
+
+
+def is_valid_operation_id(operation_id):
+    """Whether a client-supplied operation id is usable (absent ids are allowed separately)"""
+    return isinstance(operation_id, str) and 0 < len(operation_id) <= MAX_OPERATION_ID_LENGTH
+
+
+def get_recorded_results(session_id, operation_ids):
+    """
+    Get stored results for operations already applied to a session
+
+    Returns:
+        dict: {operation_id: result dict} for the ids that were seen before
+    """
+    operation_ids = {operation_id for operation_id in operation_ids if operation_id}
+    if not operation_ids:
+        return {}
+
+    rows = db.session.query(WorkoutOperation.operation_id, WorkoutOperation.result).filter(
+        WorkoutOperation.workout_session_id == session_id,
+        WorkoutOperation.operation_id.in_(operation_ids)
+    ).all()
+    return {operation_id: json.loads(result) for operation_id, result in rows}
+
+
+def record_results(session_id, results):
+    """
+    Store the results of newly applied operations
+
+    Args:
+        session_id: Workout session the operations were applied to
+        results: {operation_id: JSON-serializable result}
+
+    Uses one executemany insert. Changes join the current transaction (so
+    the record commits or rolls back with the writes); the caller commits.
+    """
+    if not results:
+        return
+
+    now = datetime.utcnow()
+    db.session.execute(db.insert(WorkoutOperation), [{
+        'workout_session_id': session_id,
+        'operation_id': operation_id,
+        'result': json.dumps(result),
+        'created_at': now
+    } for operation_id, result in results.items()])
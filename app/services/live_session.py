@@ -0,0 +1,180 @@
+"""Server-side workout timer and live session state
+
+A session's elapsed time is the seconds banked in duration_seconds plus the
+running segment since timer_resumed_at. The live workout page resumes the
+timer when it opens, pauses it when it closes and checkpoints it every
+CHECKPOINT_SECONDS, so it writes a few times per workout instead of saving
+the duration every few seconds. A running segment is never credited beyond
+MAX_SEGMENT_SECONDS, so a page that is killed without pausing adds at most
+that much time.
+
+stream_live_state() feeds the Server-Sent Events channel that lets the
+user's other devices follow the session. It re-reads one row every
+LIVE_POLL_SECONDS and only sends an event when something changed. Each open
+stream holds a worker thread, so a worker serves at most MAX_LIVE_STREAMS
+of them at once and turns further ones away until a slot frees up.
+"""
+import json
+import threading
+import time
+from datetime import datetime
+from app import db
+from app.models import WorkoutSession, WorkoutSet, SkippedExercise
+
+CHECKPOINT_SECONDS = 300
+# Long enough for a phone left in a pocket between sets
+MAX_SEGMENT_SECONDS = 3600
+
+LIVE_POLL_SECONDS = 2
+KEEPALIVE_SECONDS = 15
+# Streams end after this long; EventSource reconnects after RETRY_MS
+STREAM_SECONDS = 300
+RETRY_MS = 3000
+# Streams per worker process; keeps half of gunicorn's 8 gthread threads
+# free for ordinary requests. Streams over the limit get a 503
+MAX_LIVE_STREAMS = 4
+BUSY_RETRY_SECONDS = 30
+
+_stream_slots = threading.BoundedSemaphore(MAX_LIVE_STREAMS)
+
+
+def _segment_seconds(resumed_at, until):
+    """Seconds of the running segment credited up to `until`"""
+    if resumed_at is None or until <= resumed_at:
+        return 0
+    return min(int((until - resumed_at).total_seconds()), MAX_SEGMENT_SECONDS)
+
+
+def live_duration(session, now=None):
+    """Elapsed workout seconds, including the running segment"""
+    now = now or datetime.utcnow()
+    return (session.duration_seconds or 0) + _segment_seconds(session.timer_resumed_at, now)
+
+
+def is_timer_running(session):
+    """Whether the session's timer is running"""
+    return session.timer_resumed_at is not None
+
+
+def _bank_elapsed(session, until):
+    """Move the running segment up to `until` into duration_seconds"""
+    if session.timer_resumed_at is None or until <= session.timer_resumed_at:
+        return
+    session.duration_seconds = (session.duration_seconds or 0) + _segment_seconds(session.timer_resumed_at, until)
+    session.timer_resumed_at = until
+
+
+def resume_timer(session, at):
+    """Start the timer at `at` (checkpoints it if it is already running)"""
+    if session.timer_resumed_at is None:
+        session.timer_resumed_at = at
+    else:
+        _bank_elapsed(session, at)
+
+
+def pause_timer(session, at):
+    """Stop the timer at `at`, banking the running segment"""
+    _bank_elapsed(session, at)
+    session.timer_resumed_at = None
+
+
+def checkpoint_timer(session, at):
+    """Bank the running segment up to `at` and keep the timer running"""
+    _bank_elapsed(session, at)
+
+
+def set_duration(session, duration_seconds, at):
+    """Overwrite the elapsed time (a running timer continues from `at`)"""
+    session.duration_seconds = duration_seconds
+    if session.timer_resumed_at is not None:
+        session.timer_resumed_at = at
+
+
+TIMER_ACTIONS = {
+    'resume': resume_timer,
+    'pause': pause_timer,
+    'checkpoint': checkpoint_timer,
+}
+
+
+def acquire_stream_slot():
+    """Claim one of this worker's stream slots (False if all are taken)"""
+    return _stream_slots.acquire(blocking=False)
+
+
+def release_stream_slot():
+    """Give back a slot claimed by acquire_stream_slot()"""
+    _stream_slots.release()
+
+
+def _live_row(session_id, user_id):
+    """Raw columns behind the live state, in one query (None if not the user's session)"""
+    set_count = db.select(db.func.count(WorkoutSet.id)).where(
+        WorkoutSet.workout_session_id == WorkoutSession.id
+    ).scalar_subquery()
+    last_set_at = db.select(db.func.max(WorkoutSet.completed_at)).where(
+        WorkoutSet.workout_session_id == WorkoutSession.id
+    ).scalar_subquery()
+    skip_count = db.select(db.func.count()).select_from(SkippedExercise).where(
+        SkippedExercise.workout_session_id == WorkoutSession.id
+    ).scalar_subquery()
+
+    return db.session.query(
+        WorkoutSession.duration_seconds,
+        WorkoutSession.timer_resumed_at,
+        WorkoutSession.is_completed,
+        set_count,
+        last_set_at,
+        skip_count
+    ).filter(
+        WorkoutSession.id == session_id,
+        WorkoutSession.user_id == user_id
+    ).first()
+
+
+def _live_payload(row, now):
+    """Event data for a live row: timer, completion and progress counts"""
+    duration_seconds, resumed_at, is_completed, set_count, last_set_at, skip_count = row
+    return {
+        'duration_seconds': (duration_seconds or 0) + _segment_seconds(resumed_at, now),
+        'timer_running': resumed_at is not None,
+        'is_completed': is_completed,
+        'sets_logged': set_count,
+        'last_set_at': last_set_at.isoformat() if last_set_at else None,
+        'exercises_skipped': skip_count
+    }
+
+
+def stream_live_state(session_id, user_id):
+    """
+    Generate Server-Sent Events for a session
+
+    Yields a 'state' event at start and whenever the
+    session changes, and a comment every KEEPALIVE_SECONDS otherwise. Ends
+    after STREAM_SECONDS, or once the session is completed or gone.
+    """
+    yield f'retry: {RETRY_MS}\n\n'
+
+    started = time.monotonic()
+    last_row = None
+    last_sent = started
+    while True:
+        row = _live_row(session_id, user_id)
+        # Don't hold a read transaction (or a pooled connection) while sleeping
+        db.session.close()
+        if row is None:
+            return
+
+        if tuple(row) != last_row:
+            last_row = tuple(row)
+            last_sent = time.monotonic()
+            yield f'event: state\ndata: {json.dumps(_live_payload(row, datetime.utcnow()))}\n\n'
+            if row.is_completed:
+                return
+        elif time.monotonic() - last_sent >= KEEPALIVE_SECONDS:
+            last_sent = time.monotonic()
+            yield ': keepalive\n\n'
+
+        if time.monotonic() - started >= STREAM_SECONDS:
+            return
+        time.sleep(LIVE_POLL_SECONDS)
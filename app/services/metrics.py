@@ -0,0 +1,153 @@
+"""Prometheus metrics for requests, database use and in-process caches
+
+Exposed at /metrics in the Prometheus text format:
+
+- casettafit_request_duration_seconds: latency histogram by blueprint and endpoint
+- casettafit_requests_total: requests by blueprint, endpoint and status code
+- casettafit_db_queries_total / casettafit_db_seconds_total: SQL statements
+  and time spent in them, by blueprint and endpoint (from the query profiler)
+- casettafit_sqlite_busy_total: statements that failed because the database
+  was locked ('busy') or a table was locked ('locked')
+- casettafit_cache_requests_total: in-process cache lookups by cache and
+  result ('hit' or 'miss'); hit ratio = hit / (hit + miss)
+- casettafit_active_workout_sessions: unfinished sessions started within
+  ACTIVE_SESSION_HOURS, by whether their timer is running (read at scrape time)
+
+Under gunicorn, set PROMETHEUS_MULTIPROC_DIR to an empty directory shared by
+the workers (gunicorn.conf.py clears it at startup). Each worker then writes
+its samples there and a scrape of any worker returns the sum over all of them.
+"""
+import os
+import time
+from datetime import datetime, timedelta
+from flask import g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+ACTIVE_SESSION_HOURS = 12
+
+REQUEST_LATENCY = Histogram(
+    'casettafit_request_duration_seconds',
+    'Time spent handling a request',
+    ['blueprint', 'endpoint']
+)
+REQUESTS = Counter(
+    'casettafit_requests_total',
+    'Requests handled',
+    ['blueprint', 'endpoint', 'status']
+)
+DB_QUERIES = Counter(
+    'casettafit_db_queries_total',
+    'SQL statements run while handling requests',
+    ['blueprint', 'endpoint']
+)
+DB_SECONDS = Counter(
+    'casettafit_db_seconds_total',
+    'Time spent in SQL statements while handling requests',
+    ['blueprint', 'endpoint']
+)
+SQLITE_BUSY = Counter(
+    'casettafit_sqlite_busy_total',
+    'SQLite statements that failed on a lock',
+    ['kind']
+)
+CACHE_REQUESTS = Counter(
+    'casettafit_cache_requests_total',
+    'In-process cache lookups',
+    ['cache', 'result']
+)
+
+
+def record_cache_lookup(cache, hit):
+    """Count one lookup of a named in-process cache"""
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+@event.listens_for(Engine, 'handle_error')
+def _count_sqlite_busy(context):
+    message = str(context.original_exception).lower()
+    if 'database is locked' in message:
+        SQLITE_BUSY.labels('busy').inc()
+    elif 'table is locked' in message:
+        SQLITE_BUSY.labels('locked').inc()
+
+
+class ActiveSessionsCollector:
+    """Counts unfinished workout sessions when the metrics are scraped"""
+
+    def collect(self):
+        from app import db
+        from app.models import WorkoutSession
+
+        since = datetime.utcnow() - timedelta(hours=ACTIVE_SESSION_HOURS)
+        running = WorkoutSession.timer_resumed_at.isnot(None)
+        counts = dict(db.session.query(running, db.func.count(WorkoutSession.id)).filter(
+            WorkoutSession.is_completed.is_(False),
+            WorkoutSession.started_at >= since
+        ).group_by(running).all())
+
+        gauge = GaugeMetricFamily(
+            'casettafit_active_workout_sessions',
+            f'Unfinished workout sessions started in the last {ACTIVE_SESSION_HOURS} hours',
+            labels=['timer']
+        )
+        gauge.add_metric(['running'], counts.get(True, 0))
+        gauge.add_metric(['paused'], counts.get(False, 0))
+        yield gauge
+
+
+def render_metrics():
+    """
+    Metrics in the Prometheus text format
+
+    Returns:
+        tuple: (body bytes, content type)
+    """
+    registry = CollectorRegistry()
+    registry.register(ActiveSessionsCollector())
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    # Single process (development): this process's metrics are the total
+    return generate_latest(REGISTRY) + generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def init_metrics(app):
+    """
+    Register the request hooks that feed the request and query metrics
+
+    Call after init_query_profiler: after_request hooks run in reverse
+    order, so these see the request's query profile before it is removed.
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('metrics_started', None)
+        if started is None or request.endpoint == 'static':
+            return response
+
+        blueprint = request.blueprint or 'app'
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_LATENCY.labels(blueprint, endpoint).observe(time.perf_counter() - started)
+        REQUESTS.labels(blueprint, endpoint, str(response.status_code)).inc()
+
+        profile = g.get('query_profile')
+        if profile is not None:
+            DB_QUERIES.labels(blueprint, endpoint).inc(profile.query_count)
+            DB_SECONDS.labels(blueprint, endpoint).inc(profile.db_seconds)
+
+        return response
+
@@ -0,0 +1,261 @@
+"""Previous ("last performance") lookups for exercises during a workout
+
+Reads are served from the UserExerciseLastPerformance projection, which is
+kept current when workouts are completed, sets are edited, or exercises are
+skipped. The window-function resolver over raw history is used to refresh
+and rebuild the projection.
+"""
+import json
+from app import db
+from app.models import WorkoutSession, WorkoutSet, SkippedExercise, UserExerciseLastPerformance
+
+
+def _serialize_set(workout_set):
+    """Convert a WorkoutSet to the previous-set dict used by the workout page"""
+    return {
+        'set_number': workout_set.set_number,
+        'date': workout_set.completed_at.strftime('%Y-%m-%d'),
+        'reps': workout_set.reps,
+        'weight': workout_set.weight,
+        'rpe': workout_set.rpe
+    }
+
+
+def _latest_session_subquery(user_id, exercise_ids, require_overall_rpe=False):
+    """
+    Build a subquery ranking each exercise's completed, non-skipped sessions
+
+    Row number 1 per exercise_id is the most recent completed session in which
+    the exercise was logged and not skipped.
+    """
+    ranked = db.session.query(
+        WorkoutSet.exercise_id.label('exercise_id'),
+        WorkoutSet.workout_session_id.label('session_id'),
+        WorkoutSet.overall_rpe.label('overall_rpe'),
+        WorkoutSession.completed_at.label('session_completed_at'),
+        db.func.row_number().over(
+            partition_by=WorkoutSet.exercise_id,
+            order_by=(WorkoutSession.completed_at.desc(), WorkoutSession.id.desc())
+        ).label('rn')
+    ).join(
+        WorkoutSession, WorkoutSession.id == WorkoutSet.workout_session_id
+    ).outerjoin(
+        SkippedExercise,
+        db.and_(SkippedExercise.workout_session_id == WorkoutSession.id,
+                SkippedExercise.exercise_id == WorkoutSet.exercise_id)
+    ).filter(
+        WorkoutSession.user_id == user_id,
+        WorkoutSession.is_completed == True,
+        WorkoutSet.exercise_id.in_(exercise_ids),
+        SkippedExercise.id == None  # Exercise was NOT skipped
+    )
+
+    if require_overall_rpe:
+        ranked = ranked.filter(WorkoutSet.overall_rpe != None)
+
+    return ranked.subquery()
+
+
+def resolve_from_history(user_id, exercise_ids):
+    """
+    Resolve previous performance for many exercises from raw workout history
+
+    Args:
+        user_id: ID of the user
+        exercise_ids: Iterable of MasterExercise IDs
+
+    Returns:
+        dict: {exercise_id: {'session_id', 'completed_at', 'previous_sets', 'previous_overall_rpe'}}
+              Exercises with no history are omitted.
+
+    Runs two queries regardless of how many exercises are requested.
+    """
+    exercise_ids = sorted(set(exercise_ids))
+    result = {}
+    if not exercise_ids:
+        return result
+
+    # All sets from each exercise's most recent non-skipped completed session
+    latest = _latest_session_subquery(user_id, exercise_ids)
+    rows = db.session.query(WorkoutSet, latest.c.session_completed_at).join(
+        latest,
+        db.and_(latest.c.session_id == WorkoutSet.workout_session_id,
+                latest.c.exercise_id == WorkoutSet.exercise_id)
+    ).filter(
+        latest.c.rn == 1
+    ).order_by(WorkoutSet.exercise_id, WorkoutSet.set_number).all()
+
+    for workout_set, session_completed_at in rows:
+        entry = result.setdefault(workout_set.exercise_id, {
+            'session_id': workout_set.workout_session_id,
+            'completed_at': session_completed_at,
+            'previous_sets': [],
+            'previous_overall_rpe': None
+        })
+        entry['previous_sets'].append(_serialize_set(workout_set))
+
+    # Overall RPE from the most recent session where one was recorded
+    latest_rpe = _latest_session_subquery(user_id, exercise_ids, require_overall_rpe=True)
+    rpe_rows = db.session.query(
+        latest_rpe.c.exercise_id,
+        latest_rpe.c.overall_rpe
+    ).filter(latest_rpe.c.rn == 1).all()
+
+    for row in rpe_rows:
+        if row.exercise_id in result:
+            result[row.exercise_id]['previous_overall_rpe'] = row.overall_rpe
+
+    return result
+
+
+def get_last_performance(user_id, exercise_ids):
+    """
+    Get previous sets and overall RPE for many exercises at once
+
+    Args:
+        user_id: ID of the user
+        exercise_ids: Iterable of MasterExercise IDs
+
+    Returns:
+        dict: {exercise_id: {'previous_sets': [...], 'previous_overall_rpe': str or None}}
+
+    Single primary-key lookup against the projection table.
+    """
+    exercise_ids = sorted(set(exercise_ids))
+    result = {ex_id: {'previous_sets': [], 'previous_overall_rpe': None} for ex_id in exercise_ids}
+    if not exercise_ids:
+        return result
+
+    rows = UserExerciseLastPerformance.query.filter(
+        UserExerciseLastPerformance.user_id == user_id,
+        UserExerciseLastPerformance.exercise_id.in_(exercise_ids)
+    ).all()
+
+    for row in rows:
+        result[row.exercise_id] = {
+            'previous_sets': json.loads(row.sets_snapshot) if row.sets_snapshot else [],
+            'previous_overall_rpe': row.overall_rpe
+        }
+
+    return result
+
+
+def record_completed_session(session):
+    """
+    Update the projection after a workout session is completed
+
+    The session is the user's newest completed workout, so its non-skipped
+    exercises replace the stored snapshots directly without a history scan.
+    Changes are added to the current transaction; the caller commits.
+    """
+    skipped_ids = {skip.exercise_id for skip in session.skipped_exercises}
+
+    sets_by_exercise = {}
+    for workout_set in session.sets.order_by(WorkoutSet.set_number).all():
+        if workout_set.exercise_id not in skipped_ids:
+            sets_by_exercise.setdefault(workout_set.exercise_id, []).append(workout_set)
+
+    if not sets_by_exercise:
+        return
+
+    existing = {
+        row.exercise_id: row for row in UserExerciseLastPerformance.query.filter(
+            UserExerciseLastPerformance.user_id == session.user_id,
+            UserExerciseLastPerformance.exercise_id.in_(list(sets_by_exercise.keys()))
+        ).all()
+    }
+
+    for exercise_id, workout_sets in sets_by_exercise.items():
+        overall_rpe = next((s.overall_rpe for s in workout_sets if s.overall_rpe), None)
+        row = existing.get(exercise_id)
+
+        if row is None:
+            row = UserExerciseLastPerformance(user_id=session.user_id, exercise_id=exercise_id)
+            db.session.add(row)
+        elif overall_rpe is None:
+            # Keep the most recently recorded overall RPE from an earlier session
+            overall_rpe = row.overall_rpe
+
+        row.workout_session_id = session.id
+        row.sets_snapshot = json.dumps([_serialize_set(s) for s in workout_sets])
+        row.overall_rpe = overall_rpe
+        row.completed_at = session.completed_at
+
+
+def refresh_last_performance(user_id, exercise_ids):
+    """
+    Recompute projection rows for specific exercises from raw history
+
+    Used when history changes out of order (skips on completed sessions,
+    edits to logged sets). Changes are added to the current transaction.
+    """
+    exercise_ids = sorted(set(exercise_ids))
+    if not exercise_ids:
+        return
+
+    resolved = resolve_from_history(user_id, exercise_ids)
+
+    existing = {
+        row.exercise_id: row for row in UserExerciseLastPerformance.query.filter(
+            UserExerciseLastPerformance.user_id == user_id,
+            UserExerciseLastPerformance.exercise_id.in_(exercise_ids)
+        ).all()
+    }
+
+    for exercise_id in exercise_ids:
+        row = existing.get(exercise_id)
+        entry = resolved.get(exercise_id)
+
+        if entry is None:
+            if row is not None:
+                db.session.delete(row)
+            continue
+
+        if row is None:
+            row = UserExerciseLastPerformance(user_id=user_id, exercise_id=exercise_id)
+            db.session.add(row)
+
+        row.workout_session_id = entry['session_id']
+        row.sets_snapshot = json.dumps(entry['previous_sets'])
+        row.overall_rpe = entry['previous_overall_rpe']
+        row.completed_at = entry['completed_at']
+
+
+def rebuild_last_performance(user_id=None):
+    """
+    Repopulate the projection table from raw workout history
+
+    Args:
+        user_id: Optional user to rebuild; rebuilds every user when omitted
+
+    Returns:
+        int: Number of projection rows written
+    """
+    query = UserExerciseLastPerformance.query
+    if user_id is not None:
+        query = query.filter_by(user_id=user_id)
+    query.delete(synchronize_session=False)
+
+    pairs = db.session.query(
+        WorkoutSession.user_id,
+        WorkoutSet.exercise_id
+    ).join(
+        WorkoutSession, WorkoutSession.id == WorkoutSet.workout_session_id
+    ).filter(
+        WorkoutSession.is_completed == True
+    )
+    if user_id is not None:
+        pairs = pairs.filter(WorkoutSession.user_id == user_id)
+
+    exercises_by_user = {}
+    for uid, exercise_id in pairs.distinct().all():
+        exercises_by_user.setdefault(uid, []).append(exercise_id)
+
+    for uid, exercise_ids in exercises_by_user.items():
+        refresh_last_performance(uid, exercise_ids)
+    db.session.flush()
+
+    count = UserExerciseLastPerformance.query
+    if user_id is not None:
+        count = count.filter_by(user_id=user_id)
+    return count.count()
@@ -0,0 +1,155 @@
+"""Bulk creation and copying of program week/day/series/exercise trees
+
+Each level of the tree is written with one executemany INSERT ... RETURNING,
+and parent ids are remapped in memory, so building or cloning a program is a
+handful of statements instead of a flush per row.
+"""
+from app import db
+from app.models import ProgramWeek, ProgramDay, ProgramSeries, ProgramExercise
+
+WEEK_FIELDS = ('week_number', 'week_name', 'is_deload', 'notes')
+DAY_FIELDS = ('day_number', 'day_name', 'is_rest_day', 'has_superset', 'notes')
+SERIES_FIELDS = ('order_index', 'series_type', 'time_seconds', 'notes')
+EXERCISE_FIELDS = ('exercise_id', 'superset_position', 'sets', 'reps', 'lift_time_seconds',
+                   'rest_time_seconds', 'starting_weights', 'target_rpe', 'notes')
+
+
+def _coerce_rows(model, fields, rows):
+    """
+    Convert row values to their columns' Python types
+
+    RETURNING gives values back as the column type reads them, so a '8'
+    passed for an Integer column comes back as 8; converting first keeps
+    the values comparable with what is returned.
+    """
+    converters = {}
+    for field in fields:
+        try:
+            converters[field] = getattr(model, field).type.python_type
+        except NotImplementedError:
+            converters[field] = None
+
+    def coerce(field, value):
+        convert = converters[field]
+        if value is None or convert is None or isinstance(value, convert):
+            return value
+        return convert(value)
+
+    return [{field: coerce(field, row[field]) for field in fields} for row in rows]
+
+
+def _insert_returning_ids(model, rows):
+    """
+    Insert rows with multi-row INSERTs and return their new ids in row order
+
+    sort_by_parameter_order is not used because SQLite then falls back to
+    one statement per row. Instead the inserted columns are returned with
+    each id and matched back to the rows by value (after converting the
+    rows to the column types); rows with identical values are
+    interchangeable, and among them the lowest id goes to the earliest row.
+    render_nulls keeps None values in the statement, since otherwise rows
+    with NULLs in different columns are split into separate INSERT batches.
+    """
+    if not rows:
+        return []
+    fields = list(rows[0])
+    rows = _coerce_rows(model, fields, rows)
+    result = db.session.execute(
+        db.insert(model).returning(model.id, *[getattr(model, field) for field in fields])
+        .execution_options(render_nulls=True),
+        rows
+    )
+
+    ids_by_values = {}
+    for new_id, *values in result.all():
+        ids_by_values.setdefault(tuple(values), []).append(new_id)
+    for ids in ids_by_values.values():
+        ids.sort(reverse=True)
+    return [ids_by_values[tuple(row[field] for field in fields)].pop() for row in rows]
+
+
+def _copy_level(model, fields, source_rows, parent_key, parent_map):
+    """
+    Copy one level of the tree under already-copied parents
+
+    Returns:
+        dict: {source_id: new_id} for the copied rows
+    """
+    rows = [dict({field: getattr(row, field) for field in fields},
+                 **{parent_key: parent_map[getattr(row, parent_key)]})
+            for row in source_rows]
+    new_ids = _insert_returning_ids(model, rows)
+    return {row.id: new_id for row, new_id in zip(source_rows, new_ids)}
+
+
+def create_program_skeleton(program_id, duration_weeks, days_per_week):
+    """
+    Create the empty week and day structure for a new program
+
+    Runs two inserts regardless of program length. Changes are added to
+    the current transaction; the caller commits.
+    """
+    week_ids = _insert_returning_ids(ProgramWeek, [
+        {'program_id': program_id, 'week_number': week_num}
+        for week_num in range(1, duration_weeks + 1)
+    ])
+
+    day_rows = [{'week_id': week_id, 'day_number': day_num}
+                for week_id in week_ids
+                for day_num in range(1, days_per_week + 1)]
+    if day_rows:
+        db.session.execute(db.insert(ProgramDay), day_rows)
+
+
+def copy_program_tree(source_program_id, target_program_id):
+    """
+    Copy every week, day, series and exercise of one program into another
+
+    Args:
+        source_program_id: Program to copy from
+        target_program_id: Program (already flushed) to copy into
+
+    Returns:
+        int: Number of exercises copied
+
+    Reads one query per level and writes one insert per level. Changes are
+    added to the current transaction; the caller commits.
+    """
+    weeks = db.session.query(ProgramWeek.id, ProgramWeek.program_id, *[
+        getattr(ProgramWeek, field) for field in WEEK_FIELDS
+    ]).filter(
+        ProgramWeek.program_id == source_program_id
+    ).order_by(ProgramWeek.week_number, ProgramWeek.id).all()
+
+    week_map = _copy_level(ProgramWeek, WEEK_FIELDS, weeks, 'program_id',
+                           {source_program_id: target_program_id})
+    if not week_map:
+        return 0
+
+    days = db.session.query(ProgramDay.id, ProgramDay.week_id, *[
+        getattr(ProgramDay, field) for field in DAY_FIELDS
+    ]).filter(
+        ProgramDay.week_id.in_(list(week_map))
+    ).order_by(ProgramDay.week_id, ProgramDay.day_number, ProgramDay.id).all()
+
+    day_map = _copy_level(ProgramDay, DAY_FIELDS, days, 'week_id', week_map)
+    if not day_map:
+        return 0
+
+    series = db.session.query(ProgramSeries.id, ProgramSeries.day_id, *[
+        getattr(ProgramSeries, field) for field in SERIES_FIELDS
+    ]).filter(
+        ProgramSeries.day_id.in_(list(day_map))
+    ).order_by(ProgramSeries.day_id, ProgramSeries.order_index, ProgramSeries.id).all()
+
+    series_map = _copy_level(ProgramSeries, SERIES_FIELDS, series, 'day_id', day_map)
+    if not series_map:
+        return 0
+
+    exercises = db.session.query(ProgramExercise.id, ProgramExercise.series_id, *[
+        getattr(ProgramExercise, field) for field in EXERCISE_FIELDS
+    ]).filter(
+        ProgramExercise.series_id.in_(list(series_map))
+    ).order_by(ProgramExercise.series_id, ProgramExercise.superset_position, ProgramExercise.id).all()
+
+    return len(_copy_level(ProgramExercise, EXERCISE_FIELDS, exercises, 'series_id', series_map))
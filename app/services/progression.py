@@ -0,0 +1,98 @@
+"""Progressive overload analysis (first vs. most recent weighted set per exercise)"""
+from app import db
+from app.models import WorkoutSession, WorkoutSet
+
+
+def get_first_last_sets(user_id, exercise_ids=None):
+    """
+    Get the first and most recent weighted set for each exercise in one query
+
+    Args:
+        user_id: ID of the user
+        exercise_ids: Optional iterable of MasterExercise IDs (all exercises when omitted)
+
+    Returns:
+        dict: {exercise_id: {'first': WorkoutSet row, 'last': WorkoutSet row}}
+    """
+    filters = [
+        WorkoutSession.user_id == user_id,
+        WorkoutSet.weight.isnot(None),
+        WorkoutSet.reps.isnot(None)
+    ]
+    if exercise_ids is not None:
+        exercise_ids = list(set(exercise_ids))
+        if not exercise_ids:
+            return {}
+        filters.append(WorkoutSet.exercise_id.in_(exercise_ids))
+
+    ranked = db.session.query(
+        WorkoutSet.id.label('id'),
+        WorkoutSet.exercise_id.label('exercise_id'),
+        WorkoutSet.weight.label('weight'),
+        WorkoutSet.reps.label('reps'),
+        WorkoutSet.completed_at.label('completed_at'),
+        db.func.row_number().over(
+            partition_by=WorkoutSet.exercise_id,
+            order_by=(WorkoutSet.completed_at.asc(), WorkoutSet.id.asc())
+        ).label('rn_first'),
+        db.func.row_number().over(
+            partition_by=WorkoutSet.exercise_id,
+            order_by=(WorkoutSet.completed_at.desc(), WorkoutSet.id.desc())
+        ).label('rn_last')
+    ).join(
+        WorkoutSession, WorkoutSession.id == WorkoutSet.workout_session_id
+    ).filter(*filters).subquery()
+
+    rows = db.session.query(ranked).filter(
+        db.or_(ranked.c.rn_first == 1, ranked.c.rn_last == 1)
+    ).all()
+
+    result = {}
+    for row in rows:
+        entry = result.setdefault(row.exercise_id, {'first': None, 'last': None})
+        if row.rn_first == 1:
+            entry['first'] = row
+        if row.rn_last == 1:
+            entry['last'] = row
+
+    return result
+
+
+def build_progress_entry(exercise_id, name, total_volume, set_count, first_last):
+    """
+    Build the progressive-overload dict for one exercise
+
+    Args:
+        first_last: {'first': row, 'last': row} from get_first_last_sets, or None
+    """
+    first_set = first_last['first'] if first_last else None
+    last_set = first_last['last'] if first_last else None
+
+    if first_set and last_set and first_set.id != last_set.id:
+        first_volume = first_set.weight * first_set.reps
+        last_volume = last_set.weight * last_set.reps
+        return {
+            'name': name,
+            'id': exercise_id,
+            'total_volume': total_volume,
+            'set_count': set_count,
+            'first_weight': first_set.weight,
+            'last_weight': last_set.weight,
+            'first_reps': first_set.reps,
+            'last_reps': last_set.reps,
+            'volume_change': last_volume - first_volume,
+            'percent_change': ((last_volume - first_volume) / first_volume * 100) if first_volume > 0 else 0,
+            'first_date': first_set.completed_at,
+            'last_date': last_set.completed_at
+        }
+
+    return {
+        'name': name,
+        'id': exercise_id,
+        'total_volume': total_volume,
+        'set_count': set_count,
+        'first_weight': None,
+        'last_weight': None,
+        'volume_change': 0,
+        'percent_change': 0
+    }
@@ -0,0 +1,305 @@
+"""Per-request SQL query counting and slow-request logging
+
+SQLAlchemy cursor events time every statement run while a request is being
+handled. After the request, the query count, total database time and
+request time are:
+
+- sent to admins as a Server-Timing header (visible in dev tools),
+- logged as a warning when they exceed QUERY_PROFILER_MAX_QUERIES or
+  QUERY_PROFILER_SLOW_REQUEST_MS, with the slowest statements,
+- added to the per-endpoint totals shown on the admin performance page.
+
+Each worker sums its requests in memory and adds them to the shared
+endpoint_profile_stats table at most every STATS_FLUSH_SECONDS, on its next
+request, so the admin page shows every worker's requests. A reset clears the
+table and bumps the 'query_profiler_stats' cache version; workers drop the
+totals they collected before it instead of adding them.
+
+Set QUERY_PROFILER_ENABLED to False to turn all of this off.
+"""
+import heapq
+import threading
+import time
+from flask import g, request
+from flask_login import current_user
+from sqlalchemy import event, bindparam
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from app.models import EndpointProfileStats, EndpointSlowStatement, CacheVersion
+from app.services.cache_versions import bump_cache_version
+
+# Longest statement text kept for logs and the admin page
+STATEMENT_PREVIEW_LENGTH = 300
+# How often a worker adds its totals to the shared table
+STATS_FLUSH_SECONDS = 10
+STATS_CACHE_NAME = 'query_profiler_stats'
+
+_stats_lock = threading.Lock()
+_pending_stats = {}  # endpoint -> EndpointStats not yet in the shared table
+_stats_version = None  # Reset version at this worker's last flush
+_last_flush = time.monotonic()
+_keep_slowest = 5  # QUERY_PROFILER_SLOWEST
+
+
+class RequestProfile:
+    """Queries run while handling one request"""
+
+    def __init__(self, keep_slowest):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_seconds = 0.0
+        self.keep_slowest = keep_slowest
+        self.slowest = []  # min-heap of (seconds, statement)
+
+    def record(self, statement, seconds):
+        self.query_count += 1
+        self.db_seconds += seconds
+        entry = (seconds, statement[:STATEMENT_PREVIEW_LENGTH])
+        if len(self.slowest) < self.keep_slowest:
+            heapq.heappush(self.slowest, entry)
+        elif entry > self.slowest[0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def slowest_statements(self):
+        """[(milliseconds, statement)] slowest first"""
+        return [(seconds * 1000, ' '.join(statement.split()))
+                for seconds, statement in sorted(self.slowest, reverse=True)]
+
+
+class EndpointStats:
+    """Running totals for one endpoint"""
+
+    def __init__(self, endpoint, keep_slowest):
+        self.endpoint = endpoint
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_ms = 0.0
+        self.max_db_ms = 0.0
+        self.request_ms = 0.0
+        self.max_request_ms = 0.0
+        self.keep_slowest = keep_slowest
+        self.slowest = []  # [(milliseconds, statement)] slowest first
+
+    def add(self, profile, request_ms):
+        db_ms = profile.db_seconds * 1000
+        self.requests += 1
+        self.queries += profile.query_count
+        self.max_queries = max(self.max_queries, profile.query_count)
+        self.db_ms += db_ms
+        self.max_db_ms = max(self.max_db_ms, db_ms)
+        self.request_ms += request_ms
+        self.max_request_ms = max(self.max_request_ms, request_ms)
+        self.slowest = sorted(self.slowest + profile.slowest_statements(), reverse=True)[:self.keep_slowest]
+
+    def merge(self, other):
+        """Fold another worker-side total for the same endpoint into this one"""
+        self.requests += other.requests
+        self.queries += other.queries
+        self.max_queries = max(self.max_queries, other.max_queries)
+        self.db_ms += other.db_ms
+        self.max_db_ms = max(self.max_db_ms, other.max_db_ms)
+        self.request_ms += other.request_ms
+        self.max_request_ms = max(self.max_request_ms, other.max_request_ms)
+        self.slowest = sorted(self.slowest + other.slowest, reverse=True)[:self.keep_slowest]
+
+    @property
+    def avg_queries(self):
+        return self.queries / self.requests if self.requests else 0
+
+    @property
+    def avg_db_ms(self):
+        return self.db_ms / self.requests if self.requests else 0
+
+    @property
+    def avg_request_ms(self):
+        return self.request_ms / self.requests if self.requests else 0
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if g and g.get('query_profile') is not None:
+        conn.info.setdefault('query_start_times', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get('query_start_times')
+    if not start_times:
+        return
+    elapsed = time.perf_counter() - start_times.pop()
+    profile = g.get('query_profile') if g else None
+    if profile is not None:
+        profile.record(statement, elapsed)
+
+
+def init_query_profiler(app):
+    """Register the request hooks that collect and report query profiles"""
+    if not app.config.get('QUERY_PROFILER_ENABLED', True):
+        return
+
+    global _keep_slowest
+    keep_slowest = _keep_slowest = app.config.get('QUERY_PROFILER_SLOWEST', 5)
+    max_queries = app.config.get('QUERY_PROFILER_MAX_QUERIES', 50)
+    slow_request_ms = app.config.get('QUERY_PROFILER_SLOW_REQUEST_MS', 500)
+
+    @app.before_request
+    def start_query_profile():
+        if request.endpoint != 'static':
+            g.query_profile = RequestProfile(keep_slowest)
+
+    @app.after_request
+    def finish_query_profile(response):
+        profile = g.pop('query_profile', None)
+        if profile is None:
+            return response
+
+        request_ms = (time.perf_counter() - profile.started) * 1000
+        db_ms = profile.db_seconds * 1000
+        # Query counts and timings are for admins only
+        if current_user.is_authenticated and current_user.is_admin:
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={db_ms:.1f};desc="{profile.query_count} queries", app;dur={request_ms:.1f}'
+            )
+
+        if profile.query_count > max_queries or request_ms > slow_request_ms:
+            slowest = ''.join(f'\n  {ms:.1f} ms: {statement}' for ms, statement in profile.slowest_statements())
+            app.logger.warning(
+                'Slow request %s %s (%s): %d queries, %.1f ms in database, %.1f ms total%s',
+                request.method, request.path, request.endpoint,
+                profile.query_count, db_ms, request_ms, slowest
+            )
+
+        if request.endpoint:
+            with _stats_lock:
+                stats = _pending_stats.get(request.endpoint)
+                if stats is None:
+                    stats = _pending_stats[request.endpoint] = EndpointStats(request.endpoint, keep_slowest)
+                stats.add(profile, request_ms)
+                flush_due = time.monotonic() - _last_flush >= STATS_FLUSH_SECONDS
+            if flush_due:
+                flush_endpoint_stats()
+
+        return response
+
+
+def flush_endpoint_stats():
+    """
+    Add this worker's totals since its last flush to the shared table
+
+    Runs on its own connection, outside the request's transaction. Totals
+    collected before a reset are dropped; if the database is busy they are
+    kept for the next flush.
+    """
+    global _pending_stats, _stats_version, _last_flush
+    with _stats_lock:
+        pending, _pending_stats = _pending_stats, {}
+        _last_flush = time.monotonic()
+    if not pending:
+        return
+
+    stats_table = EndpointProfileStats.__table__
+    upsert = sqlite_insert(stats_table)
+    upsert = upsert.on_conflict_do_update(index_elements=[stats_table.c.endpoint], set_={
+        'requests': stats_table.c.requests + upsert.excluded.requests,
+        'queries': stats_table.c.queries + upsert.excluded.queries,
+        'max_queries': db.func.max(stats_table.c.max_queries, upsert.excluded.max_queries),
+        'db_ms': stats_table.c.db_ms + upsert.excluded.db_ms,
+        'max_db_ms': db.func.max(stats_table.c.max_db_ms, upsert.excluded.max_db_ms),
+        'request_ms': stats_table.c.request_ms + upsert.excluded.request_ms,
+        'max_request_ms': db.func.max(stats_table.c.max_request_ms, upsert.excluded.max_request_ms),
+    })
+    slow_table = EndpointSlowStatement.__table__
+    # Keep only the slowest statements per endpoint
+    prune = db.delete(slow_table).where(
+        slow_table.c.endpoint == bindparam('flushed_endpoint'),
+        slow_table.c.id.notin_(
+            db.select(slow_table.c.id).where(
+                slow_table.c.endpoint == bindparam('flushed_endpoint')
+            ).order_by(slow_table.c.duration_ms.desc()).limit(_keep_slowest).scalar_subquery()
+        )
+    )
+
+    try:
+        with db.engine.begin() as conn:
+            # Marked so request query counts (endpoint benchmarks) can leave these out
+            conn = conn.execution_options(query_profiler_flush=True)
+            version = conn.execute(
+                db.select(CacheVersion.version).where(CacheVersion.name == STATS_CACHE_NAME)
+            ).scalar() or 0
+            if _stats_version is not None and version != _stats_version:
+                _stats_version = version
+                return
+            _stats_version = version
+
+            conn.execute(upsert, [{
+                'endpoint': stats.endpoint,
+                'requests': stats.requests,
+                'queries': stats.queries,
+                'max_queries': stats.max_queries,
+                'db_ms': stats.db_ms,
+                'max_db_ms': stats.max_db_ms,
+                'request_ms': stats.request_ms,
+                'max_request_ms': stats.max_request_ms,
+            } for stats in pending.values()])
+            slow_rows = [{'endpoint': stats.endpoint, 'duration_ms': ms, 'statement': statement}
+                         for stats in pending.values() for ms, statement in stats.slowest]
+            if slow_rows:
+                conn.execute(db.insert(slow_table), slow_rows)
+                conn.execute(prune, [{'flushed_endpoint': endpoint}
+                                     for endpoint in {row['endpoint'] for row in slow_rows}])
+    except SQLAlchemyError:
+        # Locked by another writer; fold the totals back in for the next flush
+        with _stats_lock:
+            for endpoint, stats in pending.items():
+                if endpoint in _pending_stats:
+                    stats.merge(_pending_stats[endpoint])
+                _pending_stats[endpoint] = stats
+
+
+def get_endpoint_stats():
+    """
+    Per-endpoint totals of every worker since the last reset
+
+    Includes this worker's latest requests; other workers' requests of the
+    last STATS_FLUSH_SECONDS may not be in yet.
+
+    Returns:
+        tuple: (list of EndpointStats by total database time, since as a
+            naive UTC datetime, or None if nothing was recorded yet)
+    """
+    flush_endpoint_stats()
+
+    stats = []
+    for row in EndpointProfileStats.query.order_by(EndpointProfileStats.db_ms.desc()).all():
+        endpoint = EndpointStats(row.endpoint, _keep_slowest)
+        for field in ('requests', 'queries', 'max_queries', 'db_ms', 'max_db_ms', 'request_ms', 'max_request_ms'):
+            setattr(endpoint, field, getattr(row, field))
+        stats.append(endpoint)
+
+    by_endpoint = {endpoint.endpoint: endpoint for endpoint in stats}
+    for row in EndpointSlowStatement.query.order_by(EndpointSlowStatement.duration_ms.desc()).all():
+        endpoint = by_endpoint.get(row.endpoint)
+        if endpoint is not None and len(endpoint.slowest) < _keep_slowest:
+            endpoint.slowest.append((row.duration_ms, row.statement))
+
+    reset = db.session.get(CacheVersion, STATS_CACHE_NAME)
+    since = reset.updated_at if reset else db.session.query(db.func.min(EndpointProfileStats.created_at)).scalar()
+    return stats, since
+
+
+def reset_endpoint_stats():
+    """
+    Clear the per-endpoint totals of every worker
+
+    Joins the current transaction; the caller commits.
+    """
+    global _pending_stats
+    with _stats_lock:
+        _pending_stats = {}
+    db.session.execute(db.delete(EndpointSlowStatement))
+    db.session.execute(db.delete(EndpointProfileStats))
+    bump_cache_version(STATS_CACHE_NAME)
@@ -0,0 +1,237 @@
+"""Daily and weekly analytics rollups for the reports dashboard
+
+Rollup rows are recomputed one bucket at a time when a session completes or
+a logged set is edited, so reports read a handful of pre-aggregated rows
+instead of scanning every WorkoutSet a user has ever logged.
+"""
+from datetime import datetime, time, timedelta
+from itertools import groupby
+from operator import itemgetter
+from app import db
+from app.models import WorkoutSession, WorkoutSet, UserWorkoutRollup, UserExerciseRollup
+
+PERIOD_DAY = 'day'
+PERIOD_WEEK = 'week'
+
+# Rows fetched at a time while rebuilding
+REBUILD_BATCH_SIZE = 50000
+
+PERIOD_LENGTHS = {
+    PERIOD_DAY: timedelta(days=1),
+    PERIOD_WEEK: timedelta(days=7),
+}
+
+
+def period_start(period, day):
+    """Get the start date of the rollup bucket containing a date (weeks start Monday)"""
+    if period == PERIOD_WEEK:
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def _refresh_bucket(user_id, period, start):
+    """Recompute both rollup tables for a single user/period bucket"""
+    start_dt = datetime.combine(start, time.min)
+    end_dt = start_dt + PERIOD_LENGTHS[period]
+    session_filters = (
+        WorkoutSession.user_id == user_id,
+        WorkoutSession.is_completed == True,
+        WorkoutSession.completed_at >= start_dt,
+        WorkoutSession.completed_at < end_dt
+    )
+
+    for model in (UserWorkoutRollup, UserExerciseRollup):
+        db.session.execute(
+            db.delete(model).where(
+                model.user_id == user_id,
+                model.period == period,
+                model.period_start == start
+            )
+        )
+
+    session_count = db.session.query(db.func.count(WorkoutSession.id)).filter(
+        *session_filters
+    ).scalar() or 0
+
+    if not session_count:
+        return
+
+    exercise_stats = db.session.query(
+        WorkoutSet.exercise_id,
+        db.func.count(db.func.distinct(WorkoutSet.workout_session_id)).label('session_count'),
+        db.func.count(WorkoutSet.id).label('set_count'),
+        db.func.coalesce(db.func.sum(WorkoutSet.reps), 0).label('rep_count'),
+        db.func.coalesce(db.func.sum(WorkoutSet.weight * WorkoutSet.reps), 0).label('volume'),
+        db.func.max(WorkoutSet.weight).label('max_weight'),
+        db.func.count(db.case(
+            (db.and_(WorkoutSet.weight.isnot(None), WorkoutSet.reps.isnot(None)), 1)
+        )).label('weighted_set_count')
+    ).join(
+        WorkoutSession, WorkoutSession.id == WorkoutSet.workout_session_id
+    ).filter(
+        *session_filters
+    ).group_by(WorkoutSet.exercise_id).all()
+
+    now = datetime.utcnow()
+    max_weights = [stat.max_weight for stat in exercise_stats if stat.max_weight is not None]
+
+    db.session.execute(db.insert(UserWorkoutRollup).values(
+        user_id=user_id,
+        period=period,
+        period_start=start,
+        session_count=session_count,
+        set_count=sum(stat.set_count for stat in exercise_stats),
+        rep_count=sum(stat.rep_count for stat in exercise_stats),
+        volume=sum(stat.volume for stat in exercise_stats),
+        max_weight=max(max_weights) if max_weights else None,
+        updated_at=now
+    ))
+
+    if exercise_stats:
+        db.session.execute(db.insert(UserExerciseRollup).values([{
+            'user_id': user_id,
+            'period': period,
+            'period_start': start,
+            'exercise_id': stat.exercise_id,
+            'session_count': stat.session_count,
+            'set_count': stat.set_count,
+            'rep_count': stat.rep_count,
+            'volume': stat.volume,
+            'max_weight': stat.max_weight,
+            'weighted_set_count': stat.weighted_set_count,
+            'updated_at': now
+        } for stat in exercise_stats]))
+
+
+def refresh_rollups(user_id, completed_dates):
+    """
+    Recompute the day and week buckets touched by the given completion dates
+
+    Args:
+        user_id: ID of the user
+        completed_dates: Iterable of dates or datetimes (None values are ignored)
+
+    Changes are added to the current transaction; the caller commits.
+    """
+    buckets = set()
+    for value in completed_dates:
+        if value is None:
+            continue
+        day = value.date() if isinstance(value, datetime) else value
+        for period in (PERIOD_DAY, PERIOD_WEEK):
+            buckets.add((period, period_start(period, day)))
+
+    for period, start in sorted(buckets):
+        _refresh_bucket(user_id, period, start)
+
+
+def _new_bucket():
+    """[session ids, set count, rep count, volume, max weight, weighted set count]"""
+    return [set(), 0, 0, 0, None, 0]
+
+
+def _add_set(bucket, session_id, reps, weight):
+    bucket[0].add(session_id)
+    bucket[1] += 1
+    bucket[2] += reps or 0
+    if weight is not None and reps is not None:
+        bucket[3] += weight * reps
+        bucket[5] += 1
+    if weight is not None and (bucket[4] is None or weight > bucket[4]):
+        bucket[4] = weight
+
+
+def _write_user_rollups(user_id, rows, now):
+    """
+    Aggregate one user's (session, completed_at, set, exercise, reps, weight)
+    rows into day and week buckets and insert them
+
+    Returns:
+        int: Number of workout rollup rows written
+    """
+    workouts = {}  # (period, start) -> bucket
+    exercises = {}  # (period, start, exercise_id) -> bucket
+    for _, session_id, completed_at, set_id, exercise_id, reps, weight in rows:
+        day = completed_at.date()
+        for period in (PERIOD_DAY, PERIOD_WEEK):
+            start = period_start(period, day)
+            workout = workouts.setdefault((period, start), _new_bucket())
+            if set_id is None:
+                workout[0].add(session_id)
+                continue
+            _add_set(workout, session_id, reps, weight)
+            _add_set(exercises.setdefault((period, start, exercise_id), _new_bucket()), session_id, reps, weight)
+
+    db.session.execute(db.insert(UserWorkoutRollup.__table__), [{
+        'user_id': user_id,
+        'period': period,
+        'period_start': start,
+        'session_count': len(sessions),
+        'set_count': set_count,
+        'rep_count': rep_count,
+        'volume': volume,
+        'max_weight': max_weight,
+        'updated_at': now
+    } for (period, start), (sessions, set_count, rep_count, volume, max_weight, _) in workouts.items()])
+
+    if exercises:
+        db.session.execute(db.insert(UserExerciseRollup.__table__), [{
+            'user_id': user_id,
+            'period': period,
+            'period_start': start,
+            'exercise_id': exercise_id,
+            'session_count': len(sessions),
+            'set_count': set_count,
+            'rep_count': rep_count,
+            'volume': volume,
+            'max_weight': max_weight,
+            'weighted_set_count': weighted_set_count,
+            'updated_at': now
+        } for (period, start, exercise_id), (sessions, set_count, rep_count, volume, max_weight, weighted_set_count)
+            in exercises.items()])
+
+    return len(workouts)
+
+
+def rebuild_rollups(user_id=None):
+    """
+    Repopulate the rollup tables from raw workout history
+
+    Reads every completed set once, a user at a time, and aggregates the
+    buckets in memory rather than querying each bucket separately, so
+    rebuilding years of history stays a single pass.
+
+    Args:
+        user_id: Optional user to rebuild; rebuilds every user when omitted
+
+    Returns:
+        int: Number of day/week buckets written
+    """
+    for model in (UserWorkoutRollup, UserExerciseRollup):
+        statement = db.delete(model)
+        if user_id is not None:
+            statement = statement.where(model.user_id == user_id)
+        db.session.execute(statement)
+
+    query = db.session.query(
+        WorkoutSession.user_id,
+        WorkoutSession.id,
+        WorkoutSession.completed_at,
+        WorkoutSet.id,
+        WorkoutSet.exercise_id,
+        WorkoutSet.reps,
+        WorkoutSet.weight
+    ).outerjoin(
+        WorkoutSet, WorkoutSet.workout_session_id == WorkoutSession.id
+    ).filter(
+        WorkoutSession.is_completed == True,
+        WorkoutSession.completed_at.isnot(None)
+    )
+    if user_id is not None:
+        query = query.filter(WorkoutSession.user_id == user_id)
+
+    now = datetime.utcnow()
+    count = 0
+    for uid, rows in groupby(query.order_by(WorkoutSession.user_id).yield_per(REBUILD_BATCH_SIZE), key=itemgetter(0)):
+        count += _write_user_rollups(uid, rows, now)
+    return count
@@ -0,0 +1,43 @@
+"""Per-user schedule version tracking for conditional calendar responses"""
+from datetime import datetime
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app import db
+from app.models import UserScheduleVersion, ScheduledDay
+
+
+def get_schedule_version(user_id):
+    """
+    Get the current schedule version for a user
+
+    Returns:
+        tuple: (version, updated_at) - (0, None) if the schedule was never changed
+    """
+    # Re-read: bumps write through an upsert, past any copy the session holds
+    row = db.session.get(UserScheduleVersion, user_id, populate_existing=True)
+    if row is None:
+        return 0, None
+    return row.version, row.updated_at
+
+
+def bump_schedule_version(*user_ids):
+    """
+    Invalidate cached calendar feeds for one or more users
+
+    Call whenever scheduled days, or the program/day/gym names shown in
+    calendar events, change. Changes join the current transaction.
+    """
+    now = datetime.utcnow()
+    rows = [{'user_id': user_id, 'version': 1, 'updated_at': now} for user_id in set(user_ids) if user_id is not None]
+    if not rows:
+        return
+    # One upsert, so two writers creating a user's first version don't collide
+    db.session.execute(sqlite_insert(UserScheduleVersion).values(rows).on_conflict_do_update(
+        index_elements=[UserScheduleVersion.user_id],
+        set_={'version': UserScheduleVersion.version + 1, 'updated_at': now}
+    ))
+
+
+def bump_schedule_version_for(*criteria):
+    """Bump the schedule version of every user with a scheduled day matching the criteria"""
+    user_ids = [row[0] for row in db.session.query(ScheduledDay.user_id).filter(*criteria).distinct().all()]
+    bump_schedule_version(*user_ids)
@@ -0,0 +1,176 @@
+"""Bulk scheduling and rescheduling of program days on the calendar"""
+from datetime import datetime, timedelta
+from app import db
+from app.models import ProgramWeek, ProgramDay, ScheduledDay, ProgramInstance
+from sqlalchemy.orm import joinedload
+
+
+def _day_label(program_day):
+    """Display name for a program day"""
+    return program_day.day_name or f'Day {program_day.day_number}'
+
+
+def schedule_program_days(user_id, program, mappings, gym_id=None, force=False):
+    """
+    Schedule many program days at once
+
+    Args:
+        user_id: ID of the user scheduling the program
+        program: Program being scheduled
+        mappings: List of {'calendar_date': 'YYYY-MM-DD', 'program_day_id': int}
+        gym_id: Optional gym for the instance and its scheduled days
+        force: Schedule even when the program already has workouts on those dates
+
+    Returns:
+        tuple: (ProgramInstance or None, conflicts list)
+
+    Raises:
+        ValueError: If a date is malformed or a program day is not part of the program
+
+    Uses one conflict query, one program-day validation query and a single
+    executemany insert, however many days are scheduled.
+    """
+    parsed = []
+    for mapping in mappings:
+        try:
+            calendar_date = datetime.strptime(mapping['calendar_date'], '%Y-%m-%d').date()
+            program_day_id = int(mapping['program_day_id'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError('Invalid day mapping')
+        parsed.append((calendar_date, program_day_id))
+
+    # Validate every program day belongs to this program in one fetch
+    requested_day_ids = {day_id for _, day_id in parsed}
+    program_days = {
+        day.id: day for day in ProgramDay.query.join(ProgramWeek).filter(
+            ProgramWeek.program_id == program.id,
+            ProgramDay.id.in_(requested_day_ids)
+        ).all()
+    }
+    if requested_day_ids - set(program_days):
+        raise ValueError('Program day not found in this program')
+
+    # Check for conflicts (same program, same date) with a single IN query
+    conflicts = []
+    if not force:
+        existing_days = ScheduledDay.query.filter(
+            ScheduledDay.user_id == user_id,
+            ScheduledDay.program_id == program.id,
+            ScheduledDay.calendar_date.in_({d for d, _ in parsed})
+        ).options(
+            joinedload(ScheduledDay.program_day)
+        ).all()
+        existing_by_date = {}
+        for existing in existing_days:
+            existing_by_date.setdefault(existing.calendar_date, existing)
+
+        for calendar_date, program_day_id in parsed:
+            existing = existing_by_date.get(calendar_date)
+            if existing:
+                conflicts.append({
+                    'date': calendar_date.strftime('%Y-%m-%d'),
+                    'existing_day': _day_label(existing.program_day),
+                    'new_day': _day_label(program_days[program_day_id])
+                })
+
+    if conflicts:
+        return None, conflicts
+
+    # Create program instance
+    instance = ProgramInstance(
+        user_id=user_id,
+        program_id=program.id,
+        gym_id=gym_id,
+        scheduled_date=min(d for d, _ in parsed)
+    )
+    db.session.add(instance)
+    db.session.flush()  # Get the instance ID
+
+    # Create scheduled days in a single executemany
+    now = datetime.utcnow()
+    db.session.execute(db.insert(ScheduledDay), [{
+        'user_id': user_id,
+        'program_id': program.id,
+        'program_day_id': program_day_id,
+        'instance_id': instance.id,
+        'gym_id': gym_id,
+        'calendar_date': calendar_date,
+        'is_completed': False,
+        'created_at': now
+    } for calendar_date, program_day_id in parsed])
+
+    return instance, []
+
+
+def find_next_free_date(user_id, program_id, after_date, exclude_ids=(), max_days=365):
+    """
+    Find the first date after a given date with no workout from the program
+
+    Args:
+        user_id: ID of the user
+        program_id: Program whose scheduled days count as occupied
+        after_date: Search starts the day after this date
+        exclude_ids: ScheduledDay IDs to ignore (e.g. the day being moved)
+        max_days: How far ahead to look
+
+    Returns:
+        date or None: The first free date, or None if the window is full
+
+    Loads the occupied dates in the window with one query and scans for the gap in memory.
+    """
+    window_end = after_date + timedelta(days=max_days)
+    query = db.session.query(ScheduledDay.calendar_date).filter(
+        ScheduledDay.user_id == user_id,
+        ScheduledDay.program_id == program_id,
+        ScheduledDay.calendar_date > after_date,
+        ScheduledDay.calendar_date <= window_end
+    )
+    if exclude_ids:
+        query = query.filter(ScheduledDay.id.notin_(list(exclude_ids)))
+
+    occupied = {row[0] for row in query.distinct().all()}
+
+    candidate = after_date + timedelta(days=1)
+    while candidate <= window_end:
+        if candidate not in occupied:
+            return candidate
+        candidate += timedelta(days=1)
+
+    return None
+
+
+def shift_program_days(user_id, program_id, from_date, days, exclude_ids=()):
+    """
+    Push every workout of a program on or after a date forward by N days
+
+    Args:
+        user_id: ID of the user
+        program_id: Program whose scheduled days are shifted
+        from_date: First date to shift (inclusive)
+        days: Number of days to move each workout
+        exclude_ids: ScheduledDay IDs to leave where they are
+
+    Returns:
+        int: Number of scheduled days moved
+
+    Every later workout moves by the same offset, so the shifted days never
+    collide with each other. Reads the affected rows once and writes them with
+    a single executemany UPDATE. Changes are added to the current transaction;
+    the caller commits.
+    """
+    query = db.session.query(ScheduledDay.id, ScheduledDay.calendar_date).filter(
+        ScheduledDay.user_id == user_id,
+        ScheduledDay.program_id == program_id,
+        ScheduledDay.calendar_date >= from_date
+    )
+    if exclude_ids:
+        query = query.filter(ScheduledDay.id.notin_(list(exclude_ids)))
+
+    offset = timedelta(days=days)
+    updates = [{'id': day_id, 'calendar_date': calendar_date + offset}
+               for day_id, calendar_date in query.all()]
+
+    if updates:
+        db.session.execute(db.update(ScheduledDay), updates)
+
+    return len(updates)
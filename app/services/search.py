@@ -0,0 +1,170 @@
+"""Full-text search over exercises and equipment
+
+On SQLite, searches go through FTS5 tables (exercise_search, equipment_search)
+that mirror master_exercises and master_equipment as external-content indexes
+and are kept in sync by triggers. Each search word is prefix-matched and
+results are ranked with bm25, weighting the name column highest.
+
+When the database is not SQLite, or the FTS tables have not been created,
+searches fall back to ILIKE filters over the same columns.
+"""
+import re
+from app import db
+from app.models import MasterExercise, MasterEquipment
+
+EXERCISE_FTS = 'exercise_search'
+EQUIPMENT_FTS = 'equipment_search'
+
+# Indexed columns per FTS table, with bm25 weights (name counts most)
+FTS_TABLES = {
+    EXERCISE_FTS: {
+        'content': 'master_exercises',
+        'columns': (('name', 10.0), ('primary_muscle', 4.0), ('secondary_muscles', 2.0),
+                    ('category', 2.0), ('difficulty_level', 1.0), ('description', 0.5)),
+    },
+    EQUIPMENT_FTS: {
+        'content': 'master_equipment',
+        'columns': (('name', 10.0), ('equipment_type', 2.0), ('manufacturer', 3.0),
+                    ('model', 3.0), ('description', 0.5)),
+    },
+}
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+_fts_available = {}
+
+
+def fts_table_ddl(table):
+    """CREATE statements for an FTS5 table and the triggers that keep it in sync"""
+    spec = FTS_TABLES[table]
+    content = spec['content']
+    columns = [name for name, _ in spec['columns']]
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+        f"{column_list}, content='{content}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {content} BEGIN "
+        f"INSERT INTO {table}(rowid, {column_list}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {content} BEGIN "
+        f"INSERT INTO {table}({table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE ON {content} BEGIN "
+        f"INSERT INTO {table}({table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {table}(rowid, {column_list}) VALUES (new.id, {new_values}); END",
+    ]
+
+
+def rebuild_search_index():
+    """
+    Create the FTS tables and triggers if needed and repopulate them
+
+    Returns:
+        bool: False if the database is not SQLite (nothing to build)
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return False
+
+    for table in FTS_TABLES:
+        for statement in fts_table_ddl(table):
+            db.session.execute(db.text(statement))
+        db.session.execute(db.text(f"INSERT INTO {table}({table}) VALUES ('rebuild')"))
+
+    _fts_available.clear()
+    return True
+
+
+def fts_available(table):
+    """Whether an FTS table can be used on this database (checked once per process)"""
+    key = (str(db.engine.url), table)
+    if key not in _fts_available:
+        available = False
+        if db.engine.dialect.name == 'sqlite':
+            available = db.session.execute(
+                db.text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': table}
+            ).first() is not None
+        _fts_available[key] = available
+    return _fts_available[key]
+
+
+def match_expression(search):
+    """
+    Convert user input into an FTS5 prefix query
+
+    Every word must match the start of a token, e.g. "ben pre" becomes
+    '"ben"* "pre"*'. Returns None if the input has no searchable words.
+    """
+    words = _WORD_RE.findall(search or '')
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _fts_subquery(table, match):
+    """Matching rowids with their bm25 rank (lower is better)"""
+    weights = ', '.join(str(weight) for _, weight in FTS_TABLES[table]['columns'])
+    return db.select(
+        db.literal_column('rowid').label('rowid'),
+        db.literal_column(f'bm25({table}, {weights})').label('rank')
+    ).select_from(
+        db.table(table)
+    ).where(
+        db.text(f'{table} MATCH :match').bindparams(match=match)
+    ).subquery()
+
+
+def _apply_search(query, model, table, columns, search, rank):
+    """Filter a query on model by search text, using FTS when available"""
+    search = (search or '').strip()
+    if not search:
+        return query
+
+    if fts_available(table):
+        match = match_expression(search)
+        if match is None:
+            return query.filter(db.false())
+        fts = _fts_subquery(table, match)
+        query = query.join(fts, fts.c.rowid == model.id)
+        if rank:
+            query = query.order_by(fts.c.rank)
+        return query
+
+    # Fallback: substring match across the same columns
+    search_filter = f'%{search}%'
+    query = query.filter(db.or_(*[column.ilike(search_filter) for column in columns]))
+    if rank:
+        query = query.order_by(model.name.ilike(f'{search}%').desc())
+    return query
+
+
+def apply_exercise_search(query, search, rank=True):
+    """
+    Filter a query selecting MasterExercise by a search string
+
+    Args:
+        query: Query that selects from MasterExercise
+        search: User-entered search text (empty means no filter)
+        rank: Order results by relevance (later order_by calls break ties)
+    """
+    return _apply_search(query, MasterExercise, EXERCISE_FTS, (
+        MasterExercise.name,
+        MasterExercise.primary_muscle,
+        MasterExercise.secondary_muscles,
+        MasterExercise.category,
+        MasterExercise.difficulty_level,
+        MasterExercise.description
+    ), search, rank)
+
+
+def apply_equipment_search(query, search, rank=True):
+    """Filter a query selecting MasterEquipment by a search string (see apply_exercise_search)"""
+    return _apply_search(query, MasterEquipment, EQUIPMENT_FTS, (
+        MasterEquipment.name,
+        MasterEquipment.equipment_type,
+        MasterEquipment.manufacturer,
+        MasterEquipment.model,
+        MasterEquipment.description
+    ), search, rank)
@@ -0,0 +1,90 @@
+"""Workout streak calculations shared by the dashboard and reports"""
+from datetime import date, timedelta
+from app import db
+from app.models import ScheduledDay
+
+
+def get_completed_dates(user_id, start_date=None, end_date=None):
+    """
+    Get the distinct dates on which a user completed a scheduled workout
+
+    Args:
+        user_id: ID of the user
+        start_date: Optional inclusive lower bound
+        end_date: Optional inclusive upper bound
+
+    Returns:
+        list: Dates in descending order (single query, uses idx_user_date)
+    """
+    query = db.session.query(ScheduledDay.calendar_date).filter(
+        ScheduledDay.user_id == user_id,
+        ScheduledDay.is_completed == True
+    )
+
+    if start_date:
+        query = query.filter(ScheduledDay.calendar_date >= start_date)
+    if end_date:
+        query = query.filter(ScheduledDay.calendar_date <= end_date)
+
+    rows = query.distinct().order_by(ScheduledDay.calendar_date.desc()).all()
+    return [row[0] for row in rows]
+
+
+def compute_streaks(completed_dates, today=None, max_days_back=None):
+    """
+    Compute current and longest streaks from a list of completed dates
+
+    Args:
+        completed_dates: Iterable of dates (any order, duplicates allowed)
+        today: Date the current streak must end on (defaults to date.today())
+        max_days_back: Optional cap on the current streak length
+
+    Returns:
+        dict: {'current': int, 'longest': int}
+
+    The current streak counts consecutive completed days ending today and
+    stops on the first missed day, matching the original dashboard rule.
+    """
+    today = today or date.today()
+    dates = sorted(set(completed_dates), reverse=True)
+
+    # Current streak - walk back from today until the first gap
+    current = 0
+    expected = today
+    for d in dates:
+        if d > today:
+            continue
+        if d != expected:
+            break
+        current += 1
+        expected -= timedelta(days=1)
+        if max_days_back and current >= max_days_back:
+            break
+
+    # Longest streak - single pass over the sorted dates
+    longest = 0
+    run = 0
+    previous = None
+    for d in dates:
+        if previous is not None and previous - d == timedelta(days=1):
+            run += 1
+        else:
+            run = 1
+        longest = max(longest, run)
+        previous = d
+
+    return {'current': current, 'longest': longest}
+
+
+def get_current_streak(user_id, today=None, max_days_back=365):
+    """Get the current streak for a user with one bounded query"""
+    today = today or date.today()
+    window_start = today - timedelta(days=max_days_back - 1)
+    dates = get_completed_dates(user_id, start_date=window_start, end_date=today)
+    return compute_streaks(dates, today=today, max_days_back=max_days_back)['current']
+
+
+def get_streaks(user_id, today=None, max_days_back=365):
+    """Get current and longest streaks for a user from one ordered scan"""
+    dates = get_completed_dates(user_id)
+    return compute_streaks(dates, today=today, max_days_back=max_days_back)
@@ -0,0 +1,211 @@
+"""In-memory typeahead index for the live-workout exercise search
+
+Exercise names are indexed per process by short word prefix and by trigram
+(for matches anywhere in the name). Results are ranked by how
+recently the user logged each exercise, then by whether the name starts with
+the query, then alphabetically.
+
+The catalog is rebuilt when the 'exercise_catalog' cache version changes.
+That version is checked at most every VERSION_CHECK_SECONDS, and each user's
+recency map is reloaded after RECENCY_TTL_SECONDS, so most keystrokes are
+answered without touching the database.
+"""
+import re
+import time
+from bisect import bisect_left
+from itertools import chain
+from app import db
+from app.models import MasterExercise, WorkoutSession, WorkoutSet
+from app.services.cache_versions import get_cache_version, bump_cache_version
+from app.services.metrics import record_cache_lookup
+
+CACHE_NAME = 'exercise_catalog'
+VERSION_CHECK_SECONDS = 5
+RECENCY_TTL_SECONDS = 600
+
+# Above this many matches, walk the alphabetical list instead of sorting
+SORT_THRESHOLD = 200
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+_index = None
+_version_checked_at = 0.0
+_recency = {}  # user_id -> (loaded_at, {exercise_id: last completed_at})
+
+
+def _trigrams(text):
+    """Set of 3-character substrings of a string"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TypeaheadIndex:
+    """Short-prefix and trigram index over exercise names"""
+
+    def __init__(self, version, exercises):
+        """
+        Args:
+            version: Cache version the index was built from
+            exercises: Iterable of (id, name, category) rows
+        """
+        self.version = version
+        self.exercises = {}
+        self._names = {}
+        self._prefixes = {}
+        self._trigrams = {}
+
+        for exercise_id, name, category in exercises:
+            self.exercises[exercise_id] = {'id': exercise_id, 'name': name, 'category': category}
+            lowered = (name or '').lower()
+            self._names[exercise_id] = lowered
+
+            for word in _WORD_RE.findall(lowered):
+                for end in range(1, min(len(word), 2) + 1):
+                    self._prefixes.setdefault(word[:end], set()).add(exercise_id)
+            for trigram in _trigrams(lowered):
+                self._trigrams.setdefault(trigram, set()).add(exercise_id)
+
+        # Alphabetical order, for early-exit ranking of broad queries
+        self._sorted_ids = sorted(self._names, key=lambda ex_id: (self._names[ex_id], ex_id))
+        self._sorted_names = [self._names[ex_id] for ex_id in self._sorted_ids]
+
+    def _matching_word(self, word):
+        """
+        IDs of exercises matching one query word
+
+        Words shorter than three characters must start a word of the name;
+        longer ones may appear anywhere in it (like the old ILIKE search).
+        """
+        if len(word) < 3:
+            return self._prefixes.get(word, set())
+
+        # Every match contains all of the word's trigrams; check the rarest
+        candidates = min((self._trigrams.get(trigram, set()) for trigram in _trigrams(word)), key=len)
+        if len(word) == 3:
+            return candidates
+        return {ex_id for ex_id in candidates if word in self._names[ex_id]}
+
+    def search(self, text, recency=None, limit=20):
+        """
+        Find exercises matching every word of the query
+
+        Args:
+            text: User-entered query
+            recency: Optional {exercise_id: datetime} of the user's last use
+            limit: Maximum number of results
+
+        Returns:
+            list: [{'id', 'name', 'category'}] best matches first
+        """
+        lowered = (text or '').strip().lower()
+        words = _WORD_RE.findall(lowered)
+        if not words:
+            return []
+
+        matches = None
+        for word in words:
+            ids = self._matching_word(word)
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+
+        # Recently used matches first, newest first
+        recency = recency or {}
+        ranked = sorted(
+            (ex_id for ex_id in recency if ex_id in matches),
+            key=recency.get,
+            reverse=True
+        )[:limit]
+
+        if len(ranked) < limit:
+            used = set(ranked)
+            if len(matches) <= SORT_THRESHOLD:
+                ranked.extend(sorted(
+                    (ex_id for ex_id in matches if ex_id not in used),
+                    key=lambda ex_id: (not self._names[ex_id].startswith(lowered), self._names[ex_id], ex_id)
+                )[:limit - len(ranked)])
+            else:
+                # Names starting with the query form one alphabetical run
+                start = bisect_left(self._sorted_names, lowered)
+                end = bisect_left(self._sorted_names, lowered + '\U0010ffff', lo=start)
+                ordered = chain(range(start, end), range(start), range(end, len(self._sorted_ids)))
+                for position in ordered:
+                    ex_id = self._sorted_ids[position]
+                    if ex_id in matches and ex_id not in used:
+                        ranked.append(ex_id)
+                        if len(ranked) >= limit:
+                            break
+
+        return [self.exercises[ex_id] for ex_id in ranked]
+
+    def recent(self, recency, limit=10):
+        """The user's most recently logged exercises"""
+        ordered = sorted(
+            (ex_id for ex_id in recency if ex_id in self.exercises),
+            key=lambda ex_id: recency[ex_id],
+            reverse=True
+        )
+        return [self.exercises[ex_id] for ex_id in ordered[:limit]]
+
+
+def get_typeahead_index():
+    """Get this worker's typeahead index, rebuilding it if the catalog changed"""
+    global _index, _version_checked_at
+    now = time.monotonic()
+    if _index is not None and now - _version_checked_at < VERSION_CHECK_SECONDS:
+        record_cache_lookup(CACHE_NAME, True)
+        return _index
+
+    version = get_cache_version(CACHE_NAME)
+    _version_checked_at = now
+    stale = _index is None or _index.version != version
+    record_cache_lookup(CACHE_NAME, not stale)
+    if stale:
+        rows = db.session.query(MasterExercise.id, MasterExercise.name, MasterExercise.category).all()
+        _index = TypeaheadIndex(version, rows)
+    return _index
+
+
+def invalidate_exercise_catalog():
+    """
+    Mark every worker's typeahead index stale
+
+    Call whenever exercises are created, renamed or deleted. Joins the current
+    transaction; the caller commits. This worker rebuilds on its next search.
+    """
+    global _index
+    bump_cache_version(CACHE_NAME)
+    _index = None
+
+
+def get_user_recency(user_id):
+    """Get {exercise_id: last completed_at} for a user, cached for RECENCY_TTL_SECONDS"""
+    now = time.monotonic()
+    cached = _recency.get(user_id)
+    if cached is not None and now - cached[0] < RECENCY_TTL_SECONDS:
+        record_cache_lookup('exercise_recency', True)
+        return cached[1]
+    record_cache_lookup('exercise_recency', False)
+
+    rows = db.session.query(
+        WorkoutSet.exercise_id,
+        db.func.max(WorkoutSet.completed_at)
+    ).join(
+        WorkoutSession, WorkoutSession.id == WorkoutSet.workout_session_id
+    ).filter(
+        WorkoutSession.user_id == user_id,
+        WorkoutSet.completed_at.isnot(None)
+    ).group_by(WorkoutSet.exercise_id).all()
+
+    recency = {exercise_id: completed_at for exercise_id, completed_at in rows}
+    _recency[user_id] = (now, recency)
+    return recency
+
+
+def note_exercise_logged(user_id, exercise_id, completed_at):
+    """Record a logged set in this worker's cached recency map for the user"""
+    cached = _recency.get(user_id)
+    if cached is None:
+        return
+    previous = cached[1].get(exercise_id)
+    if previous is None or completed_at > previous:
+        cached[1][exercise_id] = completed_at
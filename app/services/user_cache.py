@@ -0,0 +1,119 @@
+"""Cached identity for current_user
+
+Flask-Login calls load_user on every authenticated request. Instead of
+fetching the User row each time, each worker keeps a small snapshot of the
+columns requests actually read (id, username, is_admin, is_active and the
+profile picture shown in the page header) for IDENTITY_TTL_SECONDS.
+
+Changes to a user bump the 'user_identity' cache version. Each worker checks
+that version at most every VERSION_CHECK_SECONDS and drops its snapshots when
+it moves, so an admin edit reaches every worker within a few seconds.
+"""
+import time
+from flask import g
+from flask_login import UserMixin
+from app import db
+from app.models import User, UserProfile
+from app.services.cache_versions import get_cache_version, bump_cache_version
+from app.services.metrics import record_cache_lookup
+
+CACHE_NAME = 'user_identity'
+VERSION_CHECK_SECONDS = 5
+IDENTITY_TTL_SECONDS = 300
+
+_identities = {}  # user_id -> (loaded_at, CachedUser)
+_version = None
+_version_checked_at = 0.0
+
+
+class CachedUser(UserMixin):
+    """
+    Snapshot of a User row used as current_user
+
+    Any attribute not in the snapshot (relationships, created_at, ...) is read
+    from the real User row, loaded on first use in each request.
+    """
+
+    def __init__(self, id, username, is_admin, is_active, profile_picture):
+        self.id = id
+        self.username = username
+        self.is_admin = is_admin
+        self._is_active = is_active
+        self.profile_picture = profile_picture
+
+    @property
+    def is_active(self):
+        return self._is_active
+
+    def __getattr__(self, name):
+        # Only called for attributes the snapshot doesn't have
+        if name.startswith('__'):
+            raise AttributeError(name)
+        # Keep the row on g so the session doesn't reload it per attribute
+        user = g.get('current_user_row')
+        if user is None or user.id != self.__dict__['id']:
+            user = db.session.get(User, self.__dict__['id'])
+            if user is None:
+                raise AttributeError(name)
+            g.current_user_row = user
+        return getattr(user, name)
+
+    def __repr__(self):
+        return f'<CachedUser {self.username}>'
+
+
+def _check_version():
+    """Drop this worker's snapshots if another worker changed a user"""
+    global _version, _version_checked_at
+    now = time.monotonic()
+    if now - _version_checked_at < VERSION_CHECK_SECONDS:
+        return
+
+    version = get_cache_version(CACHE_NAME)
+    _version_checked_at = now
+    if version != _version:
+        _identities.clear()
+        _version = version
+
+
+def get_cached_user(user_id):
+    """
+    Get the identity snapshot for a user, loading it if missing or expired
+
+    Returns:
+        CachedUser or None: None if the user no longer exists
+    """
+    _check_version()
+
+    now = time.monotonic()
+    cached = _identities.get(user_id)
+    if cached is not None and now - cached[0] < IDENTITY_TTL_SECONDS:
+        record_cache_lookup(CACHE_NAME, True)
+        return cached[1]
+    record_cache_lookup(CACHE_NAME, False)
+
+    row = db.session.query(
+        User.id, User.username, User.is_admin, User.is_active, UserProfile.profile_picture
+    ).outerjoin(
+        UserProfile, UserProfile.user_id == User.id
+    ).filter(User.id == user_id).first()
+
+    if row is None:
+        _identities.pop(user_id, None)
+        return None
+
+    identity = CachedUser(*row)
+    _identities[user_id] = (now, identity)
+    return identity
+
+
+def invalidate_user(user_id):
+    """
+    Drop a user's identity snapshot in every worker
+
+    Call whenever a user's username, role, active flag, password or profile
+    picture changes, or the user is deleted. Joins the current transaction;
+    the caller commits.
+    """
+    bump_cache_version(CACHE_NAME)
+    _identities.pop(user_id, None)
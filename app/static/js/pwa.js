@@ -12,6 +12,11 @@
         .then(registration => {
           console.log('[PWA] Service Worker registered:', registration.scope);
           
+          // Replay workout changes a previous visit left queued
+          navigator.serviceWorker.ready.then((ready) => {
+            ready.active.postMessage({ type: 'replay-outbox' });
+          });
+          
           // Check for updates periodically (every 60 seconds)
           setInterval(() => {
             registration.update();
@@ -22,6 +27,18 @@
         });
     });
 
+    // Workout writes queued offline by the service worker
+    navigator.serviceWorker.addEventListener('message', (event) => {
+      const message = event.data || {};
+      
+      if (message.type === 'outbox-status') {
+        updateSyncIndicator(message.pending);
+      } else if (message.type === 'outbox-rejected') {
+        console.error('[PWA] Queued workout change rejected:', message.url, message.error);
+        alert(`A workout change saved offline could not be synced: ${message.error}`);
+      }
+    });
+
     // Listen for service worker updates
     navigator.serviceWorker.addEventListener('controllerchange', () => {
       console.log('[PWA] Service Worker updated');
@@ -126,8 +143,10 @@
       offlineIndicator.style.display = 'none';
     }
     
-    // Optionally show a brief "Back online" message
-    // or trigger data sync
+    // Replay workout changes queued while offline (for browsers without Background Sync)
+    if (navigator.serviceWorker && navigator.serviceWorker.controller) {
+      navigator.serviceWorker.controller.postMessage({ type: 'replay-outbox' });
+    }
   });
 
   window.addEventListener('offline', () => {
@@ -147,6 +166,40 @@
     }
   }
 
+  // ============================================
+  // Pending Sync Indicator
+  // ============================================
+  
+  function updateSyncIndicator(pending) {
+    let syncIndicator = document.getElementById('sync-indicator');
+    if (!syncIndicator) {
+      syncIndicator = document.createElement('div');
+      syncIndicator.id = 'sync-indicator';
+      syncIndicator.style.cssText = `
+        position: fixed;
+        bottom: 60px;
+        left: 50%;
+        transform: translateX(-50%);
+        background: #0dcaf0;
+        color: #000;
+        padding: 6px 14px;
+        border-radius: 5px;
+        z-index: 9999;
+        font-size: 0.875rem;
+        box-shadow: 0 2px 8px rgba(0,0,0,0.2);
+        display: none;
+      `;
+      document.body.appendChild(syncIndicator);
+    }
+    
+    if (pending > 0) {
+      syncIndicator.textContent = `⟳ ${pending} workout change${pending === 1 ? '' : 's'} waiting to sync`;
+      syncIndicator.style.display = 'block';
+    } else {
+      syncIndicator.style.display = 'none';
+    }
+  }
+
   // ============================================
   // Helper: Check if PWA is installable
   // ============================================
@@ -1,7 +1,18 @@
-// CasettaFit Service Worker - v1.1.7
-const CACHE_VERSION = 'casettafit-v1.1.7';
-const STATIC_CACHE = 'casettafit-static-v1.1.7';
-const DYNAMIC_CACHE = 'casettafit-dynamic-v1.1.7';
+// CasettaFit Service Worker - v1.2.2
+const CACHE_VERSION = 'casettafit-v1.2.2';
+const STATIC_CACHE = 'casettafit-static-v1.2.2';
+const DYNAMIC_CACHE = 'casettafit-dynamic-v1.2.2';
+
+// Offline outbox for workout writes (replayed in order once back online)
+const OUTBOX_DB = 'casettafit-outbox';
+const OUTBOX_STORE = 'requests';
+const OUTBOX_SYNC_TAG = 'workout-outbox';
+const OUTBOX_TIMEOUT_MS = 4000;   // Queue a write if the network takes longer than this
+const OUTBOX_MAX_ATTEMPTS = 10;   // Server errors before a queued write is dropped
+const OUTBOX_RETRY_MS = 5000;     // First retry after a deferred replay, doubling each time
+const OUTBOX_RETRY_MAX_MS = 300000;
+// Workout writes that carry operation ids, so replaying them is safe
+const OUTBOX_PATHS = /^\/workout\/api\/session\/\d+\/(batch|complete)$/;
 
 // Assets to cache immediately on install (conservative approach)
 const CRITICAL_ASSETS = [
@@ -56,6 +67,10 @@ self.addEventListener('activate', (event) => {
         console.log('[SW] Activation complete');
         return self.clients.claim();
       })
+      .then(() => {
+        // Writes may have been left queued by the previous worker
+        replayOutbox().catch(() => {});
+      })
   );
 });
 
@@ -64,7 +79,15 @@ self.addEventListener('fetch', (event) => {
   const { request } = event;
   const url = new URL(request.url);
 
-  // Skip non-GET requests
+  // Workout writes - Network First, queued in the outbox when offline
+  if (request.method === 'POST' &&
+      url.origin === self.location.origin &&
+      OUTBOX_PATHS.test(url.pathname)) {
+    event.respondWith(sendOrQueue(request));
+    return;
+  }
+
+  // Skip other non-GET requests
   if (request.method !== 'GET') {
     return;
   }
@@ -86,6 +109,11 @@ self.addEventListener('fetch', (event) => {
     return;
   }
 
+  // Live workout streams (Server-Sent Events) go straight to the network
+  if (request.headers.get('accept') === 'text/event-stream') {
+    return;
+  }
+
   // API requests - Network First (with cache fallback for GET requests)
   if (url.pathname.startsWith('/workout/api/') || 
       url.pathname.startsWith('/api/')) {
@@ -188,4 +216,223 @@ async function networkFirst(request) {
   }
 }
 
+// ============================================
+// Workout outbox
+// ============================================
+
+// Background Sync replays the outbox once connectivity returns
+self.addEventListener('sync', (event) => {
+  if (event.tag === OUTBOX_SYNC_TAG) {
+    event.waitUntil(replayOutbox());
+  }
+});
+
+// Pages ask for a replay when they load and when they come back online
+// (browsers without Background Sync)
+self.addEventListener('message', (event) => {
+  if (event.data && event.data.type === 'replay-outbox') {
+    event.waitUntil(replayOutbox().catch((error) => {
+      console.log('[SW] Outbox replay deferred:', error.message);
+    }));
+  }
+});
+
+// Send a workout write, or queue it and acknowledge locally
+async function sendOrQueue(request) {
+  const body = await request.text();
+
+  // Once anything is queued, later writes queue behind it to keep their order
+  const queued = await outboxAll();
+  if (queued.length === 0) {
+    try {
+      const response = await postJson(request.url, body, OUTBOX_TIMEOUT_MS);
+      if (response.status < 500) {
+        return response;
+      }
+    } catch (error) {
+      console.log('[SW] Workout write failed, queueing:', request.url);
+    }
+  }
+
+  await outboxPut({ url: request.url, body: body, attempts: 0, queuedAt: Date.now() });
+  await notifyClients({ type: 'outbox-status', pending: queued.length + 1 });
+
+  if (self.registration.sync) {
+    self.registration.sync.register(OUTBOX_SYNC_TAG).catch(() => {});
+  }
+  if (queued.length > 0) {
+    replayOutbox().catch(() => {});
+  } else {
+    // The write just failed; give the network a moment before replaying it
+    scheduleOutboxRetry();
+  }
+
+  return localAcknowledgement(new URL(request.url).pathname, body);
+}
+
+// Response the page gets for a queued write, shaped like the server's
+function localAcknowledgement(pathname, body) {
+  const data = JSON.parse(body || '{}');
+  const now = new Date().toISOString();
+  let payload;
+
+  if (pathname.endsWith('/complete')) {
+    payload = { success: true, queued: true, completed_at: data.completed_at || now };
+  } else {
+    payload = {
+      success: true,
+      queued: true,
+      results: (data.operations || []).map((operation) => Object.assign(
+        { success: true, queued: true },
+        operation,
+        operation.type === 'skip' ? { skipped_at: now } : {}
+      ))
+    };
+  }
+
+  return new Response(JSON.stringify(payload), {
+    status: 202,
+    headers: new Headers({ 'Content-Type': 'application/json' })
+  });
+}
+
+// Replay queued writes in order; only one replay runs at a time
+let replaying = null;
+let retryTimer = null;
+let retryDelay = OUTBOX_RETRY_MS;
+
+function replayOutbox() {
+  if (!replaying) {
+    clearTimeout(retryTimer);
+    replaying = drainOutbox()
+      .then(() => {
+        retryDelay = OUTBOX_RETRY_MS;
+      })
+      .catch(async (error) => {
+        // Not every browser has Background Sync, so retry from here too
+        await notifyClients({ type: 'outbox-status', pending: (await outboxAll()).length });
+        scheduleOutboxRetry();
+        throw error;
+      })
+      .finally(() => {
+        replaying = null;
+      });
+  }
+  return replaying;
+}
+
+// Replay again after a delay that doubles up to OUTBOX_RETRY_MAX_MS
+function scheduleOutboxRetry() {
+  clearTimeout(retryTimer);
+  retryTimer = setTimeout(() => {
+    replayOutbox().catch((error) => {
+      console.log('[SW] Outbox replay deferred:', error.message);
+    });
+  }, retryDelay);
+  retryDelay = Math.min(retryDelay * 2, OUTBOX_RETRY_MAX_MS);
+}
+
+async function drainOutbox() {
+  // Writes queued while this runs are picked up by the next pass
+  let entries = await outboxAll();
+  while (entries.length > 0) {
+    await replayEntries(entries);
+    entries = await outboxAll();
+  }
+
+  await notifyClients({ type: 'outbox-status', pending: 0 });
+}
+
+async function replayEntries(entries) {
+  for (const entry of entries) {
+    // Network errors propagate so Background Sync retries later
+    const response = await postJson(entry.url, entry.body);
+    const isJson = (response.headers.get('Content-Type') || '').includes('application/json');
+
+    if (response.ok && isJson && !response.redirected) {
+      await outboxDelete(entry.id);
+    } else if (response.status >= 400 && response.status < 500 &&
+               response.status !== 408 && response.status !== 429) {
+      // Rejected (validation, missing session); retrying would fail the same way
+      const data = isJson ? await response.json() : {};
+      await outboxDelete(entry.id);
+      await notifyClients({ type: 'outbox-rejected', url: entry.url, error: data.error || response.statusText });
+    } else if (response.status >= 500 && entry.attempts + 1 >= OUTBOX_MAX_ATTEMPTS) {
+      await outboxDelete(entry.id);
+      await notifyClients({ type: 'outbox-rejected', url: entry.url, error: `Server error ${response.status}` });
+    } else {
+      // Server error, or logged out (redirected to the login page); keep it for later
+      if (response.status >= 500) {
+        entry.attempts += 1;
+        await outboxPut(entry);
+      }
+      throw new Error(`Replay deferred (status ${response.status})`);
+    }
+  }
+}
+
+// POST a stored JSON body with the user's cookies, optionally with a timeout
+async function postJson(url, body, timeoutMs) {
+  const controller = new AbortController();
+  const timer = timeoutMs ? setTimeout(() => controller.abort(), timeoutMs) : null;
+  try {
+    return await fetch(url, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: body,
+      credentials: 'same-origin',
+      signal: controller.signal
+    });
+  } finally {
+    if (timer) {
+      clearTimeout(timer);
+    }
+  }
+}
+
+async function notifyClients(message) {
+  const clients = await self.clients.matchAll({ type: 'window' });
+  clients.forEach((client) => client.postMessage(message));
+}
+
+// IndexedDB helpers - one object store of { id, url, body, attempts, queuedAt }
+function openOutbox() {
+  return new Promise((resolve, reject) => {
+    const open = indexedDB.open(OUTBOX_DB, 1);
+    open.onupgradeneeded = () => {
+      open.result.createObjectStore(OUTBOX_STORE, { keyPath: 'id', autoIncrement: true });
+    };
+    open.onsuccess = () => resolve(open.result);
+    open.onerror = () => reject(open.error);
+  });
+}
+
+async function outboxRequest(mode, operation) {
+  const db = await openOutbox();
+  return new Promise((resolve, reject) => {
+    const transaction = db.transaction(OUTBOX_STORE, mode);
+    const request = operation(transaction.objectStore(OUTBOX_STORE));
+    transaction.oncomplete = () => {
+      db.close();
+      resolve(request.result);
+    };
+    transaction.onerror = () => {
+      db.close();
+      reject(transaction.error);
+    };
+  });
+}
+
+function outboxAll() {
+  return outboxRequest('readonly', (store) => store.getAll());
+}
+
+function outboxPut(entry) {
+  return outboxRequest('readwrite', (store) => store.put(entry));
+}
+
+function outboxDelete(id) {
+  return outboxRequest('readwrite', (store) => store.delete(id));
+}
+
 console.log('[SW] Service worker loaded');
@@ -0,0 +1,59 @@
+"""Client timestamps on workout writes, as the workout page sends them"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import create_app, db
+from app.models import User, UserProfile, MasterExercise, WorkoutSession, WorkoutSet
+from app.routes.workout import _client_time
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        user = User(username='lifter')
+        user.set_password('password')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(UserProfile(user_id=user.id))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    response = client.post('/auth/login', data={'username': 'lifter', 'password': 'password'})
+    assert response.status_code == 302
+    return client
+
+
+def test_client_time_accepts_z_suffix():
+    earliest = datetime(2026, 1, 1)
+    latest = datetime(2026, 12, 31)
+    assert _client_time('2026-06-01T12:30:00.250Z', earliest, latest) == datetime(2026, 6, 1, 12, 30, 0, 250000)
+    assert _client_time('2026-06-01T14:30:00+02:00', earliest, latest) == datetime(2026, 6, 1, 12, 30)
+    assert _client_time('not a time', earliest, latest) is None
+
+
+def test_batch_set_with_z_timestamp(client):
+    started_at = datetime.utcnow() - timedelta(hours=1)
+    exercise = MasterExercise(name='Bench Press', created_by=1)
+    session = WorkoutSession(user_id=1, started_at=started_at)
+    db.session.add_all([exercise, session])
+    db.session.commit()
+
+    # new Date().toISOString()
+    completed_at = (started_at + timedelta(minutes=10)).isoformat(timespec='milliseconds') + 'Z'
+    response = client.post(f'/workout/api/session/{session.id}/batch', json={'operations': [
+        {'type': 'set', 'exercise_id': exercise.id, 'set_number': 1, 'reps': 5, 'weight': 100,
+         'completed_at': completed_at},
+        {'type': 'timer', 'action': 'pause', 'at': completed_at},
+    ]})
+
+    assert response.status_code == 200, response.get_json()
+    assert WorkoutSet.query.one().completed_at == datetime.fromisoformat(completed_at[:-1])